@@ -1,5 +1,6 @@
 __all__ = [
     "activity_hash",
+    "activity_hashes",
     "add_ecoinvent_33_biosphere_flows",
     "add_ecoinvent_34_biosphere_flows",
     "add_ecoinvent_35_biosphere_flows",
@@ -8,8 +9,10 @@ __all__ = [
     "add_ecoinvent_38_biosphere_flows",
     "add_ecoinvent_39_biosphere_flows",
     "add_example_database",
+    "add_strategy_hook",
     "backup_data_directory",
     "backup_project_directory",
+    "build_setup_bundle",
     "BW2Package",
     "bw2setup",
     "ChemIDPlus",
@@ -27,24 +30,34 @@ __all__ = [
     "Exiobase3MonetaryImporter",
     "exiobase_monetary",
     "get_csv_example_filepath",
+    "get_lci_matrices",
     "get_xlsx_example_filepath",
+    "LinkIndex",
     "lci_matrices_to_excel",
+    "lci_matrices_to_files",
     "lci_matrices_to_matlab",
     "load_json_data_file",
+    "load_setup_bundle",
     "Migration",
     "migrations",
     "MultiOutputEcospold1Importer",
     "normalize_units",
+    "remove_strategy_hook",
     "restore_project_directory",
+    "restore_project_snapshot",
     "SimaProCSVImporter",
     "SimaProLCIACSVImporter",
     "SingleOutputEcospold1Importer",
     "SingleOutputEcospold2Importer",
+    "snapshot_project_directory",
+    "SnapshotStore",
     "useeio11",
     "unlinked_data",
     "UnlinkedData",
 ]
 
+import os
+
 from .version import version as __version__
 
 from .chemidplus import ChemIDPlus
@@ -53,13 +66,18 @@ from .export import (
     DatabaseToGEXF,
     DatabaseSelectionToGEXF,
     keyword_to_gephi_graph,
+    get_lci_matrices,
     lci_matrices_to_excel,
+    lci_matrices_to_files,
     lci_matrices_to_matlab,
 )
 from .backup import (
     backup_data_directory,
     backup_project_directory,
     restore_project_directory,
+    restore_project_snapshot,
+    snapshot_project_directory,
+    SnapshotStore,
 )
 from .data import (
     add_ecoinvent_33_biosphere_flows,
@@ -73,7 +91,10 @@ from .data import (
     get_csv_example_filepath,
     get_xlsx_example_filepath,
 )
+from .linking import LinkIndex
 from .migrations import migrations, Migration, create_core_migrations
+from .profiling import add_strategy_hook, remove_strategy_hook
+from .setup_bundle import build_setup_bundle, load_setup_bundle
 from .importers import (
     CSVImporter,
     CSVLCIAImporter,
@@ -90,7 +111,12 @@ from .importers import (
 )
 from .units import normalize_units
 from .unlinked_data import unlinked_data, UnlinkedData
-from .utils import activity_hash, es2_activity_hash, load_json_data_file
+from .utils import (
+    activity_hash,
+    activity_hashes,
+    es2_activity_hash,
+    load_json_data_file,
+)
 
 from bw2data import config, databases
 
@@ -114,21 +140,11 @@ def create_default_lcia_methods(
     overwrite=False, rationalize_method_names=False, shortcut=True
 ):
     if shortcut:
-        import zipfile
-        import json
-        from pathlib import Path
+        from .data import get_default_lcia_methods_data
         from .importers.base_lcia import LCIAImporter
 
-        fp = Path(__file__).parent.resolve() / "data" / "lcia" / "lcia_39_ecoinvent.zip"
-
-        with zipfile.ZipFile(fp, mode="r") as archive:
-            data = json.load(archive.open("data.json"))
-
-        for method in data:
-            method["name"] = tuple(method["name"])
-
         ei = LCIAImporter("lcia_39_ecoinvent.zip")
-        ei.data = data
+        ei.data = get_default_lcia_methods_data()
         ei.write_methods(overwrite=overwrite)
     else:
         from .importers import EcoinventLCIAImporter
@@ -140,10 +156,45 @@ def create_default_lcia_methods(
         ei.write_methods(overwrite=overwrite)
 
 
-def bw2setup():
+def bw2setup(bundle=False, template=False):
+    """Add the default biosphere database, LCIA methods and core migrations to the current project.
+
+    Args:
+        * *bundle* (bool or str): Load the data from a prebuilt setup bundle (see ``bw2io.setup_bundle``) instead of building it from the data files. ``True`` uses the bundle shipped with ``bw2io``, if it was built with ``dev/build_setup_bundle.py``; a filepath uses that bundle. If the bundle is missing, invalid, or has another biosphere version than ``DEFAULT_BIOSPHERE_VERSION``, the data is built as usual.
+        * *template* (bool or str): Copy the data from a cached project template (see ``bw2io.project_template``). The template is created with ``bundle`` the first time it is needed. ``True`` uses the default template directory, which is keyed by the ``bw2io`` and biosphere versions; a directory path uses that template.
+
+    """
     if "biosphere3" in databases:
         print("Biosphere database already present!!! No setup is needed")
         return
+    if template:
+        from functools import partial
+        from .project_template import (
+            copy_project_template,
+            create_project_template,
+            template_dirpath,
+        )
+
+        dirpath = template_dirpath() if template is True else template
+        if not os.path.isdir(dirpath):
+            print("Creating project template\n")
+            create_project_template(dirpath, partial(bw2setup, bundle=bundle))
+        print("Copying default data from project template\n")
+        copy_project_template(dirpath)
+        return
+    if bundle:
+        import warnings
+        from .errors import InvalidSetupBundle
+        from .setup_bundle import load_setup_bundle, setup_bundle_filepath
+
+        filepath = setup_bundle_filepath() if bundle is True else bundle
+        if os.path.isfile(filepath):
+            print("Loading default data from setup bundle\n")
+            try:
+                load_setup_bundle(filepath)
+                return
+            except InvalidSetupBundle as e:
+                warnings.warn("Ignoring setup bundle: {}".format(e))
     print("Creating default biosphere\n")
     create_default_biosphere3()
     print("Creating default LCIA methods\n")
@@ -166,21 +217,14 @@ def useeio11(name="USEEIO-1.1", collapse_products=False, prune=False):
     from .download_utils import download_with_progressbar
     from pathlib import Path
     import tempfile
-    import zipfile
 
     with tempfile.TemporaryDirectory() as td:
-        dp = Path(td)
         print("Downloading US EEIO 1.1")
         filepath = Path(download_with_progressbar(URL, dirpath=td))
 
-        print("Unzipping file")
-        with zipfile.ZipFile(filepath, "r") as zip_ref:
-            zip_ref.extractall(td)
-
-        filepath.unlink()
-
+        # Data is read directly from the zip archive
         print("Importing data")
-        j = JSONLDImporter(dp, name)
+        j = JSONLDImporter(filepath, name)
         j.apply_strategies(no_warning=True)
         j.merge_biosphere_flows()
         if collapse_products:
@@ -190,7 +234,7 @@ def useeio11(name="USEEIO-1.1", collapse_products=False, prune=False):
         assert j.all_linked
         j.write_database()
 
-        l = JSONLDLCIAImporter(dp)
+        l = JSONLDLCIAImporter(filepath)
         l.apply_strategies()
         l.match_biosphere_by_id(name)
         assert l.all_linked
@@ -203,8 +247,14 @@ def exiobase_monetary(
     products=False,
     name=None,
     ignore_small_balancing_corrections=True,
+    cache=True,
 ):
+    """Download and import EXIOBASE 3 monetary IO tables.
+
+    ``cache`` is passed to ``Exiobase3MonetaryImporter``. By default, the zip file is downloaded once into the ``ArrayCache`` directory, and the tables parsed from it are stored as memory-mapped arrays, so later imports of the same version and year neither download nor parse it again. The cache is shared across projects and capped at ``DEFAULT_ARRAY_CACHE_SIZE`` bytes, deleting the least recently used entries first; call ``ArrayCache().clear()`` to empty it. With ``cache=False``, the zip file is downloaded to a temporary directory, which is deleted afterwards."""
     from .download_utils import download_with_progressbar
+    from .extractors.cache import get_array_cache
+    import contextlib
     import tempfile
     from pathlib import Path
 
@@ -237,17 +287,22 @@ def exiobase_monetary(
     if products and not mapping[version]["products"]:
         raise ValueError(f"product by product table not availabe for version {version}")
 
-    with tempfile.TemporaryDirectory() as td:
-        url = mapping[version]["url"].format(
-            year=year, system="pxp" if products else "ixi"
-        )
-        filepath = download_with_progressbar(url, dirpath=Path(td))
+    url = mapping[version]["url"].format(year=year, system="pxp" if products else "ixi")
+    cache = get_array_cache(cache)
+
+    with contextlib.ExitStack() as stack:
+        if cache is None:
+            td = stack.enter_context(tempfile.TemporaryDirectory())
+            filepath = download_with_progressbar(url, dirpath=Path(td))
+        else:
+            filepath = cache.download(url)
         ex = Exiobase3MonetaryImporter(
             filepath,
             name,
             ignore_small_balancing_corrections=ignore_small_balancing_corrections,
+            cache=cache,
         )
         ex.apply_strategies()
         ex.write_database()
 
-    print(f"Created database {name}. Cleaned up temporary downloads.")
+    print(f"Created database {name}.")
@@ -1,104 +1,581 @@
-import codecs
+import collections
 import datetime
-import json
+import gzip
+import hashlib
+import io
 import os
+import shutil
 import tarfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import platformdirs
 from bw2data import projects
-from bw_processing import safe_filename
+from bw_processing import clean_datapackage_name, safe_filename
 
+from . import json_codec
 
-def backup_data_directory():
-    """Backup data directory to a ``.tar.gz`` (compressed tar archive).
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Version of the project backup archive layout. Version 1 archives have the
+# project name file somewhere in the archive; since version 2 it is the first
+# member, followed by the project directory.
+BACKUP_FORMAT = 2
+PROJECT_NAME_FILE = ".project-name.json"
+# Uncompressed size of the blocks compressed in parallel for gzip archives
+BLOCK_SIZE = 4 * 1024 * 1024
+COMPRESSION_EXTENSIONS = {"gz": "tar.gz", "zstd": "tar.zst"}
+# Caches in a project directory which bw2data can rebuild from other data
+REGENERABLE_DIRECTORIES = ("processed", "search")
+# Version of the snapshot manifest layout
+SNAPSHOT_FORMAT = 1
+# Files are split into fixed-size chunks for snapshots. SQLite changes pages
+# in place, so fixed-size chunks of a multiple of the page size deduplicate
+# well without content-defined chunking.
+SNAPSHOT_CHUNK_SIZE = 1024 * 1024
+# SQLite files are changed in place, possibly without changing their size or
+# modification time, so snapshots always read them again
+SQLITE_SUFFIXES = (".db", ".db-wal", ".db-journal", ".sqlite")
+
+
+class _ParallelGzipWriter(io.RawIOBase):
+    """Write-only stream which gzip-compresses blocks of ``BLOCK_SIZE`` bytes in a thread pool, and writes them in order to ``fileobj``.
+
+    Each block is a separate gzip member. ``gzip``, ``tarfile`` and the ``gzip`` command line tool read such multi-member files as one stream."""
+
+    def __init__(self, fileobj, threads=None, compresslevel=6):
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.threads = threads or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(self.threads)
+        self.pending = collections.deque()
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= BLOCK_SIZE:
+            self._submit(bytes(self.buffer[:BLOCK_SIZE]))
+            del self.buffer[:BLOCK_SIZE]
+        return len(data)
+
+    def _submit(self, block):
+        # ``zlib`` releases the GIL while compressing
+        self.pending.append(
+            self.executor.submit(gzip.compress, block, self.compresslevel)
+        )
+        while len(self.pending) > 2 * self.threads:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def discard(self):
+        """Close without writing buffered data, e.g. after an error"""
+        if not self.closed:
+            self.buffer = bytearray()
+            self.pending.clear()
+            self.executor.shutdown(cancel_futures=True)
+        super().close()
+
+    def close(self):
+        if not self.closed:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer = bytearray()
+            while self.pending:
+                self.fileobj.write(self.pending.popleft().result())
+            self.executor.shutdown()
+        super().close()
+
+
+def _compressed_writer(fileobj, compression, threads):
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the `zstandard` library")
+        return zstandard.ZstdCompressor(threads=threads or -1).stream_writer(
+            fileobj, closefd=False
+        )
+    elif compression == "gz":
+        return _ParallelGzipWriter(fileobj, threads)
+    raise ValueError("Unknown compression {}".format(compression))
+
+
+def _compressed_reader(fileobj):
+    """Open a decompressing stream; compression is detected from the first bytes"""
+    magic = fileobj.read(4)
+    fileobj.seek(0)
+    if magic == b"\x28\xb5\x2f\xfd":
+        if zstandard is None:
+            raise ImportError("This backup requires the `zstandard` library")
+        return zstandard.ZstdDecompressor().stream_reader(
+            fileobj, read_across_frames=True, closefd=False
+        )
+    return gzip.GzipFile(fileobj=fileobj, mode="rb")
+
+
+def _write_archive(
+    filepath, dir_path, arcname, compression, threads, manifest=None, filter=None
+):
+    tmp = filepath + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            stream = _compressed_writer(f, compression, threads)
+            try:
+                with tarfile.open(fileobj=stream, mode="w|") as tar:
+                    if manifest is not None:
+                        payload = json_codec.encode(manifest)
+                        info = tarfile.TarInfo(
+                            "{}/{}".format(arcname, PROJECT_NAME_FILE)
+                        )
+                        info.size = len(payload)
+                        info.mtime = int(datetime.datetime.now().timestamp())
+                        tar.addfile(info, io.BytesIO(payload))
+                    tar.add(dir_path, arcname=arcname, filter=filter)
+            except BaseException:
+                _discard(stream)
+                raise
+            stream.close()
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, filepath)
+    return filepath
+
+
+def _discard(stream):
+    """Close compressed ``stream`` after an error, keeping the original error"""
+    if isinstance(stream, _ParallelGzipWriter):
+        stream.discard()
+    else:
+        try:
+            stream.close()
+        except Exception:
+            pass
+
+
+def _regenerable_check(dir_path):
+    """Return a function which checks if a list of path components, relative to the project directory ``dir_path``, is a cache in ``REGENERABLE_DIRECTORIES``.
+
+    The processed arrays of ``iotable`` databases are not caches, as they are the only copy of their exchanges."""
+    try:
+        databases = json_codec.load(os.path.join(dir_path, "databases.json"))
+    except (OSError, ValueError):
+        databases = {}
+    keep = {
+        clean_datapackage_name(safe_filename(name) + ".zip")
+        for name, metadata in databases.items()
+        if metadata.get("backend") == "iotable"
+    }
+
+    def is_cache(parts):
+        return (
+            len(parts) > 1
+            and parts[0] in REGENERABLE_DIRECTORIES
+            and not (parts[0] == "processed" and parts[1] in keep)
+        )
+
+    return is_cache
+
+
+def _project_name_filter(info):
+    # Written by version 1 backups; the name is now stored in the archive only
+    if info.name.split("/")[1:] == [PROJECT_NAME_FILE]:
+        return None
+    return info
+
+
+def backup_data_directory(compression="gz", threads=None, dirpath=None):
+    """Backup data directory to a compressed tar archive.
 
     Backup archive is saved to the user's home directory.
 
-    Restoration is done manually. Returns the filepath of the backup archive."""
+    Restoration is done manually. Returns the filepath of the backup archive.
+
+    Args:
+        * *compression* (str): ``gz`` (default) or ``zstd``, which requires the ``zstandard`` library. Both are compressed with ``threads`` threads.
+        * *threads* (int, optional): Number of compression threads. Default is the number of CPUs.
+        * *dirpath* (str, optional): Directory to save the archive in. Default is the home directory.
+
+    """
     fp = os.path.join(
-        os.path.expanduser("~"),
-        "brightway2-data-backup.{}.tar.gz".format(
-            datetime.datetime.now().strftime("%d-%B-%Y-%I-%M%p")
+        dirpath or os.path.expanduser("~"),
+        "brightway2-data-backup.{}.{}".format(
+            datetime.datetime.now().strftime("%d-%B-%Y-%I-%M%p"),
+            COMPRESSION_EXTENSIONS.get(compression, compression),
         ),
     )
     print("Creating backup archive - this could take a few minutes...")
-    with tarfile.open(fp, "w:gz") as tar:
-        tar.add(projects.dir, arcname=os.path.basename(projects.dir))
+    return _write_archive(
+        fp, projects.dir, os.path.basename(projects.dir), compression, threads
+    )
 
 
-def backup_project_directory(project):
-    """Backup project data directory to a ``.tar.gz`` (compressed tar archive).
+def backup_project_directory(
+    project,
+    compression="gz",
+    threads=None,
+    exclude_caches=False,
+    dirpath=None,
+    snapshot=False,
+    verify=False,
+):
+    """Backup project data directory to a compressed tar archive.
 
     ``project`` is the name of a project.
 
     Backup archive is saved to the user's home directory.
 
-    Restoration is done using ``restore_project_directory``.
+    Restoration is done using ``restore_project_directory``. The first member of the archive is a small JSON file with the project name, so that the archive can be restored in a single pass.
+
+    If ``snapshot``, create an incremental snapshot instead of an archive; see ``snapshot_project_directory``.
 
-    Returns the filepath of the backup archive."""
+    Args:
+        * *compression* (str): ``gz`` (default) or ``zstd``, which requires the ``zstandard`` library. Both are compressed with ``threads`` threads.
+        * *threads* (int, optional): Number of compression threads. Default is the number of CPUs.
+        * *exclude_caches* (bool): Don't include processed arrays and search indices, which are rebuilt by ``restore_project_directory``.
+        * *dirpath* (str, optional): Directory to save the archive in. Default is the home directory. For snapshots, the snapshot store.
+        * *snapshot* (bool): Create an incremental snapshot.
+        * *verify* (bool): For snapshots, read all files again; see ``snapshot_project_directory``.
+
+    Returns the filepath of the backup archive, or of the snapshot manifest."""
     if project not in projects:
         raise ValueError("Project {} does not exist".format(project))
+    if snapshot:
+        return snapshot_project_directory(project, dirpath, exclude_caches, verify)
 
     fp = os.path.join(
-        os.path.expanduser("~"),
-        "brightway2-project-{}-backup.{}.tar.gz".format(
-            project, datetime.datetime.now().strftime("%d-%B-%Y-%I-%M%p")
+        dirpath or os.path.expanduser("~"),
+        "brightway2-project-{}-backup.{}.{}".format(
+            project,
+            datetime.datetime.now().strftime("%d-%B-%Y-%I-%M%p"),
+            COMPRESSION_EXTENSIONS.get(compression, compression),
         ),
     )
-    dir_path = os.path.join(projects._base_data_dir, safe_filename(project))
-    with open(os.path.join(dir_path, ".project-name.json"), "w") as f:
-        json.dump({"name": project}, f)
+    arcname = safe_filename(project)
+    dir_path = os.path.join(projects._base_data_dir, arcname)
+    manifest = {
+        "name": project,
+        "format": BACKUP_FORMAT,
+        "excluded caches": exclude_caches,
+    }
+    filter = _project_name_filter
+    if exclude_caches:
+        is_cache = _regenerable_check(dir_path)
+        filter = lambda info: (
+            None if is_cache(info.name.split("/")[1:]) else _project_name_filter(info)
+        )
     print("Creating project backup archive - this could take a few minutes...")
-    with tarfile.open(fp, "w:gz") as tar:
-        tar.add(dir_path, arcname=safe_filename(project))
+    return _write_archive(
+        fp, dir_path, arcname, compression, threads, manifest=manifest, filter=filter
+    )
 
 
-def restore_project_directory(fp):
-    """
-    Restore backup created using ``backup_project_directory``.
+def _is_within_directory(directory, target):
+    abs_directory = os.path.abspath(directory)
+    abs_target = os.path.abspath(target)
+    prefix = os.path.commonprefix([abs_directory, abs_target])
+    return prefix == abs_directory
 
-    Raises an error is the project already exists.
 
-    ``fp`` is the filepath of the backup archive.
+def _check_member(path, member):
+    if not _is_within_directory(path, os.path.join(path, member.name)):
+        raise Exception("Attempted Path Traversal in Tar File")
 
-    Returns the name of the newly created project.
-    """
+
+def _restore_legacy(fp):
+    """Restore archives without the project name as first member; reads the archive twice"""
 
     def get_project_name(fp):
-        reader = codecs.getreader("utf-8")
-        # See https://stackoverflow.com/questions/68997850/python-readlines-with-tar-file-gives-streamerror-seeking-backwards-is-not-al/68998071#68998071
         with tarfile.open(fp, "r:gz") as tar:
             for member in tar:
                 if member.name[-17:] == "project-name.json":
-                    return json.load(reader(tar.extractfile(member)))["name"]
+                    return json_codec.load(tar.extractfile(member))["name"]
             raise ValueError("Couldn't find project name file in archive")
 
-    assert os.path.isfile(fp), "Can't find file at path: {}".format(fp)
-    print("Restoring project backup archive - this could take a few minutes...")
     project_name = get_project_name(fp)
 
     with tarfile.open(fp, "r:gz") as tar:
-        def is_within_directory(directory, target):
-            
-            abs_directory = os.path.abspath(directory)
-            abs_target = os.path.abspath(target)
-        
-            prefix = os.path.commonprefix([abs_directory, abs_target])
-            
-            return prefix == abs_directory
-        
-        def safe_extract(tar, path=".", members=None, *, numeric_owner=False):
-        
-            for member in tar.getmembers():
-                member_path = os.path.join(path, member.name)
-                if not is_within_directory(path, member_path):
-                    raise Exception("Attempted Path Traversal in Tar File")
-        
-            tar.extractall(path, members, numeric_owner=numeric_owner) 
-            
-        
-        safe_extract(tar, projects._base_data_dir)
+        path = projects._base_data_dir
+        for member in tar.getmembers():
+            _check_member(path, member)
+        tar.extractall(path)
+
+    return {"name": project_name}
 
+
+def _regenerate_caches():
+    """Rebuild processed arrays and search indices in the current project"""
+    from bw2data import (
+        Database,
+        Method,
+        Normalization,
+        Weighting,
+        databases,
+        methods,
+        normalizations,
+        weightings,
+    )
+
+    for name in databases:
+        db = Database(name)
+        db.process()
+        if databases[name].get("searchable"):
+            db.make_searchable(reset=True)
+    for cls, metadata in (
+        (Method, methods),
+        (Normalization, normalizations),
+        (Weighting, weightings),
+    ):
+        for name in metadata:
+            cls(name).process()
+
+
+def _register_restored_project(manifest):
+    project_name = manifest["name"]
     _current = projects.current
     projects.set_current(project_name, update=False)
+    if manifest.get("excluded caches"):
+        _regenerate_caches()
     projects.set_current(_current)
     return project_name
+
+
+def restore_project_directory(fp):
+    """
+    Restore backup created using ``backup_project_directory``.
+
+    Raises an error is the project already exists.
+
+    ``fp`` is the filepath of the backup archive, or of a snapshot manifest (see ``restore_project_snapshot``).
+
+    Archives are read in a single pass. Processed arrays and search indices are rebuilt if they were excluded from the backup.
+
+    Returns the name of the newly created project.
+    """
+    assert os.path.isfile(fp), "Can't find file at path: {}".format(fp)
+    if str(fp).endswith(".json"):
+        return restore_project_snapshot(fp)
+    print("Restoring project backup archive - this could take a few minutes...")
+
+    path = projects._base_data_dir
+    with open(fp, "rb") as f, _compressed_reader(f) as stream:
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            member = tar.next()
+            if member is not None and member.name.endswith("/" + PROJECT_NAME_FILE):
+                manifest = json_codec.load(tar.extractfile(member))
+                member = tar.next()
+                while member is not None:
+                    _check_member(path, member)
+                    tar.extract(member, path)
+                    member = tar.next()
+            else:
+                manifest = None
+
+    if manifest is None:
+        manifest = _restore_legacy(fp)
+    return _register_restored_project(manifest)
+
+
+class SnapshotStore(object):
+    """Content-addressed store of project snapshots.
+
+    Project files are split into chunks of ``SNAPSHOT_CHUNK_SIZE`` bytes. Each chunk is stored once, compressed, with the SHA-256 hash of its contents as filename. A snapshot is a JSON manifest listing the chunks of each file, so a new snapshot only adds the chunks which changed since earlier snapshots.
+
+    Layout of the store directory:
+
+    * ``chunks/<first two hash characters>/<hash>``
+    * ``snapshots/<project directory name>/<timestamp>.json``
+
+    Default directory is ``snapshots`` in the per-user data directory of the platform, e.g. ``~/.local/share/bw2io/snapshots`` on Linux, or ``BW2IO_SNAPSHOT_DIR`` if this environment variable is set. It is outside the Brightway data directory, so snapshots aren't deleted by ``projects.purge_deleted_directories``, or included in data directory backups."""
+
+    def __init__(self, dirpath=None):
+        self.dirpath = Path(
+            dirpath
+            or os.environ.get("BW2IO_SNAPSHOT_DIR")
+            or Path(platformdirs.user_data_dir("bw2io", appauthor=False))
+            / "snapshots"
+        )
+
+    def chunk_filepath(self, digest):
+        return self.dirpath / "chunks" / digest[:2] / digest
+
+    def add_chunk(self, data):
+        """Store ``data`` if not already present; returns its hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        fp = self.chunk_filepath(digest)
+        if not fp.exists():
+            fp.parent.mkdir(parents=True, exist_ok=True)
+            tmp = fp.with_name(fp.name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(data, 1))
+            os.replace(tmp, fp)
+        return digest
+
+    def get_chunk(self, digest):
+        with open(self.chunk_filepath(digest), "rb") as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError("Snapshot chunk {} is corrupted".format(digest))
+        return data
+
+    def snapshots(self, project=None):
+        """Filepaths of snapshot manifests, oldest first, optionally only for ``project``"""
+        dirpath = self.dirpath / "snapshots"
+        if project is not None:
+            dirpath = dirpath / safe_filename(project)
+        return sorted(dirpath.rglob("*.json"), key=lambda fp: fp.name)
+
+    def prune(self, keep=None):
+        """Delete all but the newest ``keep`` snapshots of each project, and then all chunks not used by the remaining snapshots.
+
+        If ``keep`` is ``None``, no snapshots are deleted, only unused chunks.
+
+        Returns a tuple of the numbers of deleted snapshots and chunks."""
+        removed_snapshots = 0
+        if keep is not None:
+            by_project = collections.defaultdict(list)
+            for fp in self.snapshots():
+                by_project[fp.parent].append(fp)
+            for manifests in by_project.values():
+                for fp in manifests[: max(len(manifests) - keep, 0)]:
+                    fp.unlink()
+                    removed_snapshots += 1
+
+        used = set()
+        for fp in self.snapshots():
+            for obj in json_codec.load(fp)["files"]:
+                used.update(obj["chunks"])
+
+        removed_chunks = 0
+        for fp in (self.dirpath / "chunks").glob("*/*"):
+            if fp.name not in used:
+                fp.unlink()
+                removed_chunks += 1
+        return removed_snapshots, removed_chunks
+
+
+def snapshot_project_directory(project, store=None, exclude_caches=False, verify=False):
+    """Create an incremental, content-addressed snapshot of a project directory.
+
+    Only chunks not already in the store are written. Files with the same size and modification time as in the previous snapshot of this project are not read again, as long as their chunks are still in the store. SQLite databases (``SQLITE_SUFFIXES``) are always read, as they are changed in place; with ``verify``, all files are read.
+
+    Restore snapshots with ``restore_project_snapshot`` or ``restore_project_directory``, and delete old snapshots and unused chunks with ``SnapshotStore.prune``.
+
+    Args:
+        * *project* (str): Name of a project.
+        * *store* (str, Path, or ``SnapshotStore``, optional): Snapshot store. Default is ``SnapshotStore()``.
+        * *exclude_caches* (bool): Don't include processed arrays and search indices, which are rebuilt on restore.
+        * *verify* (bool): Read and hash all files, even if their size and modification time didn't change.
+
+    Returns the filepath of the snapshot manifest."""
+    if project not in projects:
+        raise ValueError("Project {} does not exist".format(project))
+    if not isinstance(store, SnapshotStore):
+        store = SnapshotStore(store)
+
+    dir_path = Path(projects._base_data_dir) / safe_filename(project)
+    previous = store.snapshots(project)
+    previous = (
+        {obj["path"]: obj for obj in json_codec.load(previous[-1])["files"]}
+        if previous
+        else {}
+    )
+    is_cache = _regenerable_check(dir_path) if exclude_caches else lambda parts: False
+
+    files = []
+    for root, dirnames, filenames in os.walk(dir_path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            fp = Path(root) / filename
+            relative = fp.relative_to(dir_path)
+            if filename == PROJECT_NAME_FILE or is_cache(relative.parts):
+                continue
+            stat = fp.stat()
+            obj = {
+                "path": relative.as_posix(),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+            old = previous.get(obj["path"])
+            if (
+                old
+                and not verify
+                and not filename.endswith(SQLITE_SUFFIXES)
+                and (old["size"], old["mtime_ns"]) == (obj["size"], obj["mtime_ns"])
+                # Chunks can be removed by ``SnapshotStore.prune``
+                and all(store.chunk_filepath(d).exists() for d in old["chunks"])
+            ):
+                obj["chunks"] = old["chunks"]
+            else:
+                with open(fp, "rb") as f:
+                    obj["chunks"] = [
+                        store.add_chunk(chunk)
+                        for chunk in iter(lambda: f.read(SNAPSHOT_CHUNK_SIZE), b"")
+                    ]
+            files.append(obj)
+
+    now = datetime.datetime.now()
+    manifest = {
+        "name": project,
+        "format": SNAPSHOT_FORMAT,
+        "created": now.isoformat(),
+        "excluded caches": exclude_caches,
+        "files": files,
+    }
+    fp = (
+        store.dirpath
+        / "snapshots"
+        / safe_filename(project)
+        / (now.strftime("%Y%m%dT%H%M%S%f") + ".json")
+    )
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    json_codec.dump(manifest, fp)
+    return fp
+
+
+def restore_project_snapshot(fp, project_name=None):
+    """Restore a snapshot created by ``snapshot_project_directory``.
+
+    Args:
+        * *fp* (str or Path): Filepath of the snapshot manifest. The snapshot store is the directory containing ``snapshots``.
+        * *project_name* (str, optional): Restore as a new project with this name, instead of the name of the snapshotted project.
+
+    Raises ``ValueError`` if the project or its directory already exists.
+
+    Returns the name of the restored project."""
+    fp = Path(fp)
+    store = SnapshotStore(fp.parent.parent.parent)
+    manifest = json_codec.load(fp)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(
+            "Unsupported snapshot format {}".format(manifest.get("format"))
+        )
+    manifest["name"] = project_name or manifest["name"]
+    dir_path = Path(projects._base_data_dir) / safe_filename(manifest["name"])
+    if manifest["name"] in projects or dir_path.exists():
+        raise ValueError("Project {} already exists".format(manifest["name"]))
+
+    tmp = dir_path.with_name(dir_path.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir()
+    try:
+        for obj in manifest["files"]:
+            target = tmp / obj["path"]
+            if not _is_within_directory(str(tmp), str(target)):
+                raise Exception("Attempted Path Traversal in snapshot")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, "wb") as f:
+                for digest in obj["chunks"]:
+                    f.write(store.get_chunk(digest))
+            os.utime(target, ns=(obj["mtime_ns"], obj["mtime_ns"]))
+    except BaseException:
+        shutil.rmtree(tmp)
+        raise
+    os.replace(tmp, dir_path)
+    return _register_restored_project(manifest)
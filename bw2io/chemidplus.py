@@ -1,10 +1,11 @@
-import json
 from numbers import Number
 from pathlib import Path
 from urllib.parse import quote_plus
 
 import requests
 
+from . import json_codec
+
 DIRPATH = Path(__file__).parent.resolve() / "data"
 
 
@@ -112,12 +113,10 @@ class ChemIDPlus:
             "api_cache": self.api_cache,
             "forbidden_keys": list(self.forbidden_keys),
         }
-        json.dump(
-            data, open(DIRPATH / "chemid_cache.json", "w"), ensure_ascii=False, indent=2
-        )
+        json_codec.dump(data, DIRPATH / "chemid_cache.json", indent=2)
 
     def load_cache(self):
-        data = json.load(open(DIRPATH / "chemid_cache.json"))
+        data = json_codec.load(DIRPATH / "chemid_cache.json")
         self.forbidden_keys = set(data["forbidden_keys"])
         self.master_mapping = {k.lower(): v for k, v in data["master_mapping"].items()}
         self.api_cache = data["api_cache"]
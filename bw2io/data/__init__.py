@@ -1,7 +1,7 @@
 import copy
 import csv
 import gzip
-import json
+import zipfile
 from functools import partial
 from numbers import Number
 from pathlib import Path
@@ -10,6 +10,7 @@ from bw2data import Database, Method, config, databases, methods, parameters
 from bw2data.parameters import Group
 from openpyxl import load_workbook
 
+from .. import json_codec
 from ..compatibility import ECOSPOLD_2_3_BIOSPHERE, SIMAPRO_BIOSPHERE
 from ..units import normalize_units
 
@@ -17,8 +18,7 @@ dirpath = Path(__file__).parent.resolve()
 
 
 def write_json_file(data, name):
-    with open(dirpath / name + ".json", "w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
+    json_codec.dump(data, dirpath / (name + ".json"), indent=2)
 
 
 def get_csv_example_filepath():
@@ -176,7 +176,7 @@ def get_biosphere_2_3_name_migration_data():
 
 
 def get_simapro_water_migration_data():
-    return json.load(open(dirpath / "simapro-water.json"))
+    return json_codec.load(dirpath / "simapro-water.json")
 
 
 def get_us_lci_migration_data():
@@ -185,16 +185,14 @@ def get_us_lci_migration_data():
         "fields": ["name"],
         "data": [
             ((k,), {"name": v})
-            for k, v in json.load(
-                open(dirpath / "us-lci.json", encoding="utf-8")
-            ).items()
+            for k, v in json_codec.load(dirpath / "us-lci.json").items()
         ],
     }
 
 
 def get_exiobase_biosphere_migration_data():
     """Migrate to ecoinvent3 flow names"""
-    return json.load(open(dirpath / "exiomigration.json", encoding="utf-8"))
+    return json_codec.load(dirpath / "exiomigration.json")
 
 
 def convert_simapro_ecoinvent_elementary_flows():
@@ -231,7 +229,7 @@ def convert_simapro_ecoinvent_3_migration_data():
             dirpath, "lci", "Simapro - ecoinvent {} mapping.gzip".format(version)
         )
         with gzip.GzipFile(fp, "w") as fout:
-            fout.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+            fout.write(json_codec.encode(data))
 
 
 def get_simapro_ecoinvent_3_migration_data(version):
@@ -251,7 +249,7 @@ def get_simapro_ecoinvent_3_migration_data(version):
     SimaPro type is either ``System terminated`` or ``Unit process``. We always match to unit processes regardless of SimaPro type."""
     fp = dirpath / "lci" / ("Simapro - ecoinvent {} mapping.gzip".format(version))
     with gzip.GzipFile(fp, "r") as fout:
-        data = json.loads(fout.read().decode("utf-8"))
+        data = json_codec.loads(fout.read())
     return {
         "fields": ["name"],
         "data": [
@@ -304,8 +302,8 @@ def convert_ecoinvent_2_301():
 
 
 def _add_new_ecoinvent_biosphere_flows(version):
-    flows = json.load(
-        open(dirpath / "lci" / ("ecoinvent {} new biosphere.json".format(version)))
+    flows = json_codec.load(
+        dirpath / "lci" / ("ecoinvent {} new biosphere.json".format(version))
     )
 
     db = Database(config.biosphere)
@@ -389,13 +387,23 @@ def convert_lcia_methods_data():
     return csv_data, cf_data, units, filename
 
 
+def get_default_lcia_methods_data():
+    """Get the prepared ecoinvent 3.9 LCIA methods, already linked to ``biosphere3``"""
+    fp = dirpath / "lcia" / "lcia_39_ecoinvent.zip"
+    with zipfile.ZipFile(fp, mode="r") as archive:
+        data = json_codec.loads(archive.read("data.json"))
+    for method in data:
+        method["name"] = tuple(method["name"])
+    return data
+
+
 def get_valid_geonames():
     """Get list of short location names used in ecoinvent 3"""
-    return json.load(open(dirpath / "lci" / "geodata.json", encoding="utf-8"))["names"]
+    return json_codec.load(dirpath / "lci" / "geodata.json")["names"]
 
 
 def get_ecoinvent_pre35_migration_data():
-    return json.load(open(dirpath / "lci" / "ecoinvent_pre35_migration.json"))
+    return json_codec.load(dirpath / "lci" / "ecoinvent_pre35_migration.json")
 
 
 def update_db_ecoinvent_locations(database_name):
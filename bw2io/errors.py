@@ -50,3 +50,9 @@ class MissingMigration(Exception):
     """Needed migration data is missing"""
 
     pass
+
+
+class InvalidSetupBundle(Exception):
+    """Setup bundle can't be read or doesn't validate"""
+
+    pass
@@ -46,12 +46,32 @@ MAPPING = {
 }
 
 
+def iterate_database(db):
+    """Iterate over the activities of ``db`` one at a time.
+
+    Iterating over a ``Database`` keeps every row of the underlying ``peewee`` query in memory; ``iterator()`` doesn't."""
+    try:
+        queryset = db._get_queryset()
+    except AttributeError:
+        yield from db
+        return
+    node_class = getattr(db, "node_class", None)
+    if node_class is None:
+        from bw2data.backends import Activity as node_class
+    for ds in queryset.iterator():
+        yield node_class(ds)
+
+
 class CSVFormatter(object):
+    """Format a database and its parameters as rows for CSV and Excel export.
+
+    Activities are read, and rows are created, one activity at a time by ``iterate_activities`` and ``iterate_formatted_data``, so that memory use doesn't depend on the size of the database."""
+
     def __init__(self, database_name, objs=None):
         assert database_name in databases, "Database {} not found".format(database_name)
         self.db = Database(database_name)
         self.db.order_by = "name"
-        self.objs = objs or iter(self.db)
+        self.objs = objs or iterate_database(self.db)
 
     def get_project_parameters(self):
         return self.order_dicts(
@@ -188,10 +208,19 @@ class CSVFormatter(object):
         """
         return {
             "database": self.get_database_metadata(),
-            "activities": [self.get_activity(obj) for obj in self.objs],
+            "activities": list(self.iterate_activities()),
         }
 
+    def iterate_activities(self):
+        """Yield the data of each activity, as in ``get_unformatted_data``"""
+        for obj in self.objs:
+            yield self.get_activity(obj)
+
     def get_formatted_data(self, sections=None):
+        return list(self.iterate_formatted_data(sections))
+
+    def iterate_formatted_data(self, sections=None):
+        """Yield the rows of the export one at a time; see ``get_formatted_data``"""
         if sections is None:
             sections = [
                 "project parameters",
@@ -202,48 +231,43 @@ class CSVFormatter(object):
                 "exchanges",
             ]
 
-        result = []
-        data = self.get_unformatted_data()
-        db = data["database"]
+        db = self.get_database_metadata()
         if db["project parameters"] and "project parameters" in sections:
-            result.extend([["Project parameters"], db["project parameters"]["columns"]])
-            result.extend(db["project parameters"]["data"])
-            result.append([])
+            yield ["Project parameters"]
+            yield db["project parameters"]["columns"]
+            yield from db["project parameters"]["data"]
+            yield []
 
         if "database" in sections:
-            result.append(["Database", db["name"]])
-            result.extend(db["metadata"])
-            result.append([])
+            yield ["Database", db["name"]]
+            yield from db["metadata"]
+            yield []
 
         if db["parameters"] and "database parameters" in sections:
-            result.extend([["Database parameters"], db["parameters"]["columns"]])
-            result.extend(db["parameters"]["data"])
-            result.append([])
+            yield ["Database parameters"]
+            yield db["parameters"]["columns"]
+            yield from db["parameters"]["data"]
+            yield []
 
         if "activities" not in sections:
-            return result
-        for act in data["activities"]:
-            result.append(["Activity", act["name"]])
-            result.extend(act["metadata"])
+            return
+        for act in self.iterate_activities():
+            yield ["Activity", act["name"]]
+            yield from act["metadata"]
 
             if act["parameters"] and "activity parameters" in sections:
-                result.extend(
-                    [
-                        ["Parameters", act["parameters"]["group"]],
-                        act["parameters"]["columns"],
-                    ]
-                )
-                result.extend(act["parameters"]["data"])
-                result.append([])
+                yield ["Parameters", act["parameters"]["group"]]
+                yield act["parameters"]["columns"]
+                yield from act["parameters"]["data"]
+                yield []
 
             if "exchanges" in sections:
-                result.append(["Exchanges"])
+                yield ["Exchanges"]
                 if act["exchanges"]:
-                    result.append(act["exchanges"]["columns"])
-                    result.extend(act["exchanges"]["data"])
+                    yield act["exchanges"]["columns"]
+                    yield from act["exchanges"]["data"]
 
-            result.append([])
-        return result
+            yield []
 
 
 def write_lci_csv(database_name, objs=None, sections=None, dirpath=None):
@@ -259,8 +283,6 @@ def write_lci_csv(database_name, objs=None, sections=None, dirpath=None):
     Returns the filepath of the exported file.
 
     """
-    data = CSVFormatter(database_name, objs).get_formatted_data(sections)
-
     if dirpath is None:
         dirpath = projects.output_dir
     if not os.path.isdir(dirpath) or not os.access(dirpath, os.W_OK):
@@ -269,9 +291,8 @@ def write_lci_csv(database_name, objs=None, sections=None, dirpath=None):
     safe_name = safe_filename(database_name, False)
     filepath = os.path.join(dirpath, "lci-" + safe_name + ".csv")
 
+    data = CSVFormatter(database_name, objs).iterate_formatted_data(sections)
     with open(filepath, "w", newline="") as f:
-        writer = csv.writer(f)
-        for line in data:
-            writer.writerow(line)
+        csv.writer(f).writerows(data)
 
     return filepath
@@ -8,6 +8,10 @@ from bw_processing import safe_filename
 
 from ..utils import activity_hash
 from .csv import CSVFormatter
+from .matrices import get_lci_matrices
+
+# Maximum number of columns in an Excel worksheet
+EXCEL_MAX_COLUMNS = 16384
 
 
 def create_valid_worksheet_name(string):
@@ -23,110 +27,66 @@ def create_valid_worksheet_name(string):
     return string[:30]
 
 
-def lci_matrices_to_excel(database_name, include_descendants=True):
-
-    """Fake docstring"""
-
-    from bw2calc import LCA
+def _write_sparse_rows(sheet, matrix, labels):
+    """Write the row ``labels`` and the nonzero values of CSR ``matrix``, one row at a time"""
+    for row, label in enumerate(labels):
+        sheet.write_string(row + 1, 0, label)
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        for col, value in zip(
+            matrix.indices[start:end].tolist(), matrix.data[start:end].tolist()
+        ):
+            sheet.write_number(row + 1, col + 1, value)
 
-    print("Starting Excel export. This can be slow for large matrices!")
-    safe_name = safe_filename(database_name, False)
-    filepath = os.path.join(projects.output_dir, safe_name + ".xlsx")
-
-    lca = LCA({Database(database_name).random(): 1})
-    lca.load_lci_data()
-    lca.fix_dictionaries()
-
-    if not include_descendants:
-        lca.activity_dict = {
-            key: value
-            for key, value in lca.activity_dict.items()
-            if key[0] == database_name
-        }
-
-    # Drop biosphere flows with zero references
-    # TODO: This will ignore (-1 + 1 = 0) references
-    lca.biosphere_dict = {
-        key: value
-        for key, value in lca.biosphere_dict.items()
-        if lca.biosphere_matrix[lca.biosphere_dict[key], :].sum() != 0
-    }
 
-    workbook = xlsxwriter.Workbook(filepath)
-    bold = workbook.add_format({"bold": True})
+def lci_matrices_to_excel(database_name, include_descendants=True, dirpath=None):
+    """Export the technosphere and biosphere matrices of ``database_name`` to an Excel spreadsheet.
 
-    print("Sorting objects")
+    The workbook has the sheets ``technosphere`` and ``biosphere``, with the matrix values, and ``technosphere-labels`` and ``biosphere-labels``. Matrices are built by ``get_lci_matrices``; only nonzero values are written.
 
-    sorted_activity_keys = sorted(
-        [
-            (Database.get(key).get("name") or u"Unknown", key)
-            for key in lca.activity_dict
-        ]
-    )
-    sorted_product_keys = sorted(
-        [(Database.get(key).get("name") or u"Unknown", key) for key in lca.product_dict]
-    )
-    sorted_bio_keys = sorted(
-        [
-            (Database.get(key).get("name") or u"Unknown", key)
-            for key in lca.biosphere_dict
-        ]
-    )
+    Excel worksheets have at most 16,384 columns, so this doesn't work for large databases like ecoinvent; use ``lci_matrices_to_files`` instead.
 
-    tm_sheet = workbook.add_worksheet("technosphere")
-    tm_sheet.set_column("A:A", 50)
+    Default directory is ``projects.output_dir``, set ``dirpath`` to have save the file somewhere else.
 
-    data = Database(database_name).load()
+    Returns the filepath of the exported file.
 
-    # Labels
-    for index, data in enumerate(sorted_activity_keys):
-        tm_sheet.write_string(0, index + 1, data[0])
-    for index, data in enumerate(sorted_product_keys):
-        tm_sheet.write_string(index + 1, 0, data[0])
+    """
+    matrices = get_lci_matrices(database_name, include_descendants)
+    if len(matrices.activities) + 1 > EXCEL_MAX_COLUMNS:
+        raise ValueError(
+            "{} activities don't fit in an Excel worksheet; use "
+            "`lci_matrices_to_files` instead".format(len(matrices.activities))
+        )
 
-    print("Entering technosphere matrix data")
+    safe_name = safe_filename(database_name, False)
+    filepath = os.path.join(dirpath or projects.output_dir, safe_name + ".xlsx")
 
-    coo = lca.technosphere_matrix.tocoo()
+    workbook = xlsxwriter.Workbook(filepath, {"constant_memory": True})
+    bold = workbook.add_format({"bold": True})
 
-    # Translate row index to sorted product index
-    act_dict = {obj[1]: idx for idx, obj in enumerate(sorted_activity_keys)}
-    pro_dict = {obj[1]: idx for idx, obj in enumerate(sorted_product_keys)}
-    bio_dict = {obj[1]: idx for idx, obj in enumerate(sorted_bio_keys)}
+    def name(ds):
+        return ds["name"] or "Unknown"
 
-    pro_lookup = {v: pro_dict[k] for k, v in lca.product_dict.items()}
-    bio_lookup = {v: bio_dict[k] for k, v in lca.biosphere_dict.items()}
-    act_lookup = {v: act_dict[k] for k, v in lca.activity_dict.items()}
+    activity_names = [name(ds) for ds in matrices.activities]
 
-    # Matrix values
-    for row, col, value in zip(coo.row, coo.col, coo.data):
-        tm_sheet.write_number(pro_lookup[row] + 1, act_lookup[col] + 1, value)
+    tm_sheet = workbook.add_worksheet("technosphere")
+    tm_sheet.set_column("A:A", 50)
+    tm_sheet.write_row(0, 1, activity_names)
+    _write_sparse_rows(
+        tm_sheet, matrices.technosphere, [name(ds) for ds in matrices.products]
+    )
 
     bm_sheet = workbook.add_worksheet("biosphere")
     bm_sheet.set_column("A:A", 50)
-
-    data = Database(database_name).load()
-
-    # Labels
-    for index, data in enumerate(sorted_activity_keys):
-        bm_sheet.write_string(0, index + 1, data[0])
-    for index, data in enumerate(sorted_bio_keys):
-        bm_sheet.write_string(index + 1, 0, data[0])
-
-    print("Entering biosphere matrix data")
-
-    coo = lca.biosphere_matrix.tocoo()
-
-    # Matrix values
-    for row, col, value in zip(coo.row, coo.col, coo.data):
-        bm_sheet.write_number(bio_lookup[row] + 1, act_lookup[col] + 1, value)
+    bm_sheet.write_row(0, 1, activity_names)
+    _write_sparse_rows(bm_sheet, matrices.biosphere, [name(ds) for ds in matrices.flows])
 
     COLUMNS = (
-        u"Index",
-        u"Name",
-        u"Reference product",
-        u"Unit",
-        u"Categories",
-        u"Location",
+        "Index",
+        "Name",
+        "Reference product",
+        "Unit",
+        "Categories",
+        "Location",
     )
 
     tech_sheet = workbook.add_worksheet("technosphere-labels")
@@ -134,51 +94,50 @@ def lci_matrices_to_excel(database_name, include_descendants=True):
     tech_sheet.set_column("C:C", 30)
     tech_sheet.set_column("D:D", 15)
     tech_sheet.set_column("E:E", 30)
-
-    print("Writing metadata")
-
-    # Header
-    for index, col in enumerate(COLUMNS):
-        tech_sheet.write_string(0, index, col, bold)
-
+    tech_sheet.write_row(0, 0, COLUMNS, bold)
     tech_sheet.write_comment(
         "C1",
         "Only for ecoinvent 3, where names =/= products.",
     )
 
-    for index, data in enumerate(sorted_activity_keys):
-        obj = Database.get(data[1])
-
-        tech_sheet.write_number(index + 1, 0, index + 1)
-        tech_sheet.write_string(index + 1, 1, obj.get(u"name") or u"Unknown")
-        tech_sheet.write_string(index + 1, 2, obj.get(u"reference product") or u"")
-        tech_sheet.write_string(index + 1, 3, obj.get(u"unit") or u"Unknown")
-        tech_sheet.write_string(index + 1, 4, u" - ".join(obj.get(u"categories") or []))
-        tech_sheet.write_string(index + 1, 5, obj.get(u"location") or u"Unknown")
+    for index, obj in enumerate(matrices.activities):
+        tech_sheet.write_row(
+            index + 1,
+            0,
+            (
+                index + 1,
+                name(obj),
+                obj.get("reference product") or "",
+                obj.get("unit") or "Unknown",
+                " - ".join(obj.get("categories") or []),
+                obj.get("location") or "Unknown",
+            ),
+        )
 
     COLUMNS = (
-        u"Index",
-        u"Name",
-        u"Unit",
-        u"Categories",
+        "Index",
+        "Name",
+        "Unit",
+        "Categories",
     )
 
     bio_sheet = workbook.add_worksheet("biosphere-labels")
     bio_sheet.set_column("B:B", 60)
     bio_sheet.set_column("C:C", 15)
     bio_sheet.set_column("D:D", 30)
-
-    # Header
-    for index, col in enumerate(COLUMNS):
-        bio_sheet.write_string(0, index, col, bold)
-
-    for index, data in enumerate(sorted_bio_keys):
-        obj = Database.get(data[1])
-
-        bio_sheet.write_number(index + 1, 0, index + 1)
-        bio_sheet.write_string(index + 1, 1, obj.get(u"name") or u"Unknown")
-        bio_sheet.write_string(index + 1, 2, obj.get(u"unit") or u"Unknown")
-        bio_sheet.write_string(index + 1, 3, u" - ".join(obj.get(u"categories") or []))
+    bio_sheet.write_row(0, 0, COLUMNS, bold)
+
+    for index, obj in enumerate(matrices.flows):
+        bio_sheet.write_row(
+            index + 1,
+            0,
+            (
+                index + 1,
+                name(obj),
+                obj.get("unit") or "Unknown",
+                " - ".join(obj.get("categories") or []),
+            ),
+        )
 
     workbook.close()
     return filepath
@@ -204,7 +163,8 @@ def write_lci_excel(database_name, objs=None, sections=None, dirpath=None):
         raise ValueError(f"Directory path {dirpath} is not a writable directory")
     filepath = os.path.join(dirpath, "lci-" + safe_name + ".xlsx")
 
-    workbook = xlsxwriter.Workbook(filepath)
+    # Rows are written in order, so only the current row needs to be kept in memory
+    workbook = xlsxwriter.Workbook(filepath, {"constant_memory": True})
     bold = workbook.add_format({"bold": True})
     bold.set_font_size(12)
     highlighted = {
@@ -219,7 +179,7 @@ def write_lci_excel(database_name, objs=None, sections=None, dirpath=None):
 
     sheet = workbook.add_worksheet(create_valid_worksheet_name(database_name))
 
-    data = CSVFormatter(database_name, objs).get_formatted_data(sections)
+    data = CSVFormatter(database_name, objs).iterate_formatted_data(sections)
 
     for row_index, row in enumerate(data):
         for col_index, value in enumerate(row):
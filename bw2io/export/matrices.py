@@ -0,0 +1,213 @@
+import csv
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import scipy.io
+import scipy.sparse
+from bw2data import Database, projects
+from bw_processing import safe_filename
+
+LCIMatrices = namedtuple(
+    "LCIMatrices", ["technosphere", "biosphere", "activities", "products", "flows"]
+)
+LCIMatrices.__doc__ = """Technosphere and biosphere matrices of a database, with labels.
+
+``technosphere`` and ``biosphere`` are SciPy CSR matrices. ``activities``, ``products`` and ``flows`` are lists of metadata dictionaries (see ``LABEL_FIELDS``) for the technosphere columns, technosphere rows and biosphere rows, in matrix order."""
+
+LABEL_FIELDS = (
+    "database",
+    "code",
+    "name",
+    "reference product",
+    "unit",
+    "categories",
+    "location",
+)
+MATRIX_FORMATS = ("npz", "mtx")
+LABEL_FORMATS = ("csv", "parquet")
+
+
+def get_node_metadata(database_names):
+    """Get the ``LABEL_FIELDS`` of every node in ``database_names`` with a single query.
+
+    Returns:
+        Dictionary of ``{node id: metadata}``.
+
+    """
+    from bw2data.backends import ActivityDataset as AD
+
+    query = AD.select(AD.id, AD.database, AD.code, AD.data).where(
+        AD.database << sorted(database_names)
+    )
+    return {
+        id_: dict(
+            {field: data.get(field) for field in LABEL_FIELDS},
+            database=database,
+            code=code,
+        )
+        for id_, database, code, data in query.tuples().iterator()
+    }
+
+
+def _labels(indices, metadata):
+    """Metadata in index order for a ``{node id: matrix index}`` dictionary"""
+    ids = [None] * len(indices)
+    for id_, index in indices.items():
+        ids[index] = id_
+    return [metadata.get(id_) or {"name": None} for id_ in ids]
+
+
+def _sort_order(positions, labels):
+    """Sort matrix indices ``positions`` by name, then by database and code"""
+    return np.array(
+        sorted(
+            positions,
+            key=lambda i: (
+                labels[i]["name"] or "Unknown",
+                labels[i].get("database") or "",
+                labels[i].get("code") or "",
+            ),
+        ),
+        dtype=np.int64,
+    )
+
+
+def get_lci_matrices(database_name, include_descendants=True):
+    """Build the technosphere and biosphere matrices of ``database_name``.
+
+    Metadata for all nodes is read in one query. Technosphere columns and rows, and biosphere rows, are sorted by name. Biosphere flows without any nonzero value are dropped.
+
+    Args:
+        * *database_name* (str): Name of the database.
+        * *include_descendants* (bool): Include activities from the databases ``database_name`` depends on as technosphere columns. The technosphere always has rows for all products.
+
+    Returns:
+        ``LCIMatrices``.
+
+    """
+    from bw2calc import LCA
+    from bw2data import prepare_lca_inputs
+
+    db = Database(database_name)
+    demand, data_objs, _ = prepare_lca_inputs({db.random(): 1}, remapping=False)
+    lca = LCA(demand, data_objs=data_objs)
+    lca.load_lci_data()
+
+    metadata = get_node_metadata(db.find_graph_dependents())
+    activities = _labels(lca.dicts.activity, metadata)
+    products = _labels(lca.dicts.product, metadata)
+    flows = _labels(lca.dicts.biosphere, metadata)
+
+    if include_descendants:
+        columns = range(len(activities))
+    else:
+        columns = [
+            i for i, ds in enumerate(activities) if ds.get("database") == database_name
+        ]
+    columns = _sort_order(columns, activities)
+    rows = _sort_order(range(len(products)), products)
+
+    biosphere = lca.biosphere_matrix.tocsc()[:, columns].tocsr()
+    biosphere.eliminate_zeros()
+    flow_rows = _sort_order(np.flatnonzero(np.diff(biosphere.indptr)), flows)
+
+    technosphere = lca.technosphere_matrix.tocsc()[:, columns].tocsr()[rows, :]
+    biosphere = biosphere[flow_rows, :]
+    technosphere.sort_indices()
+    biosphere.sort_indices()
+    return LCIMatrices(
+        technosphere=technosphere,
+        biosphere=biosphere,
+        activities=[activities[i] for i in columns],
+        products=[products[i] for i in rows],
+        flows=[flows[i] for i in flow_rows],
+    )
+
+
+def _write_labels(filepath, labels, label_format):
+    rows = (
+        [index]
+        + [
+            "::".join(ds.get(field) or [])
+            if field == "categories"
+            else ds.get(field)
+            for field in LABEL_FIELDS
+        ]
+        for index, ds in enumerate(labels)
+    )
+    columns = ("index",) + LABEL_FIELDS
+    if label_format == "parquet":
+        import pandas
+
+        pandas.DataFrame.from_records(list(rows), columns=columns).to_parquet(
+            filepath, index=False
+        )
+    else:
+        with open(filepath, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+
+def lci_matrices_to_files(
+    database_name,
+    include_descendants=True,
+    dirpath=None,
+    matrix_format="npz",
+    label_format="csv",
+):
+    """Export the technosphere and biosphere matrices of ``database_name`` as sparse matrix files and label tables.
+
+    Unlike ``lci_matrices_to_excel``, this works for databases of any size, like ecoinvent. Only the nonzero values are written. The matrices are sorted as in ``get_lci_matrices``.
+
+    The following files are written to the directory ``<database name>-lci-matrices``:
+
+    * ``technosphere.npz`` and ``biosphere.npz`` (read with ``scipy.sparse.load_npz``), or ``technosphere.mtx`` and ``biosphere.mtx`` in the MatrixMarket format (read with ``scipy.io.mmread``)
+    * ``activities``, ``products`` and ``flows`` label tables for the technosphere columns, technosphere rows and biosphere rows. The ``index`` column is the zero-based matrix index.
+
+    Args:
+        * *database_name* (str): Name of the database.
+        * *include_descendants* (bool): See ``get_lci_matrices``.
+        * *dirpath* (str or Path, optional): Directory where the export directory is created. Default is ``projects.output_dir``.
+        * *matrix_format* (str): ``npz`` or ``mtx``.
+        * *label_format* (str): ``csv`` or ``parquet``. Parquet needs ``pyarrow`` or ``fastparquet``.
+
+    Returns:
+        Path of the export directory.
+
+    """
+    if matrix_format not in MATRIX_FORMATS:
+        raise ValueError(
+            "Unknown matrix format {}; must be one of {}".format(
+                matrix_format, MATRIX_FORMATS
+            )
+        )
+    if label_format not in LABEL_FORMATS:
+        raise ValueError(
+            "Unknown label format {}; must be one of {}".format(
+                label_format, LABEL_FORMATS
+            )
+        )
+
+    matrices = get_lci_matrices(database_name, include_descendants)
+
+    dirpath = Path(dirpath or projects.output_dir) / (
+        safe_filename(database_name, False) + "-lci-matrices"
+    )
+    dirpath.mkdir(parents=True, exist_ok=True)
+
+    for name in ("technosphere", "biosphere"):
+        matrix = getattr(matrices, name)
+        if matrix_format == "npz":
+            scipy.sparse.save_npz(dirpath / (name + ".npz"), matrix)
+        else:
+            scipy.io.mmwrite(os.fspath(dirpath / (name + ".mtx")), matrix)
+    for name in ("activities", "products", "flows"):
+        _write_labels(
+            dirpath / "{}.{}".format(name, label_format),
+            getattr(matrices, name),
+            label_format,
+        )
+    return dirpath
@@ -1,3 +1,4 @@
+from .cache import ArrayCache, ExtractionCache
 from .csv import CSVExtractor
 from .ecospold1 import Ecospold1DataExtractor
 from .ecospold1_lcia import Ecospold1LCIAExtractor
@@ -0,0 +1,420 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import urllib.parse
+import zlib
+from pathlib import Path
+
+import numpy as np
+import platformdirs
+
+from .. import json_codec
+from ..version import version
+
+# Increment when the structure of extracted datasets changes
+CACHE_FORMAT = 1
+DEFAULT_MAX_SIZE = 2**30
+# Downloaded EXIOBASE zip files alone are several hundred MB
+DEFAULT_ARRAY_CACHE_SIZE = 5 * 2**30
+
+
+def user_cache_dirpath(*parts):
+    """Path of ``parts`` in the ``bw2io`` cache directory.
+
+    This is the per-user cache directory of the platform, e.g. ``~/.cache/bw2io`` on Linux, or ``BW2IO_CACHE_DIR`` if this environment variable is set. It is outside the Brightway data directory, so caches aren't deleted by ``projects.purge_deleted_directories``, or included in data directory backups."""
+    dirpath = os.environ.get("BW2IO_CACHE_DIR") or platformdirs.user_cache_dir(
+        "bw2io", appauthor=False
+    )
+    return Path(dirpath).joinpath(*parts)
+
+
+def file_digest(filepath, chunk_size=2**20):
+    """Return the hex BLAKE2 digest of the contents of ``filepath``"""
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ExtractionCache:
+    """On-disk cache of extracted datasets, one entry per source file.
+
+    Files are looked up by their absolute path, size, and modification time. If
+    any of these changed, the file contents are hashed, and a stored entry with
+    the same contents is reused. Only files with new contents need to be
+    extracted again.
+
+    Entries are stored as zlib-compressed pickles named by content hash. The
+    cache directory, by default ``user_cache_dirpath("extraction")``, is
+    shared across projects; when its total size exceeds
+    ``max_size`` bytes, the least recently used entries are deleted.
+
+    Usage:
+
+    .. code-block:: python
+
+        cache = ExtractionCache()
+        data = cache.get(filepath)
+        if data is None:
+            data = extract(filepath)
+            cache.set(filepath, data)
+        cache.flush()
+
+    """
+
+    def __init__(self, dirpath=None, max_size=DEFAULT_MAX_SIZE):
+        if dirpath is None:
+            dirpath = user_cache_dirpath("extraction")
+        self.dirpath = Path(dirpath)
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = self.misses = 0
+        self._pending = {}
+        self._load_index()
+
+    def __repr__(self):
+        return "ExtractionCache at {} ({} entries, {:.1f} MB)".format(
+            self.dirpath, len(self.blobs), self.size / 1e6
+        )
+
+    @property
+    def index_filepath(self):
+        return self.dirpath / "index.pickle"
+
+    @property
+    def size(self):
+        return sum(obj["nbytes"] for obj in self.blobs.values())
+
+    def _load_index(self):
+        try:
+            with open(self.index_filepath, "rb") as f:
+                index = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            index = {}
+        if index.get("version") != (CACHE_FORMAT, version):
+            # Written by another version of bw2io; can't trust entries
+            self._remove_blobs()
+            index = {}
+        self.files = index.get("files", {})
+        self.blobs = index.get("blobs", {})
+
+    def _blob_filepath(self, digest):
+        return self.dirpath / (digest + ".pickle.zlib")
+
+    def _remove_blobs(self):
+        for filepath in self.dirpath.glob("*.pickle.zlib"):
+            filepath.unlink()
+
+    def _read_blob(self, digest):
+        try:
+            with open(self._blob_filepath(digest), "rb") as f:
+                data = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError):
+            self.blobs.pop(digest, None)
+            return None
+        self.blobs[digest]["used"] = time.time()
+        return data
+
+    def get(self, filepath):
+        """Return cached data for ``filepath``, or ``None`` if not present"""
+        filepath = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        key = (stat.st_size, stat.st_mtime_ns)
+
+        entry = self.files.get(filepath)
+        if entry and entry["key"] == key and entry["digest"] in self.blobs:
+            digest = entry["digest"]
+        else:
+            digest = file_digest(filepath)
+            if digest not in self.blobs:
+                self._pending[filepath] = (key, digest)
+                self.misses += 1
+                return None
+            self.files[filepath] = {"key": key, "digest": digest}
+
+        data = self._read_blob(digest)
+        if data is None:
+            self._pending[filepath] = (key, digest)
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def set(self, filepath, data):
+        """Store ``data`` extracted from ``filepath``"""
+        filepath = os.path.abspath(filepath)
+        try:
+            key, digest = self._pending.pop(filepath)
+        except KeyError:
+            stat = os.stat(filepath)
+            key, digest = (stat.st_size, stat.st_mtime_ns), file_digest(filepath)
+
+        payload = zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        tmp = self._blob_filepath(digest).with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, self._blob_filepath(digest))
+
+        self.files[filepath] = {"key": key, "digest": digest}
+        self.blobs[digest] = {"nbytes": len(payload), "used": time.time()}
+
+    def evict(self):
+        """Delete least recently used entries until under ``max_size``"""
+        size = self.size
+        for digest, obj in sorted(self.blobs.items(), key=lambda x: x[1]["used"]):
+            if size <= self.max_size:
+                break
+            size -= obj["nbytes"]
+            del self.blobs[digest]
+            try:
+                self._blob_filepath(digest).unlink()
+            except FileNotFoundError:
+                pass
+        self.files = {
+            filepath: entry
+            for filepath, entry in self.files.items()
+            if entry["digest"] in self.blobs
+        }
+
+    def flush(self):
+        """Apply the size cap and write the index to disk"""
+        self.evict()
+        tmp = self.index_filepath.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(
+                {
+                    "version": (CACHE_FORMAT, version),
+                    "files": self.files,
+                    "blobs": self.blobs,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, self.index_filepath)
+
+    def clear(self):
+        """Delete all cached data"""
+        shutil.rmtree(self.dirpath)
+        self.dirpath.mkdir(parents=True)
+        self.files, self.blobs, self._pending = {}, {}, {}
+
+
+def get_cache(cache):
+    """Turn the ``cache`` argument of an importer into an ``ExtractionCache`` or ``None``.
+
+    ``cache`` can be ``False``/``None`` (no caching), ``True`` (cache in the default
+    directory), a directory path, or an ``ExtractionCache`` instance."""
+    if not cache:
+        return None
+    elif cache is True:
+        return ExtractionCache()
+    elif isinstance(cache, ExtractionCache):
+        return cache
+    else:
+        return ExtractionCache(cache)
+
+
+class ArrayCache:
+    """On-disk cache of NumPy arrays and labels parsed from large source files.
+
+    Each source file gets its own directory, named by the hash of its contents, so a file is only parsed once, even if it is downloaded again to another location. Hashes are looked up by absolute path, size, and modification time, so unchanged files aren't hashed again.
+
+    Arrays are stored as ``.npy`` files and memory-mapped when read, so opening a cached table doesn't copy it into memory. Labels and other metadata are stored as JSON.
+
+    The cache directory, by default ``user_cache_dirpath("arrays")``, is shared across projects. When its total size exceeds ``max_size`` bytes, the least recently used entries and downloads are deleted. Entries used by this ``ArrayCache`` instance are never deleted, as their arrays can still be memory-mapped. Use ``clear`` to delete everything.
+
+    Usage:
+
+    .. code-block:: python
+
+        cache = ArrayCache()
+        arrays = cache.get_arrays(filepath, "A")
+        if arrays is None:
+            arrays = {"values": parse(filepath)}
+            cache.set_arrays(filepath, "A", arrays)
+
+    """
+
+    def __init__(self, dirpath=None, max_size=DEFAULT_ARRAY_CACHE_SIZE):
+        if dirpath is None:
+            dirpath = user_cache_dirpath("arrays")
+        self.dirpath = Path(dirpath) / "v{}".format(CACHE_FORMAT)
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = self.misses = 0
+        self._in_use = set()
+
+    def __repr__(self):
+        return "ArrayCache at {}".format(self.dirpath)
+
+    def _use(self, dirpath):
+        """Mark entry or download directory ``dirpath`` as used now"""
+        self._in_use.add(dirpath)
+        os.utime(dirpath)
+        return dirpath
+
+    def _entries(self):
+        """Entry and download directories"""
+        for path in self.dirpath.iterdir():
+            if path.is_dir() and path.name != "downloads":
+                yield path
+        downloads = self.dirpath / "downloads"
+        if downloads.is_dir():
+            yield from (path for path in downloads.iterdir() if path.is_dir())
+
+    @staticmethod
+    def _nbytes(dirpath):
+        return sum(fp.stat().st_size for fp in dirpath.rglob("*") if fp.is_file())
+
+    @property
+    def size(self):
+        return sum(self._nbytes(path) for path in self._entries())
+
+    def evict(self):
+        """Delete least recently used entries and downloads until under ``max_size``"""
+        entries = [
+            (path.stat().st_mtime, path, self._nbytes(path)) for path in self._entries()
+        ]
+        size = sum(nbytes for _, _, nbytes in entries)
+        for _, path, nbytes in sorted(entries):
+            if size <= self.max_size:
+                break
+            if path in self._in_use:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            size -= nbytes
+
+    @property
+    def index_filepath(self):
+        return self.dirpath / "index.json"
+
+    def _load_index(self):
+        try:
+            return json_codec.load(self.index_filepath)
+        except (OSError, ValueError):
+            return {}
+
+    def digest(self, filepath):
+        """Return the content hash of ``filepath``, hashing it only if it changed"""
+        filepath = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        key = [stat.st_size, stat.st_mtime_ns]
+
+        index = self._load_index()
+        entry = index.get(filepath)
+        if entry and entry[:2] == key:
+            return entry[2]
+        digest = file_digest(filepath)
+        # Re-read, as other processes may have added files in the meantime, and
+        # drop entries for files which were deleted, like temporary downloads
+        index = {
+            path: value
+            for path, value in self._load_index().items()
+            if os.path.exists(path)
+        }
+        index[filepath] = key + [digest]
+        json_codec.dump(index, self.index_filepath)
+        return digest
+
+    def download(self, url):
+        """Download ``url`` into the cache directory, and return the filepath.
+
+        Downloads are stored by URL, so later calls with the same URL return the same file without downloading it again. As the path doesn't change, the file contents also aren't hashed again."""
+        from ..download_utils import download_with_progressbar
+
+        dirpath = (
+            self.dirpath
+            / "downloads"
+            / hashlib.blake2b(url.encode("utf-8"), digest_size=20).hexdigest()
+        )
+        dirpath.mkdir(parents=True, exist_ok=True)
+        filename = Path(urllib.parse.urlparse(url).path).name or "download"
+        filepath = dirpath / filename
+        self._use(dirpath)
+        if filepath.is_file():
+            return filepath
+        # Download to a temporary directory, so partial downloads are never used
+        with tempfile.TemporaryDirectory(dir=dirpath) as td:
+            tmp = download_with_progressbar(url, filename=filename, dirpath=td)
+            os.replace(tmp, filepath)
+        self.evict()
+        return filepath
+
+    def entry_dirpath(self, filepath):
+        """Directory with cached data for ``filepath``"""
+        dirpath = self.dirpath / self.digest(filepath)
+        dirpath.mkdir(exist_ok=True)
+        return self._use(dirpath)
+
+    def get_json(self, filepath, name):
+        """Return cached data ``name`` for ``filepath``, or ``None`` if not present"""
+        try:
+            data = json_codec.load(self.entry_dirpath(filepath) / (name + ".json"))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def set_json(self, filepath, name, data):
+        """Store JSON-serializable ``data`` as ``name`` for ``filepath``"""
+        json_codec.dump(data, self.entry_dirpath(filepath) / (name + ".json"))
+        self.evict()
+
+    def get_arrays(self, filepath, name):
+        """Return cached arrays ``name`` for ``filepath``, or ``None`` if not present.
+
+        Returns a tuple of a dictionary of read-only memory-mapped arrays, and the metadata stored with them."""
+        dirpath = self.entry_dirpath(filepath)
+        try:
+            manifest = json_codec.load(dirpath / (name + ".json"))
+            arrays = {
+                label: np.load(dirpath / filename, mmap_mode="r")
+                for label, filename in manifest["arrays"].items()
+            }
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays, manifest["metadata"]
+
+    def set_arrays(self, filepath, name, arrays, metadata=None):
+        """Store the dictionary of ``arrays``, and JSON-serializable ``metadata``, as ``name`` for ``filepath``"""
+        dirpath = self.entry_dirpath(filepath)
+        filenames = {}
+        for label, array in arrays.items():
+            filenames[label] = "{}.{}.npy".format(name, label)
+            tmp = dirpath / (filenames[label] + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp, dirpath / filenames[label])
+        # The manifest is written last, so partially written entries are ignored
+        json_codec.dump(
+            {"arrays": filenames, "metadata": metadata}, dirpath / (name + ".json")
+        )
+        self.evict()
+
+    def clear(self):
+        """Delete all cached data"""
+        shutil.rmtree(self.dirpath)
+        self.dirpath.mkdir(parents=True)
+        self._in_use = set()
+
+
+def get_array_cache(cache):
+    """Turn the ``cache`` argument of an importer into an ``ArrayCache`` or ``None``.
+
+    ``cache`` can be ``False``/``None`` (no caching), ``True`` (cache in the default
+    directory), a directory path, or an ``ArrayCache`` instance."""
+    if not cache:
+        return None
+    elif cache is True:
+        return ArrayCache()
+    elif isinstance(cache, ArrayCache):
+        return cache
+    else:
+        return ArrayCache(cache)
@@ -1,6 +1,5 @@
 import copy
 import math
-import multiprocessing
 import os
 import sys
 
@@ -10,6 +9,8 @@ from bw2data.utils import recursive_str_to_unicode
 from lxml import objectify
 from stats_arrays.distributions import *
 
+from ..parallel import can_use_mp, imap_ordered
+
 
 def getattr2(obj, attr):
     try:
@@ -20,16 +21,30 @@ def getattr2(obj, attr):
 
 class Ecospold1DataExtractor(object):
     @classmethod
-    def extract(cls, path, db_name, use_mp=True):
-        data = []
+    def extract(
+        cls,
+        path,
+        db_name,
+        use_mp=True,
+        processes=None,
+        chunksize=None,
+        start_method=None,
+        as_generator=False,
+    ):
+        """Extract all ecospold1 XML files in ``path`` (or the single file ``path``).
+
+        ``processes``, ``chunksize``, and ``start_method`` configure the worker pool
+        (see ``bw2io.parallel.imap_ordered``). Datasets are always returned in
+        (sorted) file order. If ``as_generator``, return a generator which yields
+        each dataset as soon as it is available instead of a list."""
         if os.path.isdir(path):
-            filelist = [
+            filelist = sorted(
                 os.path.join(path, filename)
                 for filename in os.listdir(path)
                 if filename[-4:].lower() == ".xml"
                 # Skip SimaPro-specific flow list
                 and filename != "ElementaryFlows.xml"
-            ]
+            )
         else:
             filelist = [path]
 
@@ -39,38 +54,63 @@ class Ecospold1DataExtractor(object):
         if sys.version_info < (3, 0):
             use_mp = False
 
-        if use_mp:
-            with multiprocessing.Pool(processes=multiprocessing.cpu_count()) as pool:
-                print("Extracting XML data from {} datasets".format(len(filelist)))
-                results = [
-                    pool.apply_async(
-                        Ecospold1DataExtractor.process_file, args=(x, db_name)
-                    )
-                    for x in filelist
-                ]
-                data = [x for p in results for x in p.get() if x]
+        data = cls._iter_extract(
+            filelist,
+            db_name,
+            use_mp=use_mp and can_use_mp(),
+            processes=processes,
+            chunksize=chunksize,
+            start_method=start_method,
+        )
+        if as_generator:
+            return data
+        data = list(data)
 
+        if sys.version_info < (3, 0):
+            print("Converting to unicode")
+            return recursive_str_to_unicode(data)
         else:
-            pbar = pyprind.ProgBar(
-                len(filelist), title="Extracting ecospold1 files:", monitor=True
+            return data
+
+    @classmethod
+    def _iter_extract(
+        cls, filelist, db_name, use_mp, processes, chunksize, start_method
+    ):
+        if use_mp:
+            print("Extracting XML data from {} datasets".format(len(filelist)))
+            results = imap_ordered(
+                cls.process_file,
+                filelist,
+                args=(db_name,),
+                processes=processes,
+                chunksize=chunksize,
+                start_method=start_method,
             )
-            data = []
+        else:
+            results = cls._extract_serially(filelist, db_name)
 
-            for index, filepath in enumerate(filelist):
-                for x in cls.process_file(filepath, db_name):
+        try:
+            for result in results:
+                for x in result:
                     if x:
-                        data.append(x)
+                        yield x
+        finally:
+            # Stops the worker pool if the caller stops iterating early
+            results.close()
+
+    @classmethod
+    def _extract_serially(cls, filelist, db_name):
+        pbar = pyprind.ProgBar(
+            len(filelist), title="Extracting ecospold1 files:", monitor=True
+        )
 
-                filename = os.path.basename(filepath)
-                pbar.update(item_id=filename[:15])
+        for filepath in filelist:
+            yield cls.process_file(filepath, db_name)
 
-            print(pbar)
+            filename = os.path.basename(filepath)
+            pbar.update(item_id=filename[:15])
 
-        if sys.version_info < (3, 0):
-            print("Converting to unicode")
-            return recursive_str_to_unicode(data)
-        else:
-            return data
+        print(pbar)
 
     @classmethod
     def process_file(cls, filepath, db_name):
@@ -1,13 +1,15 @@
 import math
-import multiprocessing
 import os
 import sys
+from functools import partial
 
 import pyprind
 from bw2data.utils import recursive_str_to_unicode
-from lxml import objectify
+from lxml import etree, objectify
 from stats_arrays.distributions import *
 
+from ..parallel import can_use_mp, imap_ordered
+
 PM_MAPPING = {
     "reliability": "reliability",
     "completeness": "completeness",
@@ -31,6 +33,24 @@ ACTIVITY_TYPES = {
 }
 
 
+NS = "{http://www.EcoInvent.org/EcoSpold02}"
+
+# Extractor methods which turn one file into one activity dataset
+ENGINES = {
+    "objectify": "extract_activity",
+    "iterparse": "extract_activity_iterparse",
+}
+
+ITERPARSE_TAGS = [
+    NS + "activityDescription",
+    NS + "intermediateExchange",
+    NS + "elementaryExchange",
+    NS + "parameter",
+    NS + "modellingAndValidation",
+    NS + "administrativeInformation",
+]
+
+
 def getattr2(obj, attr):
     try:
         return getattr(obj, attr)
@@ -38,6 +58,12 @@ def getattr2(obj, attr):
         return {}
 
 
+def find2(obj, tag):
+    """Like ``getattr2``, but works for both ``objectify`` and ``etree`` elements"""
+    child = None if obj is None or isinstance(obj, dict) else obj.find(NS + tag)
+    return {} if child is None else child
+
+
 TOO_LOW = """Lognormal scale value at or below zero: {}.
 Reverting to undefined uncertainty."""
 TOO_HIGH = """Lognormal scale value impossibly high: {}.
@@ -56,15 +82,41 @@ class Ecospold2DataExtractor(object):
         return [extract_metadata(ds) for ds in root.iterchildren()]
 
     @classmethod
-    def extract(cls, dirpath, db_name, use_mp=True):
+    def extract(
+        cls,
+        dirpath,
+        db_name,
+        use_mp=True,
+        engine="objectify",
+        cache=None,
+        processes=None,
+        chunksize=None,
+        start_method=None,
+        as_generator=False,
+    ):
+        """Extract all ``.spold`` files in ``dirpath`` (or the single file ``dirpath``).
+
+        ``engine`` is one of ``ENGINES``. ``cache`` is an optional ``ExtractionCache``;
+        only files not found in the cache are parsed. ``processes``, ``chunksize``,
+        and ``start_method`` configure the worker pool (see ``bw2io.parallel.imap_ordered``).
+
+        Datasets are always returned in the same (sorted filename) order. If
+        ``as_generator``, return a generator which yields each dataset as soon as
+        it is available instead of a list."""
         assert os.path.exists(dirpath)
+        if engine not in ENGINES:
+            raise ValueError(
+                "Unknown extraction engine {}; must be one of {}".format(
+                    engine, sorted(ENGINES)
+                )
+            )
         if os.path.isdir(dirpath):
-            filelist = [
+            filelist = sorted(
                 filename
                 for filename in os.listdir(dirpath)
                 if os.path.isfile(os.path.join(dirpath, filename))
                 and filename.split(".")[-1].lower() == "spold"
-            ]
+            )
         elif os.path.isfile(dirpath):
             filelist = [dirpath]
         else:
@@ -76,28 +128,20 @@ class Ecospold2DataExtractor(object):
         if len(filelist) == 0:
             raise FileNotFoundError(f"No .spold files found. Please check the path and try again: {dirpath}")
 
-        if use_mp:
-            with multiprocessing.Pool(processes=multiprocessing.cpu_count()) as pool:
-                print("Extracting XML data from {} datasets".format(len(filelist)))
-                results = [
-                    pool.apply_async(
-                        Ecospold2DataExtractor.extract_activity,
-                        args=(dirpath, x, db_name),
-                    )
-                    for x in filelist
-                ]
-                data = [p.get() for p in results]
-        else:
-            pbar = pyprind.ProgBar(
-                len(filelist), title="Extracting ecospold2 files:", monitor=True
-            )
-
-            data = []
-            for index, filename in enumerate(filelist):
-                data.append(cls.extract_activity(dirpath, filename, db_name))
-                pbar.update(item_id=filename[:15])
-
-            print(pbar)
+        data = cls._iter_extract(
+            dirpath,
+            filelist,
+            db_name,
+            use_mp=use_mp and can_use_mp(),
+            engine=engine,
+            cache=cache,
+            processes=processes,
+            chunksize=chunksize,
+            start_method=start_method,
+        )
+        if as_generator:
+            return data
+        data = list(data)
 
         if sys.version_info < (3, 0):
             print("Converting to unicode")
@@ -105,6 +149,75 @@ class Ecospold2DataExtractor(object):
         else:
             return data
 
+    @classmethod
+    def _iter_extract(
+        cls,
+        dirpath,
+        filelist,
+        db_name,
+        use_mp,
+        engine,
+        cache,
+        processes,
+        chunksize,
+        start_method,
+    ):
+        if cache is not None:
+            cached = [cache.get(os.path.join(dirpath, x)) for x in filelist]
+            todo = [x for x, ds in zip(filelist, cached) if ds is None]
+            print(
+                "Loaded {} datasets from extraction cache".format(
+                    len(filelist) - len(todo)
+                )
+            )
+        else:
+            cached, todo = [None] * len(filelist), filelist
+
+        extract_activity = getattr(cls, ENGINES[engine])
+        if use_mp and todo:
+            print("Extracting XML data from {} datasets".format(len(todo)))
+            extracted = imap_ordered(
+                partial(extract_activity, dirpath),
+                todo,
+                args=(db_name,),
+                processes=processes,
+                chunksize=chunksize,
+                start_method=start_method,
+            )
+        else:
+            extracted = cls._extract_serially(extract_activity, dirpath, todo, db_name)
+
+        try:
+            for filename, ds in zip(filelist, cached):
+                if ds is None:
+                    ds = next(extracted)
+                    if cache is not None:
+                        cache.set(os.path.join(dirpath, filename), ds)
+                else:
+                    ds["database"] = db_name
+                    ds["filename"] = os.path.basename(filename)
+                yield ds
+        finally:
+            # Stops the worker pool if the caller stops iterating early
+            extracted.close()
+
+        if cache is not None:
+            cache.flush()
+
+    @classmethod
+    def _extract_serially(cls, extract_activity, dirpath, filelist, db_name):
+        if not filelist:
+            return
+        pbar = pyprind.ProgBar(
+            len(filelist), title="Extracting ecospold2 files:", monitor=True
+        )
+
+        for filename in filelist:
+            yield extract_activity(dirpath, filename, db_name)
+            pbar.update(item_id=str(filename)[:15])
+
+        print(pbar)
+
     @classmethod
     def condense_multiline_comment(cls, element):
         try:
@@ -125,6 +238,7 @@ class Ecospold2DataExtractor(object):
 
     @classmethod
     def extract_activity(cls, dirpath, filename, db_name):
+        """Extract one dataset by building the complete ``objectify`` tree."""
         root = objectify.parse(
             open(os.path.join(dirpath, filename), encoding="utf-8")
         ).getroot()
@@ -133,38 +247,111 @@ class Ecospold2DataExtractor(object):
         else:
             stem = root.childActivityDataset
 
+        return cls.build_activity(
+            description=cls.extract_description(stem.activityDescription),
+            exchanges=[
+                cls.extract_exchange(exc)
+                for exc in stem.flowData.iterchildren()
+                if "parameter" not in exc.tag
+            ],
+            parameters=[
+                cls.extract_parameter(exc)
+                for exc in stem.flowData.iterchildren()
+                if "parameter" in exc.tag
+            ],
+            authors=cls.extract_authors(stem.administrativeInformation),
+            filename=filename,
+            db_name=db_name,
+        )
+
+    @classmethod
+    def extract_activity_iterparse(cls, dirpath, filename, db_name):
+        """Extract one dataset by streaming over the XML with ``etree.iterparse``.
+
+        Only the elements we need generate events, and each element is cleared
+        (together with its already processed siblings) as soon as it has been
+        converted, so the complete tree is never held in memory. Produces the
+        same dictionary as ``extract_activity``."""
+        description, authors = None, None
+        exchanges, parameters = [], []
+
+        for _, element in etree.iterparse(
+            os.path.join(dirpath, filename),
+            events=("end",),
+            tag=ITERPARSE_TAGS,
+        ):
+            tag = element.tag
+            if tag == NS + "activityDescription":
+                description = cls.extract_description(element)
+            elif tag == NS + "parameter":
+                parameters.append(cls.extract_parameter(element))
+            elif tag == NS + "administrativeInformation":
+                authors = cls.extract_authors(element)
+            elif tag != NS + "modellingAndValidation":
+                exchanges.append(cls.extract_exchange(element))
+
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+        return cls.build_activity(
+            description=description,
+            exchanges=exchanges,
+            parameters=parameters,
+            authors=authors,
+            filename=filename,
+            db_name=db_name,
+        )
+
+    @classmethod
+    def build_activity(
+        cls, description, exchanges, parameters, authors, filename, db_name
+    ):
+        return {
+            "comment": description["comment"],
+            "classifications": description["classifications"],
+            "activity type": description["activity type"],
+            "activity": description["activity"],
+            "database": db_name,
+            "exchanges": exchanges,
+            "filename": os.path.basename(filename),
+            "location": description["location"],
+            "name": description["name"],
+            "synonyms": description["synonyms"],
+            "parameters": dict(parameters),
+            "authors": authors,
+            "type": "process",
+        }
+
+    @classmethod
+    def extract_description(cls, element):
+        activity = element.find(NS + "activity")
+        geography = element.find(NS + "geography")
+
         comments = [
-            cls.condense_multiline_comment(
-                getattr2(stem.activityDescription.activity, "generalComment")
-            ),
+            cls.condense_multiline_comment(find2(activity, "generalComment")),
             (
                 "Included activities start: ",
-                getattr2(
-                    stem.activityDescription.activity, "includedActivitiesStart"
-                ).get("text"),
+                find2(activity, "includedActivitiesStart").get("text"),
             ),
             (
                 "Included activities end: ",
-                getattr2(
-                    stem.activityDescription.activity, "includedActivitiesEnd"
-                ).get("text"),
+                find2(activity, "includedActivitiesEnd").get("text"),
             ),
             (
                 "Geography: ",
-                cls.condense_multiline_comment(
-                    getattr2(stem.activityDescription.geography, "comment")
-                ),
+                cls.condense_multiline_comment(find2(geography, "comment")),
             ),
             (
                 "Technology: ",
                 cls.condense_multiline_comment(
-                    getattr2(stem.activityDescription.technology, "comment")
+                    find2(find2(element, "technology"), "comment")
                 ),
             ),
             (
                 "Time period: ",
                 cls.condense_multiline_comment(
-                    getattr2(stem.activityDescription.timePeriod, "comment")
+                    find2(find2(element, "timePeriod"), "comment")
                 ),
             ),
         ]
@@ -177,59 +364,39 @@ class Ecospold2DataExtractor(object):
         )
 
         classifications = [
-            (el.classificationSystem.text, el.classificationValue.text)
-            for el in stem.activityDescription.iterchildren()
-            if el.tag == u"{http://www.EcoInvent.org/EcoSpold02}classification"
+            (
+                el.find(NS + "classificationSystem").text,
+                el.find(NS + "classificationValue").text,
+            )
+            for el in element.iterchildren(NS + "classification")
         ]
 
-        data = {
+        return {
             "comment": comment,
             "classifications": classifications,
             "activity type": ACTIVITY_TYPES[
-                int(stem.activityDescription.activity.get("specialActivityType") or 0)
-            ],
-            "activity": stem.activityDescription.activity.get("id"),
-            "database": db_name,
-            "exchanges": [
-                cls.extract_exchange(exc)
-                for exc in stem.flowData.iterchildren()
-                if "parameter" not in exc.tag
+                int(activity.get("specialActivityType") or 0)
             ],
-            "filename": os.path.basename(filename),
-            "location": stem.activityDescription.geography.shortname.text,
-            "name": stem.activityDescription.activity.activityName.text,
-            "synonyms": [
-                s.text
-                for s in getattr(stem.activityDescription.activity, "synonym", [])
-            ],
-            "parameters": dict(
-                [
-                    cls.extract_parameter(exc)
-                    for exc in stem.flowData.iterchildren()
-                    if "parameter" in exc.tag
-                ]
-            ),
-            "authors": {
-                "data entry": {
-                    "name": stem.administrativeInformation.dataEntryBy.get(
-                        "personName"
-                    ),
-                    "email": stem.administrativeInformation.dataEntryBy.get(
-                        "personEmail"
-                    ),
-                },
-                "data generator": {
-                    "name": stem.administrativeInformation.dataGeneratorAndPublication.get(
-                        "personName"
-                    ),
-                    "email": stem.administrativeInformation.dataGeneratorAndPublication.get(
-                        "personEmail"
-                    ),
-                },
+            "activity": activity.get("id"),
+            "location": geography.find(NS + "shortname").text,
+            "name": activity.find(NS + "activityName").text,
+            "synonyms": [s.text for s in activity.iterchildren(NS + "synonym")],
+        }
+
+    @classmethod
+    def extract_authors(cls, element):
+        data_entry = element.find(NS + "dataEntryBy")
+        data_generator = element.find(NS + "dataGeneratorAndPublication")
+        return {
+            "data entry": {
+                "name": data_entry.get("personName"),
+                "email": data_entry.get("personEmail"),
+            },
+            "data generator": {
+                "name": data_generator.get("personName"),
+                "email": data_generator.get("personEmail"),
             },
-            "type": "process",
         }
-        return data
 
     @classmethod
     def abort_exchange(cls, exc, comment=None):
@@ -250,73 +417,76 @@ class Ecospold2DataExtractor(object):
         data = {
             "amount": float(obj.get("amount")),
         }
-        if hasattr(obj, "uncertainty"):
-            unc = obj.uncertainty
-            if hasattr(unc, "pedigreeMatrix"):
+        unc = obj.find(NS + "uncertainty")
+        if unc is not None:
+            pedigree = unc.find(NS + "pedigreeMatrix")
+            if pedigree is not None:
                 data["pedigree"] = dict(
-                    [
-                        (PM_MAPPING[key], int(unc.pedigreeMatrix.get(key)))
-                        for key in PM_MAPPING
-                    ]
+                    [(PM_MAPPING[key], int(pedigree.get(key))) for key in PM_MAPPING]
                 )
 
-            if hasattr(unc, "lognormal"):
+            lognormal = unc.find(NS + "lognormal")
+            normal = unc.find(NS + "normal")
+            triangular = unc.find(NS + "triangular")
+            uniform = unc.find(NS + "uniform")
+
+            if lognormal is not None:
                 data.update(
                     {
                         "uncertainty type": LognormalUncertainty.id,
-                        "loc": float(unc.lognormal.get("mu")),
+                        "loc": float(lognormal.get("mu")),
                         "scale": math.sqrt(
-                            float(unc.lognormal.get("varianceWithPedigreeUncertainty"))
+                            float(lognormal.get("varianceWithPedigreeUncertainty"))
                         ),
                     }
                 )
-                if unc.lognormal.get("variance"):
+                if lognormal.get("variance"):
                     data["scale without pedigree"] = math.sqrt(
-                        float(unc.lognormal.get("variance"))
+                        float(lognormal.get("variance"))
                     )
                 if data["scale"] <= 0:
                     cls.abort_exchange(data, TOO_LOW.format(data["scale"]))
                 elif data["scale"] > 25:
                     cls.abort_exchange(data, TOO_HIGH.format(data["scale"]))
-            elif hasattr(unc, "normal"):
+            elif normal is not None:
                 data.update(
                     {
                         "uncertainty type": NormalUncertainty.id,
-                        "loc": float(unc.normal.get("meanValue")),
+                        "loc": float(normal.get("meanValue")),
                         "scale": math.sqrt(
-                            float(unc.normal.get("varianceWithPedigreeUncertainty"))
+                            float(normal.get("varianceWithPedigreeUncertainty"))
                         ),
                     }
                 )
-                if unc.normal.get("variance"):
+                if normal.get("variance"):
                     data["scale without pedigree"] = math.sqrt(
-                        float(unc.normal.get("variance"))
+                        float(normal.get("variance"))
                     )
                 if data["scale"] <= 0:
                     cls.abort_exchange(data)
-            elif hasattr(unc, "triangular"):
+            elif triangular is not None:
                 data.update(
                     {
                         "uncertainty type": TriangularUncertainty.id,
-                        "minimum": float(unc.triangular.get("minValue")),
-                        "loc": float(unc.triangular.get("mostLikelyValue")),
-                        "maximum": float(unc.triangular.get("maxValue")),
+                        "minimum": float(triangular.get("minValue")),
+                        "loc": float(triangular.get("mostLikelyValue")),
+                        "maximum": float(triangular.get("maxValue")),
                     }
                 )
                 if data["minimum"] >= data["maximum"]:
                     cls.abort_exchange(data)
-            elif hasattr(unc, "uniform"):
+            elif uniform is not None:
                 data.update(
                     {
                         "uncertainty type": UniformUncertainty.id,
                         "loc": data["amount"],
-                        "minimum": float(unc.uniform.get("minValue")),
-                        "maximum": float(unc.uniform.get("maxValue")),
+                        "minimum": float(uniform.get("minValue")),
+                        "maximum": float(uniform.get("maxValue")),
                     }
                 )
                 if data["minimum"] >= data["maximum"]:
                     cls.abort_exchange(data)
-            elif hasattr(unc, "undefined"):
+            elif unc.find(NS + "undefined") is not None:
                 data.update(
                     {
                         "uncertainty type": UndefinedUncertainty.id,
@@ -338,13 +508,15 @@ class Ecospold2DataExtractor(object):
     def extract_parameter(cls, exc):
         name = exc.get("variableName")
         data = {
-            "description": exc.name.text,
+            "description": exc.find(NS + "name").text,
             "id": exc.get("parameterId"),
         }
-        if hasattr(exc, "unitName"):
-            data["unit"] = exc.unitName.text
-        if hasattr(exc, "comment"):
-            data["comment"] = exc.comment.text
+        unit = exc.find(NS + "unitName")
+        if unit is not None:
+            data["unit"] = unit.text
+        comment = exc.find(NS + "comment")
+        if comment is not None:
+            data["comment"] = comment.text
         data.update(cls.extract_uncertainty_dict(exc))
         if name is None:
             name = "Unnamed parameter: {}".format(data["id"])
@@ -359,13 +531,16 @@ class Ecospold2DataExtractor(object):
             if not obj.tag.endswith("property"):
                 continue
 
-            properties[obj.name.text] = {"amount": float(obj.get("amount"))}
-            if hasattr(obj, "comment"):
-                properties[obj.name.text]["comment"] = obj.comment.text
-            if hasattr(obj, "unitName"):
-                properties[obj.name.text]["unit"] = obj.unitName.text
+            name = obj.find(NS + "name").text
+            properties[name] = {"amount": float(obj.get("amount"))}
+            comment = obj.find(NS + "comment")
+            if comment is not None:
+                properties[name]["comment"] = comment.text
+            unit = obj.find(NS + "unitName")
+            if unit is not None:
+                properties[name]["unit"] = unit.text
             if obj.get("variableName"):
-                properties[obj.name.text]["variable name"] = obj.get("variableName")
+                properties[name]["variable name"] = obj.get("variableName")
 
         return properties
 
@@ -400,7 +575,8 @@ class Ecospold2DataExtractor(object):
             print(exc.tag)
             raise ValueError
 
-        is_product = hasattr(exc, "outputGroup") and exc.outputGroup.text in ("0", "2")
+        output_group = exc.find(NS + "outputGroup")
+        is_product = output_group is not None and output_group.text in ("0", "2")
 
         if is_biosphere and is_product:
             raise ValueError("Impossible output group")
@@ -415,13 +591,13 @@ class Ecospold2DataExtractor(object):
         data = {
             "flow": exc.get(flow),
             "type": kind,
-            "name": exc.name.text,
+            "name": exc.find(NS + "name").text,
             "classifications": {
                 "CPC": [
-                    o.classificationValue.text
+                    o.find(NS + "classificationValue").text
                     for o in exc.iterchildren()
                     if "classification" in o.tag
-                    and o.classificationSystem.text == "CPC"
+                    and o.find(NS + "classificationSystem").text == "CPC"
                 ]
             },
             "production volume": float(exc.get("productionVolumeAmount") or 0),
@@ -430,10 +606,12 @@ class Ecospold2DataExtractor(object):
         }
         if not is_biosphere:
             data["activity"] = exc.get("activityLinkId")
-        if hasattr(exc, "unitName"):
-            data["unit"] = exc.unitName.text
-        if hasattr(exc, "comment"):
-            data["comment"] = exc.comment.text
+        unit = exc.find(NS + "unitName")
+        if unit is not None:
+            data["unit"] = unit.text
+        comment = exc.find(NS + "comment")
+        if comment is not None:
+            data["comment"] = comment.text
         if exc.get("variableName"):
             data["variable name"] = exc.get("variableName")
         if exc.get("formula"):
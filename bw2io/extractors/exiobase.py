@@ -1,10 +1,26 @@
 import csv
 import re
+from collections import namedtuple
 from pathlib import Path
 import zipfile
 
+import numpy as np
+import pandas as pd
 from tqdm import tqdm
 
+# Number of matrix rows parsed and converted to arrays at once
+BLOCK_SIZE = 500
+
+# Absolute values below this are rounding errors from balancing the tables
+SMALL_BALANCING_CORRECTION = 1e-15
+
+SparseMatrix = namedtuple(
+    "SparseMatrix", ["row_labels", "col_labels", "rows", "cols", "values"]
+)
+SparseMatrix.__doc__ = """Nonzero values of an EXIOBASE matrix in coordinate (COO) format.
+
+``rows``, ``cols`` and ``values`` are NumPy arrays of equal length; ``rows`` and ``cols`` are indices into the lists ``row_labels`` and ``col_labels``."""
+
 
 def remove_numerics(string):
     """Transform names like 'Tobacco products (16)' into 'Tobacco products'"""
@@ -50,7 +66,55 @@ class Exiobase3MonetaryDataExtractor(object):
         return data
 
     @classmethod
-    def get_flows(cls, dirpath):
+    def _use_cache(cls, dirpath, cache):
+        # Cache entries are keyed by the checksum of the zip file
+        return cache is not None and Path(dirpath).is_file()
+
+    @classmethod
+    def _cached_json(cls, dirpath, cache, name, func):
+        if not cls._use_cache(dirpath, cache):
+            return func(dirpath)
+        data = cache.get_json(dirpath, name)
+        if data is None:
+            data = func(dirpath)
+            cache.set_json(dirpath, name, data)
+        return data
+
+    @classmethod
+    def _cached_matrix(cls, dirpath, cache, name, func):
+        if not cls._use_cache(dirpath, cache):
+            return func(dirpath)
+        cached = cache.get_arrays(dirpath, name)
+        if cached is None:
+            matrix = func(dirpath)
+            cache.set_arrays(
+                dirpath,
+                name,
+                {"rows": matrix.rows, "cols": matrix.cols, "values": matrix.values},
+                {"row_labels": matrix.row_labels, "col_labels": matrix.col_labels},
+            )
+            return matrix
+
+        arrays, labels = cached
+        # JSON turns label tuples into lists
+        as_tuples = lambda lst: [tuple(o) if isinstance(o, list) else o for o in lst]
+        return SparseMatrix(
+            as_tuples(labels["row_labels"]),
+            as_tuples(labels["col_labels"]),
+            arrays["rows"],
+            arrays["cols"],
+            arrays["values"],
+        )
+
+    @classmethod
+    def get_flows(cls, dirpath, cache=None):
+        """Get ``{flow name: unit}`` from ``satellite/unit.txt``.
+
+        ``cache`` is an optional ``ArrayCache``, used if ``dirpath`` is a zip file."""
+        return cls._cached_json(dirpath, cache, "flows", cls._read_flows)
+
+    @classmethod
+    def _read_flows(cls, dirpath):
         dirpath = cls._get_path(dirpath)
 
         with (dirpath / "satellite" / "unit.txt").open() as csvfile:
@@ -60,7 +124,14 @@ class Exiobase3MonetaryDataExtractor(object):
         return data
 
     @classmethod
-    def get_products(cls, dirpath):
+    def get_products(cls, dirpath, cache=None):
+        """Get product names, locations, units and production volumes.
+
+        ``cache`` is an optional ``ArrayCache``, used if ``dirpath`` is a zip file."""
+        return cls._cached_json(dirpath, cache, "products", cls._read_products)
+
+    @classmethod
+    def _read_products(cls, dirpath):
         dirpath = cls._get_path(dirpath)
 
         units = cls._get_unit_data(dirpath)
@@ -76,45 +147,142 @@ class Exiobase3MonetaryDataExtractor(object):
         ]
 
     @classmethod
-    def get_technosphere_iterator(
-        cls, dirpath, num_products, ignore_small_balancing_corrections=True
+    def _read_matrix(
+        cls,
+        filepath,
+        label_columns,
+        ignore_small_balancing_corrections=True,
+        block_size=BLOCK_SIZE,
     ):
-        dirpath = cls._get_path(dirpath)
+        """Read a tab-separated EXIOBASE matrix into a ``SparseMatrix``.
 
-        with (dirpath / "A.txt").open() as f:
-            reader = csv.reader(f, delimiter="\t")
-            locations = next(reader)[2:]
-            names = [remove_numerics(o) for o in next(reader)[2:]]
-
-            for line in tqdm(reader):
-                inpt = (remove_numerics(line[1]), line[0])
-                for index, elem in enumerate(line[2:]):
-                    if elem and float(elem) != 0:
-                        if (
-                            ignore_small_balancing_corrections
-                            and abs(float(elem)) < 1e-15
-                        ):
-                            continue
-                        else:
-                            yield (inpt, (names[index], locations[index]), float(elem))
-
-    @classmethod
-    def get_biosphere_iterator(cls, dirpath, ignore_small_balancing_corrections=True):
-        dirpath = cls._get_path(dirpath)
+        The two header lines give the column locations and names. Numeric data is parsed by ``pandas`` in blocks of ``block_size`` rows, and only the nonzero values of each block are kept, so the dense matrix is never built in memory. Rows without any values are skipped.
+
+        Args:
+            * *filepath* (``Path`` or ``zipfile.Path``): Matrix file.
+            * *label_columns* (int): Number of columns with row labels.
+            * *ignore_small_balancing_corrections* (bool): Drop values smaller than ``SMALL_BALANCING_CORRECTION``.
+            * *block_size* (int): Number of rows to convert at once.
+
+        Returns:
+            ``SparseMatrix``; row labels are lists of the label columns.
+
+        """
+        with filepath.open() as f:
+            locations = next(csv.reader([f.readline()], delimiter="\t"))[label_columns:]
+            names = next(csv.reader([f.readline()], delimiter="\t"))[label_columns:]
+            col_labels = [
+                (remove_numerics(name), location)
+                for name, location in zip(names, locations)
+            ]
+
+            row_labels, rows, cols, values = [], [], [], []
+            blocks = pd.read_csv(
+                f,
+                sep="\t",
+                header=None,
+                names=range(label_columns + len(col_labels)),
+                dtype={
+                    i: (str if i < label_columns else np.float64)
+                    for i in range(label_columns + len(col_labels))
+                },
+                keep_default_na=False,
+                na_values=[""],
+                float_precision="round_trip",
+                chunksize=block_size,
+            )
+            for block in tqdm(blocks):
+                data = block.iloc[:, label_columns:].to_numpy(dtype=np.float64)
+                missing = np.isnan(data)
+                block_rows = ~missing.all(axis=1)
+                data, missing = data[block_rows], missing[block_rows]
 
-        with (dirpath / "satellite" / "S.txt").open() as f:
-            reader = csv.reader(f, delimiter="\t")
-            locations = next(reader)[1:]
-            names = [remove_numerics(o) for o in next(reader)[1:]]
-
-            for line in tqdm(reader):
-                flow = line[0]
-                for index, elem in enumerate(line[1:]):
-                    if elem and float(elem) != 0:
-                        if (
-                            ignore_small_balancing_corrections
-                            and abs(float(elem)) < 1e-15
-                        ):
-                            continue
-                        else:
-                            yield (flow, (names[index], locations[index]), float(elem))
+                if ignore_small_balancing_corrections:
+                    mask = np.abs(data) >= SMALL_BALANCING_CORRECTION
+                else:
+                    mask = (data != 0) & ~missing
+                row, col = np.nonzero(mask)
+                rows.append(row + len(row_labels))
+                cols.append(col)
+                values.append(data[row, col])
+                row_labels.extend(
+                    block.iloc[:, :label_columns][block_rows].values.tolist()
+                )
+
+        return SparseMatrix(
+            row_labels,
+            col_labels,
+            np.concatenate(rows or [np.zeros(0, dtype=np.int64)]).astype(np.int64),
+            np.concatenate(cols or [np.zeros(0, dtype=np.int64)]).astype(np.int64),
+            np.concatenate(values or [np.zeros(0)]),
+        )
+
+    @classmethod
+    def _iterate_matrix(cls, matrix):
+        for row, col, value in zip(
+            matrix.rows.tolist(), matrix.cols.tolist(), matrix.values.tolist()
+        ):
+            yield (matrix.row_labels[row], matrix.col_labels[col], value)
+
+    @classmethod
+    def get_technosphere_matrix(
+        cls, dirpath, ignore_small_balancing_corrections=True, cache=None
+    ):
+        """Read nonzero values of ``A.txt`` as ``SparseMatrix``.
+
+        Row and column labels are ``(sector name, location)`` tuples. If ``dirpath`` is a zip file and ``cache`` is an ``ArrayCache``, the parsed matrix is cached, and later calls return memory-mapped arrays.
+
+        """
+
+        def read(dirpath):
+            matrix = cls._read_matrix(
+                cls._get_path(dirpath) / "A.txt", 2, ignore_small_balancing_corrections
+            )
+            return matrix._replace(
+                row_labels=[
+                    (remove_numerics(sector), region)
+                    for region, sector in matrix.row_labels
+                ]
+            )
+
+        name = "A" if ignore_small_balancing_corrections else "A-all"
+        return cls._cached_matrix(dirpath, cache, name, read)
+
+    @classmethod
+    def get_biosphere_matrix(
+        cls, dirpath, ignore_small_balancing_corrections=True, cache=None
+    ):
+        """Read nonzero values of ``satellite/S.txt`` as ``SparseMatrix``.
+
+        Row labels are flow names, column labels are ``(sector name, location)`` tuples. ``cache`` is used as in ``get_technosphere_matrix``.
+
+        """
+
+        def read(dirpath):
+            matrix = cls._read_matrix(
+                cls._get_path(dirpath) / "satellite" / "S.txt",
+                1,
+                ignore_small_balancing_corrections,
+            )
+            return matrix._replace(row_labels=[flow for (flow,) in matrix.row_labels])
+
+        name = "S" if ignore_small_balancing_corrections else "S-all"
+        return cls._cached_matrix(dirpath, cache, name, read)
+
+    @classmethod
+    def get_technosphere_iterator(
+        cls, dirpath, num_products, ignore_small_balancing_corrections=True, cache=None
+    ):
+        yield from cls._iterate_matrix(
+            cls.get_technosphere_matrix(
+                dirpath, ignore_small_balancing_corrections, cache
+            )
+        )
+
+    @classmethod
+    def get_biosphere_iterator(
+        cls, dirpath, ignore_small_balancing_corrections=True, cache=None
+    ):
+        yield from cls._iterate_matrix(
+            cls.get_biosphere_matrix(dirpath, ignore_small_balancing_corrections, cache)
+        )
@@ -1,5 +1,9 @@
-import json
-from pathlib import Path
+import zipfile
+from collections.abc import MutableMapping
+from pathlib import Path, PurePosixPath
+
+from .. import json_codec
+from ..parallel import can_use_mp, imap_ordered
 
 FILES_TO_IGNORE = {
     "context.json",
@@ -10,53 +14,182 @@ DIRECTORIES_TO_IGNORE = {
     "bin",
 }
 
+# Large directories which are read one file at a time when extracting lazily.
+# Reference data (flows, units, categories, locations, etc.) is always loaded.
+LAZY_DIRECTORIES = {
+    "processes",
+}
 
-class JSONLDExtractor(object):
-    @classmethod
-    def extract(cls, filepath, add_filename=True):
-        def adder(data, filepath, add_filename):
-            if not add_filename:
-                return data
-            else:
-                data["filename"] = str(filepath)
-                return data
 
-        filepath = Path(filepath)
-        if filepath.is_file():
-            if not filepath.suffix == ".zip":
+class JSONLDSource(object):
+    """Index and read the JSON files of a JSON-LD directory or zip archive.
+
+    Files are expected in folders one level deep, e.g. ``processes/<id>.json``. The index is ``{folder name: {file stem: member}}``, with file stems sorted.
+
+    Zip archives are read directly, without extracting them."""
+
+    def __init__(self, filepath, add_filename=True):
+        self.filepath = Path(filepath).resolve()
+        self.add_filename = add_filename
+        if self.filepath.is_file():
+            if not self.filepath.suffix.lower() == ".zip":
                 raise ValueError(
-                    "File not supported:\n\t`%s` is a file but not a zip archive."
-                )
-            else:
-                raise NotImplementedError(
-                    "Extraction of zip archives not yet supported"
+                    "File not supported:\n\t`{}` is a file but not a zip "
+                    "archive.".format(filepath)
                 )
+            self.archive = zipfile.ZipFile(self.filepath)
+            members = [
+                PurePosixPath(info.filename)
+                for info in self.archive.infolist()
+                if not info.is_dir()
+            ]
         else:
-            assert filepath.is_dir()
-            filepath = filepath.resolve()
-
-            # Assume directory is one level deep
-            data = {
-                directory.name: dict(
-                    sorted(
-                        [
-                            (
-                                fp.stem,
-                                adder(
-                                    json.load(open(fp, encoding="utf-8")),
-                                    fp,
-                                    add_filename,
-                                ),
-                            )
-                            for fp in directory.iterdir()
-                            if fp.name not in FILES_TO_IGNORE
-                            and not fp.name.startswith(".")
-                            and "json" in fp.suffix.lower()
-                        ]
-                    )
-                )
-                for directory in filepath.iterdir()
-                if directory.is_dir() and directory.name not in DIRECTORIES_TO_IGNORE
-            }
+            assert self.filepath.is_dir()
+            self.archive = None
+            members = [
+                fp.relative_to(self.filepath)
+                for directory in self.filepath.iterdir()
+                if directory.is_dir()
+                for fp in directory.iterdir()
+            ]
+        self.index = self._build_index(members)
+
+    @staticmethod
+    def _build_index(members):
+        index = {}
+        for member in members:
+            if (
+                len(member.parts) != 2
+                or member.parts[0] in DIRECTORIES_TO_IGNORE
+                or member.name in FILES_TO_IGNORE
+                or member.name.startswith(".")
+                or "json" not in member.suffix.lower()
+            ):
+                continue
+            index.setdefault(member.parts[0], []).append((member.stem, member))
+        return {folder: dict(sorted(lst)) for folder, lst in index.items()}
+
+    def load(self, member):
+        """Read and parse ``member``, a path relative to the directory or archive root"""
+        filepath = self.filepath / member
+        if self.archive is None:
+            data = json_codec.load(filepath)
+        else:
+            data = json_codec.loads(self.archive.read(str(member)))
+        if self.add_filename:
+            data["filename"] = str(filepath)
+        return data
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+
+_worker_state = {}
+
+
+def _init_worker(filepath, add_filename):
+    _worker_state["source"] = JSONLDSource(filepath, add_filename)
+
+
+def _load_member(member):
+    return _worker_state["source"].load(member)
 
+
+class JSONLDFolder(MutableMapping):
+    """Mapping of file stem to JSON-LD object for one folder, e.g. ``processes``, which parses files only when they are first accessed.
+
+    Parsed objects are kept, so changes to them aren't lost, and each file is parsed at most once. ``load_all()``, which is also called by ``items()`` and ``values()``, parses all remaining files, in a process pool if ``processes`` is greater than one.
+
+    """
+
+    def __init__(self, source, members, processes=None, chunksize=None):
+        self.source = source
+        # ``None`` for objects which were added, not read from ``source``
+        self.members = dict(members)
+        self.loaded = {}
+        self.processes = processes
+        self.chunksize = chunksize
+
+    def __repr__(self):
+        return "JSONLDFolder with {} objects ({} loaded)".format(
+            len(self), len(self.loaded)
+        )
+
+    def __getitem__(self, key):
+        try:
+            return self.loaded[key]
+        except KeyError:
+            obj = self.loaded[key] = self.source.load(self.members[key])
+            return obj
+
+    def __setitem__(self, key, value):
+        self.members.setdefault(key, None)
+        self.loaded[key] = value
+
+    def __delitem__(self, key):
+        del self.members[key]
+        self.loaded.pop(key, None)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __len__(self):
+        return len(self.members)
+
+    def load_all(self):
+        """Parse all objects which weren't loaded yet, and return ``self``"""
+        keys = [key for key in self.members if key not in self.loaded]
+        members = [self.members[key] for key in keys]
+        if len(members) > 1 and self.processes and self.processes > 1 and can_use_mp():
+            objects = imap_ordered(
+                _load_member,
+                members,
+                processes=self.processes,
+                chunksize=self.chunksize,
+                initializer=_init_worker,
+                initargs=(self.source.filepath, self.source.add_filename),
+            )
+        else:
+            objects = map(self.source.load, members)
+        self.loaded.update(zip(keys, objects))
+        return self
+
+    def items(self):
+        self.load_all()
+        return super().items()
+
+    def values(self):
+        self.load_all()
+        return super().values()
+
+
+class JSONLDExtractor(object):
+    @classmethod
+    def extract(
+        cls, filepath, add_filename=True, lazy=False, processes=None, chunksize=None
+    ):
+        """Extract data from a JSON-LD directory or zip archive.
+
+        Args:
+            * *filepath* (str or Path): Directory or zip archive.
+            * *add_filename* (bool): Add the path of each file as ``filename``.
+            * *lazy* (bool): Return folders in ``LAZY_DIRECTORIES`` as ``JSONLDFolder``, which parses files only when they are first accessed. All other folders are loaded.
+            * *processes* (int, optional): Number of worker processes used to parse lazy folders.
+            * *chunksize* (int, optional): Number of files sent to a worker at once.
+
+        Returns:
+            Dictionary of ``{folder name: {file stem: data}}``.
+
+        """
+        source = JSONLDSource(filepath, add_filename)
+        data = {}
+        for folder, members in source.index.items():
+            if folder in LAZY_DIRECTORIES:
+                contents = JSONLDFolder(source, members, processes, chunksize)
+                data[folder] = contents if lazy else dict(contents.load_all())
+            else:
+                data[folder] = dict(JSONLDFolder(source, members).load_all())
+        if not lazy:
+            source.close()
         return data
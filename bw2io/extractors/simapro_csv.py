@@ -1,4 +1,6 @@
 import csv
+import functools
+import itertools
 import math
 import os
 import re
@@ -16,6 +18,7 @@ from stats_arrays import (
 )
 
 from ..compatibility import SIMAPRO_BIOSPHERE
+from ..parallel import can_use_mp, imap_ordered
 from ..strategies.simapro import normalize_simapro_formulae
 
 INTRODUCTION = """Starting SimaPro import:
@@ -83,22 +86,162 @@ uppercase_expression = (
     "(?:[^a-zA-Z_]|$)"  # Match anything other than a letter or underscore, or the end of the line
 )
 
+# Words which can contain a parameter name. Digits count as separators in
+# ``uppercase_expression``, so names can also start or end next to a digit.
+word_re = re.compile("[a-zA-Z0-9_]+")
+simple_name_re = re.compile("[A-Z0-9_]+")
 
-def replace_with_uppercase(string, names, precompiled):
+
+@functools.lru_cache(maxsize=2**14)
+def _uppercase_pattern(name):
+    return re.compile(uppercase_expression.format(name), flags=re.IGNORECASE)
+
+
+def _uppercase_name(string, name):
+    for result in _uppercase_pattern(name).findall(string):
+        string = string.replace(result, name)
+    return string
+
+
+def replace_with_uppercase(string, names, precompiled=None):
     """Replace all occurrences of elements of ``names`` in ``string`` with their uppercase equivalents.
 
-    ``names`` is a list of variable name strings that should already all be uppercase.
+    ``names`` is a list of variable name strings that should already all be uppercase. ``precompiled`` is an optional dictionary of compiled ``uppercase_expression`` patterns for ``names``.
+
+    This runs one regular expression per name; use ``ParameterNames`` to only check the names which occur in ``string``.
 
     Returns a modified ``string``."""
     for name in names:
-        for result in precompiled[name].findall(string):
-            string = string.replace(result, name)
+        if precompiled is None:
+            string = _uppercase_name(string, name)
+        else:
+            for result in precompiled[name].findall(string):
+                string = string.replace(result, name)
     return string
 
 
+def formula_words(string, max_length):
+    """Uppercase substrings of ``string`` which ``uppercase_expression`` could match as a name of at most ``max_length`` characters"""
+    words = set()
+    for match in word_re.finditer(string.upper()):
+        word = match.group(0)
+        starts = [0] + [i for i in range(1, len(word)) if word[i - 1].isdigit()]
+        ends = [i for i in range(1, len(word)) if word[i].isdigit()] + [len(word)]
+        for start in starts:
+            for end in ends:
+                if start < end <= start + max_length:
+                    words.add(word[start:end])
+    return words
+
+
+class ParameterNames:
+    """Uppercase parameter names, in order, indexed by the words they can match in a formula.
+
+    ``uppercase`` gives the same result as ``replace_with_uppercase``, but only runs the per-name regular expression for names which occur in the formula. These are found by splitting the formula into words once, so the cost doesn't depend on the number of names. Build once per set of parameters, e.g. once for the global parameters of a file.
+
+    Args:
+        * *names* (iterable): Uppercase parameter names, e.g. a dictionary of parameters.
+
+    """
+
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.order = {name: index for index, name in enumerate(self.names)}
+        self.max_length = max(map(len, self.names), default=0)
+        # Names which ``formula_words`` can't find are always checked
+        self.other = [name for name in self.names if not simple_name_re.fullmatch(name)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.order
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def used_in(self, string, words=None):
+        """Names which can occur in ``string``, in order.
+
+        ``words`` are the ``formula_words`` of ``string``, for at least ``self.max_length``."""
+        if not string.isascii():
+            # Case-insensitive matching of non-ASCII characters isn't covered
+            # by ``formula_words``
+            return self.names
+        if words is None:
+            words = formula_words(string, self.max_length)
+        found = {word for word in words if word in self.order}
+        found.update(self.other)
+        return sorted(found, key=self.order.__getitem__)
+
+    def uppercase(self, string, words=None):
+        """Same as ``replace_with_uppercase(string, self.names)``"""
+        for name in self.used_in(string, words):
+            string = _uppercase_name(string, name)
+        return string
+
+
+def rewrite_formula(formula, settings, *namespaces):
+    """Convert SimaPro ``formula`` to Python, and uppercase the parameter names in ``namespaces``.
+
+    Gives the same result as ``normalize_simapro_formulae``, followed by ``replace_with_uppercase`` for each of ``namespaces`` in turn. The words of the formula are found once for all namespaces; uppercasing doesn't change them.
+
+    Args:
+        * *formula* (str): Formula as written in the SimaPro CSV file.
+        * *settings* (dict): Project metadata, for the decimal separator.
+        * *namespaces*: ``ParameterNames``, e.g. local and then global parameters.
+
+    Returns the rewritten formula."""
+    formula = normalize_simapro_formulae(formula, settings)
+    max_length = max((names.max_length for names in namespaces), default=0)
+    words = formula_words(formula, max_length) if formula.isascii() else None
+    for names in namespaces:
+        formula = names.uppercase(formula, words)
+    return formula
+
+
+# Data shared by all processes in a worker; set once per worker by ``_init_worker``
+_worker_state = {}
+
+
+def _init_worker(extractor, *args):
+    _worker_state["extractor"] = extractor
+    _worker_state["args"] = args
+
+
+def _read_block(block):
+    return _worker_state["extractor"].read_block(block, *_worker_state["args"])
+
+
 class SimaProCSVExtractor(object):
     @classmethod
-    def extract(cls, filepath, delimiter=";", name=None, encoding="cp1252"):
+    def extract(
+        cls,
+        filepath,
+        delimiter=";",
+        name=None,
+        encoding="cp1252",
+        as_generator=False,
+        processes=None,
+        chunksize=None,
+    ):
+        """Extract process datasets, global parameters and project metadata from a SimaPro CSV export.
+
+        The file is read twice, line by line. The first pass collects the project metadata and the global parameters, which are at the end of the file but are needed to parse the processes. The second pass collects the lines of one process at a time, and parses them as soon as the process ``End`` is reached, so memory use is limited by the largest process, not the size of the file.
+
+        Args:
+            * *filepath*: Path to the SimaPro CSV export.
+            * *delimiter*: CSV delimiter. Default is ``;``.
+            * *name*: Database name. Default is the project name in the export.
+            * *encoding*: File encoding. Default is ``cp1252``.
+            * *as_generator*: Return a generator of datasets instead of a list. Default is ``False``.
+            * *processes*: If more than one, parse processes in a pool of this many worker processes. Default is ``None``, parse in this process.
+            * *chunksize*: Number of processes sent to a worker at once. Default from ``bw2io.parallel.default_chunksize``.
+
+        Returns:
+            Datasets (list or generator), global parameters, and project metadata.
+
+        """
         assert os.path.exists(filepath), "Can't find file %s" % filepath
         log, logfile = get_io_logger("SimaPro-extractor")
 
@@ -110,46 +253,143 @@ class SimaProCSVExtractor(object):
                 name,
             )
         )
-        with open(filepath, "r", encoding=encoding) as csv_file:
-            reader = csv.reader(csv_file, delimiter=delimiter)
-            lines = [
-                [strip_whitespace_and_delete(obj) for obj in line] for line in reader
-            ]
-
-        # Check if valid SimaPro file
-        assert (
-            "SimaPro" in lines[0][0] or "CSV separator" in lines[0][0]
-        ), "File is not valid SimaPro export"
-
-        project_name = name or cls.get_project_name(lines)
-        datasets = []
-
-        project_metadata = cls.get_project_metadata(lines)
-        global_parameters, global_precompiled = cls.get_global_parameters(
-            lines, project_metadata
-        )
-
-        index = cls.get_next_process_index(lines, 0)
 
-        while True:
-            try:
-                ds, index = cls.read_data_set(
-                    lines,
-                    index,
-                    project_name,
-                    filepath,
-                    global_parameters,
-                    project_metadata,
-                    global_precompiled,
-                )
-                datasets.append(ds)
-                index = cls.get_next_process_index(lines, index)
-            except EndOfDatasets:
-                break
+        project_name, project_metadata, global_parameters, global_names = cls.prescan(
+            filepath, delimiter, encoding
+        )
+        project_name = name or project_name
+
+        datasets = cls.iter_datasets(
+            filepath,
+            delimiter,
+            encoding,
+            project_name,
+            global_parameters,
+            project_metadata,
+            global_names,
+            processes=processes,
+            chunksize=chunksize,
+        )
+        if not as_generator:
+            datasets = list(datasets)
 
         close_log(log)
         return datasets, global_parameters, project_metadata
 
+    @classmethod
+    def iter_lines(cls, filepath, delimiter=";", encoding="cp1252"):
+        """Yield each line of a SimaPro CSV file as a list of cleaned cells"""
+        with open(filepath, "r", encoding=encoding) as csv_file:
+            for line in csv.reader(csv_file, delimiter=delimiter):
+                yield [strip_whitespace_and_delete(obj) for obj in line]
+
+    @classmethod
+    def prescan(cls, filepath, delimiter=";", encoding="cp1252"):
+        """Get project name, project metadata, and global parameters from a SimaPro CSV file.
+
+        Process datasets are skipped without being stored.
+
+        Returns:
+            Project name, project metadata, global parameters, and global parameter names.
+
+        """
+        reader = cls.iter_lines(filepath, delimiter, encoding)
+        try:
+            head = list(itertools.islice(reader, 25))
+
+            # Check if valid SimaPro file
+            assert head and (
+                "SimaPro" in head[0][0] or "CSV separator" in head[0][0]
+            ), "File is not valid SimaPro export"
+
+            project_name = cls.get_project_name(head)
+            lines = itertools.chain(head, reader)
+            project_metadata = cls.get_project_metadata(lines)
+            global_parameters, global_names = cls.get_global_parameters(
+                lines, project_metadata
+            )
+        finally:
+            reader.close()
+        return project_name, project_metadata, global_parameters, global_names
+
+    @classmethod
+    def iter_process_blocks(cls, lines):
+        """Yield the lines of each process in ``lines``, from the line after ``Process`` up to and including ``End``.
+
+        Stops at the first section after the processes, e.g. ``Units``."""
+        block = None
+        for line in lines:
+            if block is None:
+                if line and line[0] in SIMAPRO_END_OF_DATASETS:
+                    return
+                elif line and line[0] == "Process":
+                    block = []
+            else:
+                block.append(line)
+                if line and line[0] == "End":
+                    yield block
+                    block = None
+                elif line and line[0] in SIMAPRO_END_OF_DATASETS:
+                    # Process without ``End``; ``read_data_set`` decides what to do
+                    break
+        if block is not None:
+            # File ends without ``End`` or extra metadata
+            yield block
+
+    @classmethod
+    def iter_datasets(
+        cls,
+        filepath,
+        delimiter,
+        encoding,
+        db_name,
+        global_parameters,
+        project_metadata,
+        global_names,
+        processes=None,
+        chunksize=None,
+    ):
+        """Parse and yield process datasets one at a time, in the order of the file.
+
+        If ``processes`` is more than one, the process blocks are parsed in a process pool. The global parameters and names are sent to each worker once, when it starts. In this case all process blocks are read before being sent to the workers, so memory use is no longer limited by the largest block."""
+        blocks = cls.iter_process_blocks(cls.iter_lines(filepath, delimiter, encoding))
+        args = (
+            db_name,
+            filepath,
+            global_parameters,
+            project_metadata,
+            global_names,
+        )
+        if processes and processes > 1 and can_use_mp():
+            results = imap_ordered(
+                _read_block,
+                blocks,
+                processes=processes,
+                chunksize=chunksize,
+                initializer=_init_worker,
+                initargs=(cls,) + args,
+            )
+        else:
+            results = (cls.read_block(block, *args) for block in blocks)
+        for ds in results:
+            if ds is None:
+                # No more datasets
+                return
+            yield ds
+
+    @classmethod
+    def read_block(cls, block, db_name, filepath, gp, pm, global_names):
+        """Parse the lines of one process (see ``iter_process_blocks``).
+
+        Returns a dataset, or ``None`` if the block marks the end of the datasets."""
+        try:
+            ds, _ = cls.read_data_set(
+                block, 0, db_name, filepath, gp, pm, global_names
+            )
+        except EndOfDatasets:
+            return None
+        return ds
+
     @classmethod
     def get_next_process_index(cls, data, index):
         while True:
@@ -196,26 +436,22 @@ class SimaProCSVExtractor(object):
             elif current == "input":
                 parameters.append(cls.parse_input_parameter(line))
             elif current == "calculated":
-                parameters.append(cls.parse_calculated_parameter(line, pm))
+                parameters.append(cls.parse_calculated_parameter(line))
             else:
                 raise ValueError("This should never happen")
 
         # Extract name and uppercase
         parameters = {obj.pop("name").upper(): obj for obj in parameters}
-        global_precompiled = {
-            name: re.compile(uppercase_expression.format(name), flags=re.IGNORECASE)
-            for name in parameters
-        }
+        global_names = ParameterNames(parameters)
 
-        # Change all formula values to uppercase if referencing global parameters
+        # Convert formulas to Python, and change to uppercase if referencing
+        # global parameters
         for obj in parameters.values():
             if "formula" in obj:
-                obj["formula"] = replace_with_uppercase(
-                    obj["formula"], parameters, global_precompiled
-                )
+                obj["formula"] = rewrite_formula(obj["formula"], pm, global_names)
 
         ParameterSet(parameters).evaluate_and_set_amount_field()
-        return parameters, global_precompiled
+        return parameters, global_names
 
     @classmethod
     def get_project_name(cls, data):
@@ -289,7 +525,7 @@ class SimaProCSVExtractor(object):
             raise ValueError("Unknown uncertainty type: {}".format(kind))
 
     @classmethod
-    def parse_calculated_parameter(cls, line, pm):
+    def parse_calculated_parameter(cls, line):
         """Parse line in `Calculated parameters` section.
 
         0. name
@@ -300,7 +536,7 @@ class SimaProCSVExtractor(object):
         """
         return {
             "name": line[0],
-            "formula": normalize_simapro_formulae(line[1], pm),
+            "formula": line[1],
             "comment": "; ".join([x for x in line[2:] if x]),
         }
 
@@ -323,7 +559,7 @@ class SimaProCSVExtractor(object):
         return ds
 
     @classmethod
-    def parse_biosphere_flow(cls, line, category, pm):
+    def parse_biosphere_flow(cls, line, category):
         """Parse biosphere flow line.
 
         0. name
@@ -345,7 +581,7 @@ class SimaProCSVExtractor(object):
 
         is_formula = not isinstance(to_number(amount), Number)
         if is_formula:
-            ds = {"formula": normalize_simapro_formulae(amount, pm)}
+            ds = {"formula": amount}
         else:
             ds = cls.create_distribution(amount, *line[4:8])
         ds.update(
@@ -360,7 +596,7 @@ class SimaProCSVExtractor(object):
         return ds
 
     @classmethod
-    def parse_input_line(cls, line, category, pm):
+    def parse_input_line(cls, line, category):
         """Parse technosphere input line.
 
         0. name
@@ -381,7 +617,7 @@ class SimaProCSVExtractor(object):
 
         is_formula = not isinstance(to_number(amount), Number)
         if is_formula:
-            ds = {"formula": normalize_simapro_formulae(amount, pm)}
+            ds = {"formula": amount}
         else:
             ds = cls.create_distribution(amount, *line[3:7])
         ds.update(
@@ -398,7 +634,7 @@ class SimaProCSVExtractor(object):
         return ds
 
     @classmethod
-    def parse_final_waste_flow(cls, line, pm):
+    def parse_final_waste_flow(cls, line):
         """Parse final wate flow line.
 
         0: name
@@ -419,7 +655,7 @@ class SimaProCSVExtractor(object):
 
         is_formula = not isinstance(to_number(amount), Number)
         if is_formula:
-            ds = {"formula": normalize_simapro_formulae(amount, pm)}
+            ds = {"formula": amount}
         else:
             ds = cls.create_distribution(amount, *line[4:8])
         ds.update(
@@ -436,7 +672,7 @@ class SimaProCSVExtractor(object):
         return ds
 
     @classmethod
-    def parse_reference_product(cls, line, pm):
+    def parse_reference_product(cls, line):
         """Parse reference product line.
 
         0. name
@@ -456,7 +692,7 @@ class SimaProCSVExtractor(object):
 
         is_formula = not isinstance(to_number(amount), Number)
         if is_formula:
-            ds = {"formula": normalize_simapro_formulae(amount, pm)}
+            ds = {"formula": amount}
         else:
             ds = {"amount": to_number(amount)}
         ds.update(
@@ -472,7 +708,7 @@ class SimaProCSVExtractor(object):
         return ds
 
     @classmethod
-    def parse_waste_treatment(cls, line, pm):
+    def parse_waste_treatment(cls, line):
         """Parse reference product line.
 
         0. name
@@ -485,7 +721,7 @@ class SimaProCSVExtractor(object):
         """
         is_formula = not isinstance(to_number(line[2]), Number)
         if is_formula:
-            ds = {"formula": normalize_simapro_formulae(line[2], pm)}
+            ds = {"formula": line[2]}
         else:
             ds = {"amount": to_number(line[2])}
         ds.update(
@@ -513,7 +749,7 @@ class SimaProCSVExtractor(object):
             index += 1
 
     @classmethod
-    def read_data_set(cls, data, index, db_name, filepath, gp, pm, global_precompiled):
+    def read_data_set(cls, data, index, db_name, filepath, gp, pm, global_names):
         metadata, index = cls.read_dataset_metadata(data, index)
         # `index` is now the `Products` or `Waste Treatment` line
         ds = {
@@ -535,7 +771,7 @@ class SimaProCSVExtractor(object):
                     index < len(data) and data[index] and data[index][0]
                 ):  # Stop on blank line
                     ds["exchanges"].append(
-                        cls.parse_input_line(data[index], category, pm)
+                        cls.parse_input_line(data[index], category)
                     )
                     index += 1
             elif data[index][0] in SIMAPRO_BIOSPHERE:
@@ -545,7 +781,7 @@ class SimaProCSVExtractor(object):
                     index < len(data) and data[index] and data[index][0]
                 ):  # Stop on blank line
                     ds["exchanges"].append(
-                        cls.parse_biosphere_flow(data[index], category, pm)
+                        cls.parse_biosphere_flow(data[index], category)
                     )
                     index += 1
             elif data[index][0] == "Calculated parameters":
@@ -554,7 +790,7 @@ class SimaProCSVExtractor(object):
                     index < len(data) and data[index] and data[index][0]
                 ):  # Stop on blank line
                     ds["parameters"].append(
-                        cls.parse_calculated_parameter(data[index], pm)
+                        cls.parse_calculated_parameter(data[index])
                     )
                     index += 1
             elif data[index][0] == "Input parameters":
@@ -569,21 +805,21 @@ class SimaProCSVExtractor(object):
                 while (
                     index < len(data) and data[index] and data[index][0]
                 ):  # Stop on blank line
-                    ds["exchanges"].append(cls.parse_reference_product(data[index], pm))
+                    ds["exchanges"].append(cls.parse_reference_product(data[index]))
                     index += 1
             elif data[index][0] == "Waste treatment":
                 index += 1  # Advance to data lines
                 while (
                     index < len(data) and data[index] and data[index][0]
                 ):  # Stop on blank line
-                    ds["exchanges"].append(cls.parse_waste_treatment(data[index], pm))
+                    ds["exchanges"].append(cls.parse_waste_treatment(data[index]))
                     index += 1
             elif data[index][0] == "Final waste flows":
                 index += 1  # Advance to data lines
                 while (
                     index < len(data) and data[index] and data[index][0]
                 ):  # Stop on blank line
-                    ds["exchanges"].append(cls.parse_final_waste_flow(data[index], pm))
+                    ds["exchanges"].append(cls.parse_final_waste_flow(data[index]))
                     index += 1
             elif data[index][0] in SIMAPRO_END_OF_DATASETS:
                 # Don't care about processing steps below, as no dataset
@@ -597,30 +833,14 @@ class SimaProCSVExtractor(object):
 
         # Extract name and uppercase
         ds["parameters"] = {obj.pop("name").upper(): obj for obj in ds["parameters"]}
-        local_precompiled = {
-            name: re.compile(uppercase_expression.format(name), flags=re.IGNORECASE)
-            for name in ds["parameters"]
-        }
 
-        # Change all parameter formula values to uppercase if referencing
-        # global or local parameters
-        for obj in ds["parameters"].values():
+        # Convert parameter and exchange formulas to Python, and change to
+        # uppercase if referencing local or global parameters
+        local_names = ParameterNames(ds["parameters"])
+        for obj in itertools.chain(ds["parameters"].values(), ds["exchanges"]):
             if "formula" in obj:
-                obj["formula"] = replace_with_uppercase(
-                    obj["formula"], ds["parameters"], local_precompiled
-                )
-                obj["formula"] = replace_with_uppercase(
-                    obj["formula"], gp, global_precompiled
-                )
-        # Change all exchange values to uppercase if referencing
-        # global or local parameters
-        for obj in ds["exchanges"]:
-            if "formula" in obj:
-                obj["formula"] = replace_with_uppercase(
-                    obj["formula"], ds["parameters"], local_precompiled
-                )
-                obj["formula"] = replace_with_uppercase(
-                    obj["formula"], gp, global_precompiled
+                obj["formula"] = rewrite_formula(
+                    obj["formula"], pm, local_names, global_names
                 )
 
         ps = ParameterSet(
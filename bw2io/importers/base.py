@@ -5,9 +5,14 @@ from time import time
 
 from ..errors import StrategyError
 from ..migrations import migrations
+from ..parallel import can_use_mp
+from ..profiling import StrategyProfiler, StrategyReport, strategy_hooks
 from ..strategies import migrate_datasets, migrate_exchanges
+from ..strategies.pipeline import apply_sharded
+from ..strategies.pipeline import fuse as fuse_strategies
+from ..strategies.pipeline import group_strategies, is_shard_safe
 from ..unlinked_data import UnlinkedData, unlinked_data
-from ..utils import activity_hash
+from ..utils import activity_key
 
 
 class ImportBase(object):
@@ -22,41 +27,108 @@ class ImportBase(object):
         for ds in self.data:
             yield ds
 
-    def apply_strategy(self, strategy, verbose=True):
+    def apply_strategy(self, strategy, verbose=True, profile=False):
         """Apply ``strategy`` transform to ``self.data``.
 
         Adds strategy name to ``self.applied_strategies``. If ``StrategyError`` is raised, print error message, but don't raise error.
 
+        Timings and object counts are added to ``self.strategy_records``; see ``strategy_report``.
+
         .. note:: Strategies should not partially modify data before raising ``StrategyError``.
 
         Args:
             *strategy* (callable)
+            *profile* (bool, optional): Also record memory use and changed datasets and exchanges. Slow.
 
         Returns:
             Nothing, but modifies ``self.data``, and strategy to ``self.applied_strategies``.
 
         """
-        if not hasattr(self, "applied_strategies"):
-            self.applied_strategies = []
-        try:
-            func_name = strategy.__name__
-        except AttributeError:  # Curried function
-            func_name = strategy.func.__name__
+        func_name = self._strategy_name(strategy)
         if verbose:
             print("Applying strategy: {}".format(func_name))
+        self._run_strategy(strategy, [func_name], profile)
+
+    def _run_strategy(self, strategy, names, profile=False):
+        """Apply ``strategy``, which can be several fused strategies with names ``names``, and record the results."""
+        if not hasattr(self, "applied_strategies"):
+            self.applied_strategies = []
+        if not hasattr(self, "strategy_records"):
+            self.strategy_records = []
+        profiler = StrategyProfiler(" + ".join(names), self.data, detailed=profile)
         try:
             self.data = strategy(self.data)
-            self.applied_strategies.append(func_name)
+            self.applied_strategies.extend(names)
+            record = profiler.finish(self.data)
         except StrategyError as err:
-            print("Couldn't apply strategy {}:\n\t{}".format(func_name, err))
+            record = profiler.finish(self.data, error=str(err))
+            print("Couldn't apply strategy {}:\n\t{}".format(", ".join(names), err))
+        finally:
+            # Don't leave ``tracemalloc`` running if the strategy raised
+            profiler.stop()
+        self.strategy_records.append(record)
+        for hook in strategy_hooks:
+            hook(self, record)
+
+    def strategy_report(self):
+        """Return a ``StrategyReport`` for the strategies applied so far.
 
-    def apply_strategies(self, strategies=None, verbose=True):
+        The report has the wall time, CPU time, and dataset and exchange counts for each strategy, and can be printed or exported with ``to_json`` and ``to_csv``. Fused strategies (see ``apply_strategies``) are measured together. Use ``apply_strategies(profile=True)`` to also measure memory use and count changed objects.
+
+        To send records somewhere else as they are created, use ``bw2io.profiling.add_strategy_hook``."""
+        return StrategyReport(getattr(self, "strategy_records", []))
+
+    @staticmethod
+    def _strategy_name(strategy):
+        try:
+            return strategy.__name__
+        except AttributeError:  # Curried function
+            return strategy.func.__name__
+
+    def _apply_fused_strategies(self, strategies, verbose=True, profile=False):
+        """Apply several dataset or exchange transforms in one pass over ``self.data``.
+
+        See ``bw2io.strategies.pipeline``."""
+        names = [self._strategy_name(strategy) for strategy in strategies]
+        if verbose:
+            for name in names:
+                print("Applying strategy: {}".format(name))
+        self._run_strategy(fuse_strategies(strategies), names, profile)
+
+    def _apply_sharded_strategies(
+        self, strategies, verbose=True, profile=False, processes=None
+    ):
+        """Apply shard-safe strategies to ``self.data`` in a process pool.
+
+        See ``bw2io.strategies.pipeline.apply_sharded``."""
+        names = [self._strategy_name(strategy) for strategy in strategies]
+        if verbose:
+            for name in names:
+                print("Applying strategy (parallel): {}".format(name))
+        self._run_strategy(
+            functools.partial(
+                apply_sharded, strategies=strategies, processes=processes
+            ),
+            names,
+            profile,
+        )
+
+    def apply_strategies(
+        self, strategies=None, verbose=True, fuse=False, profile=False, processes=None
+    ):
         """Apply a list of strategies.
 
         Uses the default list ``self.strategies`` if ``strategies`` is ``None``.
 
+        If ``fuse``, consecutive strategies which are declared as dataset or exchange transforms (see ``bw2io.strategies.pipeline``) are applied together in a single pass over the data. Other strategies, like linking, are applied on their own. The result is the same as applying the strategies one after the other.
+
+        If ``processes`` is given, consecutive shard-safe strategies (see ``bw2io.strategies.pipeline.shard_safe``) are applied in a pool of ``processes`` worker processes, each working on a part of ``self.data``. Workers always fuse transforms. Other strategies are applied in this process, and ``self.data`` is replaced by copies made in the workers. Only worth it for large imports, as all data is sent to the workers and back.
+
         Args:
             *strategies* (list, optional): List of strategies to apply. Defaults to ``self.strategies``.
+            *fuse* (bool, optional): Fuse consecutive transforms. Default is ``False``.
+            *profile* (bool, optional): Record memory use and changed objects for each strategy; see ``strategy_report``. Default is ``False``.
+            *processes* (int, optional): Number of worker processes for shard-safe strategies. Default is ``None``, meaning everything is done in this process.
 
         Returns:
             Nothings, but modifies ``self.data``, and adds each strategy to ``self.applied_strategies``.
@@ -65,10 +137,25 @@ class ImportBase(object):
         start = time()
         func_list = self.strategies if strategies is None else strategies
         total = len(func_list)
-        for i, func in enumerate(func_list):
-            self.apply_strategy(func, verbose)
-            if hasattr(self, "signal") and hasattr(self.signal, "emit"):
-                self.signal.emit(i + 1, total)
+        parallel = bool(processes) and processes > 1 and can_use_mp()
+        if parallel:
+            groups = group_strategies(func_list, is_shard_safe)
+        elif fuse:
+            groups = group_strategies(func_list)
+        else:
+            groups = [[func] for func in func_list]
+        done = 0
+        for group in groups:
+            if parallel and is_shard_safe(group[0]):
+                self._apply_sharded_strategies(group, verbose, profile, processes)
+            elif len(group) == 1:
+                self.apply_strategy(group[0], verbose, profile)
+            else:
+                self._apply_fused_strategies(group, verbose, profile)
+            for _ in group:
+                done += 1
+                if hasattr(self, "signal") and hasattr(self.signal, "emit"):
+                    self.signal.emit(done, total)
         if verbose:
             print(
                 "Applied {} strategies in {:.2f} seconds".format(
@@ -80,12 +167,12 @@ class ImportBase(object):
     def unlinked(self):
         """Iterate through unique unlinked exchanges.
 
-        Uniqueness is determined by ``activity_hash``."""
+        Uniqueness is determined by the fields used in ``activity_hash``."""
         seen = set()
         for ds in self.data:
             for exc in ds.get("exchanges", []):
                 if not exc.get("input"):
-                    ah = activity_hash(exc)
+                    ah = activity_key(exc)
                     if ah in seen:
                         continue
                     else:
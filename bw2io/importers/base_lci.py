@@ -14,6 +14,7 @@ from bw2data.parameters import (
 from ..errors import NonuniqueCode, StrategyError, WrongDatabase
 from ..export.excel import write_lci_matching
 from ..migrations import migrations
+from ..upsert import upsert_database
 from ..strategies import (
     assign_only_product_as_production,
     drop_unlinked,
@@ -21,10 +22,11 @@ from ..strategies import (
     link_iterable_by_fields,
     link_technosphere_based_on_name_unit_location,
     link_technosphere_by_activity_hash,
+    migrate_many,
     normalize_units,
     strip_biosphere_exc_locations,
 )
-from ..utils import activity_hash
+from ..utils import activity_hash, activity_key
 from .base import ImportBase
 
 
@@ -70,7 +72,7 @@ class LCIImporter(ImportBase):
             unique_unlinked = collections.defaultdict(set)
             for ds in self.data:
                 for exc in (e for e in ds.get("exchanges", []) if not e.get("input")):
-                    unique_unlinked[exc.get("type")].add(activity_hash(exc))
+                    unique_unlinked[exc.get("type")].add(activity_key(exc))
             unique_unlinked = sorted(
                 [(k, len(v)) for k, v in list(unique_unlinked.items())]
             )
@@ -207,6 +209,7 @@ class LCIImporter(ImportBase):
         backend=None,
         activate_parameters=False,
         db_name=None,
+        upsert=False,
         **kwargs
     ):
         """
@@ -216,11 +219,14 @@ class LCIImporter(ImportBase):
 
         ``delete_existing`` effects both the existing database (it will be emptied prior to writing if True, which is the default), and, if ``activate_parameters`` is True, existing database and activity parameters. Database parameters will only be deleted if the import data specifies a new set of database parameters (i.e. ``database_parameters`` is not ``None``) - the same is true for activity parameters. If you need finer-grained control, please use the ``DatabaseParameter``, etc. objects directly.
 
+        If ``upsert`` and ``delete_existing`` is ``False``, only new and changed activities are written to an existing database, and other activities are left alone. The existing database is not loaded into memory. Only for the ``sqlite`` backend; see ``bw2io.upsert.upsert_database``. The number of new, changed and unchanged activities is stored in ``self.upsert_statistics``.
+
         Args:
             * *data* (dict, optional): The data to write to the ``Database``. Default is ``self.data``.
             * *delete_existing* (bool, default ``True``): See above.
             * *activate_parameters* (bool, default ``False``). Instead of storing parameters in ``Activity`` and other proxy objects, create ``ActivityParameter`` and other parameter objects, and evaluate all variables and formulas.
             * *backend* (string, optional): Storage backend to use when creating ``Database``. Default is the default backend.
+            * *upsert* (bool, default ``False``): Only write new and changed activities to an existing database. Ignored if ``delete_existing``.
 
         Returns:
             ``Database`` instance.
@@ -252,11 +258,20 @@ class LCIImporter(ImportBase):
             error = "The following activities have non-unique codes: {}"
             raise NonuniqueCode(error.format(duplicates))
 
-        data = {(ds["database"], ds["code"]): ds for ds in data}
-
         if db_name in databases:
             # TODO: Raise error if unlinked exchanges?
             db = Database(db_name)
+            if upsert and not delete_existing and db.backend == "sqlite":
+                self.write_database_parameters(activate_parameters, delete_existing)
+                self.upsert_statistics = upsert_database(db, data)
+                if activate_parameters:
+                    self._write_activity_parameters(activity_parameters)
+                print(
+                    u"Updated database: {} ({new} new, {changed} changed, {unchanged} unchanged activities)".format(
+                        db_name, **self.upsert_statistics
+                    )
+                )
+                return db
             if delete_existing:
                 existing = {}
             else:
@@ -272,7 +287,7 @@ class LCIImporter(ImportBase):
 
         self.write_database_parameters(activate_parameters, delete_existing)
 
-        existing.update(data)
+        existing.update({(ds["database"], ds["code"]): ds for ds in data})
         db.write(existing)
 
         if activate_parameters:
@@ -421,25 +436,29 @@ class LCIImporter(ImportBase):
         self.apply_strategy(
             functools.partial(
                 link_iterable_by_fields,
-                other=(
-                    obj
-                    for obj in Database(biosphere_name)
-                    if obj.get("type") == "emission"
-                ),
+                other=biosphere_name,
                 kind="biosphere",
+                other_types={"emission"},
             ),
         )
 
     def migrate(self, migration_name):
-        if migration_name not in migrations:
-            warnings.warn(
-                "Skipping migration {} because it isn't installed.".format(
-                    migration_name
+        """Apply migration ``migration_name`` to datasets and exchanges.
+
+        ``migration_name`` can also be a list of migration names, which are applied in order in a single pass over the data."""
+        names = [migration_name] if isinstance(migration_name, str) else migration_name
+        installed = []
+        for name in names:
+            if name not in migrations:
+                warnings.warn(
+                    "Skipping migration {} because it isn't installed.".format(name)
                 )
+            else:
+                installed.append(name)
+        if installed:
+            self.apply_strategy(
+                functools.partial(migrate_many, migrations=installed)
             )
-        else:
-            self._migrate_datasets(migration_name)
-            self._migrate_exchanges(migration_name)
 
     def drop_unlinked(self, i_am_reckless=False):
         if not i_am_reckless:
@@ -36,12 +36,9 @@ class LCIAImporter(ImportBase):
             functools.partial(normalize_biosphere_names, lcia=True),
             functools.partial(
                 link_iterable_by_fields,
-                other=(
-                    obj
-                    for obj in Database(self.biosphere_name)
-                    if obj.get("type") == "emission"
-                ),
+                other=self.biosphere_name,
                 kind="biosphere",
+                other_types={"emission"},
             ),
             functools.partial(
                 match_subcategories, biosphere_db_name=self.biosphere_name
@@ -40,13 +40,24 @@ class SingleOutputEcospold1Importer(LCIImporter):
     Args:
         * *filepath*: Either a file or directory.
         * *db_name*: Name of database to create.
+        * *use_mp*: Extract files in a pool of worker processes.
+        * *processes*: Number of worker processes. Default is the number of CPUs.
+        * *chunksize*: Number of files sent to a worker at once.
+        * *start_method*: Multiprocessing start method, e.g. ``"spawn"``. Default is the platform default.
 
     """
 
     format = u"Ecospold1"
 
     def __init__(
-        self, filepath, db_name, use_mp=True, extractor=Ecospold1DataExtractor
+        self,
+        filepath,
+        db_name,
+        use_mp=True,
+        extractor=Ecospold1DataExtractor,
+        processes=None,
+        chunksize=None,
+        start_method=None,
     ):
         self.strategies = [
             normalize_units,
@@ -71,7 +82,14 @@ class SingleOutputEcospold1Importer(LCIImporter):
         self.db_name = db_name
         start = time()
         try:
-            self.data = extractor.extract(filepath, db_name, use_mp=use_mp)
+            self.data = extractor.extract(
+                filepath,
+                db_name,
+                use_mp=use_mp,
+                processes=processes,
+                chunksize=chunksize,
+                start_method=start_method,
+            )
         except RuntimeError as e:
             raise MultiprocessingError(
                 "Multiprocessing error; re-run using `use_mp=False`"
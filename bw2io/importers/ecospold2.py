@@ -5,6 +5,7 @@ from bw2data import Database, config
 
 from ..errors import MultiprocessingError
 from ..extractors import Ecospold2DataExtractor
+from ..extractors.cache import get_cache
 from ..strategies import (
     add_cpc_classification_from_single_reference_product,
     assign_single_product_as_activity,
@@ -42,6 +43,11 @@ class SingleOutputEcospold2Importer(LCIImporter):
         extractor=Ecospold2DataExtractor,
         use_mp=True,
         signal=None,
+        engine="objectify",
+        cache=False,
+        processes=None,
+        chunksize=None,
+        start_method=None,
     ):
         self.dirpath = dirpath
         self.db_name = db_name
@@ -73,7 +79,16 @@ class SingleOutputEcospold2Importer(LCIImporter):
 
         start = time()
         try:
-            self.data = extractor.extract(dirpath, db_name, use_mp=use_mp)
+            self.data = extractor.extract(
+                dirpath,
+                db_name,
+                use_mp=use_mp,
+                engine=engine,
+                cache=get_cache(cache),
+                processes=processes,
+                chunksize=chunksize,
+                start_method=start_method,
+            )
         except RuntimeError as e:
             raise MultiprocessingError(
                 "Multiprocessing error; re-run using `use_mp=False`"
@@ -3,9 +3,20 @@ import re
 from copy import deepcopy
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 from bw2data import Database
 from bw2data.backends.iotable import IOTableBackend
 
+from .. import json_codec
+from ..extractors.exiobase import SparseMatrix
+from ..iotable import (
+    concatenate_arrays,
+    map_labels,
+    sparse_arrays,
+    supports_array_exchanges,
+    write_array_exchanges,
+)
 from ..units import UNITS_NORMALIZATION
 
 try:
@@ -69,6 +80,8 @@ class Exiobase3HybridImporter(object):
             # **{(self.db_name, o.pop('id')): o for o in products},
         }
 
+        self.product_to_activities = product_to_activities
+
         # Construct three iterators: production, biosphere, and inputs
 
         def production_iterator():
@@ -84,88 +97,17 @@ class Exiobase3HybridImporter(object):
                 }
 
         def biosphere_iterator():
-            """This is a pain in the butt, as we need to translate from the exiobase world to the ecoinvent flow list. Along the way, we have to deal with:
-
-            1. Multiple EXIOBASE flows map to one ecoinvent flow
-            2. Single EXIOBASE flows map to multiple ecoinvent flow
-            3. Unit conversions and other numeric disaggregations
-            4. Other metadata mappings
-
-            Our strategy, therefore, is to create a dictionary from the EXIOBASE world, namely from ``(name, compartment)`` to a list of ecoinvent biosphere flow keys and disaggregation factors:
-
-            .. code-block:: python
-
-                {('Lead ores', ''): [(('biosphere3', 'fbcb9c7a-eea7-4694-ba6c-568e01d28883'), 1000)]}
-
-            To do this, we first migrate the EXIOBASE data to what ecoinvent expects, and then link with actual ecoinvent keys.
-
-            We operate on the master list of EXIOBASE flows instead of the exchanges.
-
-            """
-            biosphere_mapping = {
-                (flow["name"], tuple(flow["categories"])): ("biosphere3", flow["code"])
-                for flow in Database("biosphere3")
-            }
-            migration_data = {
-                tuple(x): y
-                for x, y in get_migration("exiobase-3-ecoinvent-3.6")["data"]
-            }
-
-            extensions_dict = {
-                (o["name"], o.get("compartment")): o
-                for o in mrio_common_metadata.get_metadata_resource(
-                    self.dirpath, "extensions"
-                )
-            }
-            for dct in extensions_dict.values():
-                dct["amount"] = 1
-                dct["categories"] = dct.get("compartment") or None
-
-            def as_list(obj):
-                if isinstance(obj, list):
-                    return obj
-                else:
-                    return [obj]
-
-            def normalize_categories(dct):
-                if isinstance(dct["categories"], str):
-                    dct["categories"] = (dct["categories"],)
-                else:
-                    dct["categories"] = tuple(dct["categories"])
-                return dct
-
-            def match_ecoinvent(dct):
-                key = (dct["name"], dct["categories"])
-                try:
-                    return (biosphere_mapping[key], dct["amount"])
-                except KeyError:
-                    return None
-
-            extensions_dict = {
-                k: [
-                    normalize_categories(modify_object(deepcopy(v), disaggregated))
-                    for disaggregated in as_list(
-                        migration_data[(v["name"], v["categories"])]
-                    )
-                ]
-                for k, v in extensions_dict.items()
-                if (v["name"], v["categories"]) in migration_data
-            }
-
-            extensions_dict = {
-                k: [match_ecoinvent(elem) for elem in v if match_ecoinvent(elem)]
-                for k, v in extensions_dict.items()
-            }
+            extensions_dict = self.get_biosphere_correspondence()
 
             for i, j, amount in mrio_common_metadata.get_numeric_data_iterator(
                 self.dirpath, "extension-exchanges"
             ):
 
-                for key, scale in extensions_dict.get(
+                for flow, scale in extensions_dict.get(
                     (i["name"], i.get("compartment")), []
                 ):
                     yield {
-                        "input": key,
+                        "input": flow.key,
                         "output": (self.db_name, j["id"]),
                         "type": "biosphere",
                         "amount": amount * scale,
@@ -186,6 +128,195 @@ class Exiobase3HybridImporter(object):
             production_iterator(), biosphere_iterator(), technosphere_iterator()
         )
 
+    def get_biosphere_correspondence(self):
+        """This is a pain in the butt, as we need to translate from the exiobase world to the ecoinvent flow list. Along the way, we have to deal with:
+
+        1. Multiple EXIOBASE flows map to one ecoinvent flow
+        2. Single EXIOBASE flows map to multiple ecoinvent flow
+        3. Unit conversions and other numeric disaggregations
+        4. Other metadata mappings
+
+        Our strategy, therefore, is to create a dictionary from the EXIOBASE world, namely from ``(name, compartment)`` to a list of ecoinvent biosphere flows and disaggregation factors:
+
+        .. code-block:: python
+
+            {('Lead ores', ''): [(Activity('biosphere3', 'fbcb9c7a-eea7-4694-ba6c-568e01d28883'), 1000)]}
+
+        To do this, we first migrate the EXIOBASE data to what ecoinvent expects, and then link with actual ecoinvent flows.
+
+        We operate on the master list of EXIOBASE flows instead of the exchanges.
+
+        """
+        biosphere_mapping = {
+            (flow["name"], tuple(flow["categories"])): flow
+            for flow in Database("biosphere3")
+        }
+        migration_data = {
+            tuple(x): y for x, y in get_migration("exiobase-3-ecoinvent-3.6")["data"]
+        }
+
+        extensions_dict = {
+            (o["name"], o.get("compartment")): o
+            for o in mrio_common_metadata.get_metadata_resource(
+                self.dirpath, "extensions"
+            )
+        }
+        for dct in extensions_dict.values():
+            dct["amount"] = 1
+            dct["categories"] = dct.get("compartment") or None
+
+        def as_list(obj):
+            if isinstance(obj, list):
+                return obj
+            else:
+                return [obj]
+
+        def normalize_categories(dct):
+            if isinstance(dct["categories"], str):
+                dct["categories"] = (dct["categories"],)
+            else:
+                dct["categories"] = tuple(dct["categories"])
+            return dct
+
+        def match_ecoinvent(dct):
+            key = (dct["name"], dct["categories"])
+            try:
+                return (biosphere_mapping[key], dct["amount"])
+            except KeyError:
+                return None
+
+        extensions_dict = {
+            k: [
+                normalize_categories(modify_object(deepcopy(v), disaggregated))
+                for disaggregated in as_list(
+                    migration_data[(v["name"], v["categories"])]
+                )
+            ]
+            for k, v in extensions_dict.items()
+            if (v["name"], v["categories"]) in migration_data
+        }
+
+        return {
+            k: [match_ecoinvent(elem) for elem in v if match_ecoinvent(elem)]
+            for k, v in extensions_dict.items()
+        }
+
+    def get_numeric_data_matrix(self, resource_name):
+        """Read numeric data resource ``resource_name`` into a ``SparseMatrix``.
+
+        Row and column labels are the ids of the referenced metadata, e.g. product or activity ids."""
+        resource = next(
+            obj
+            for obj in json_codec.load(self.dirpath / "datapackage.json")["resources"]
+            if obj["name"] == resource_name
+        )
+        df = pd.read_csv(
+            self.dirpath / resource["path"],
+            header=None,
+            names=["row", "col", "amount"],
+            dtype={"row": str, "col": str, "amount": np.float64},
+            compression="bz2",
+            keep_default_na=False,
+            float_precision="round_trip",
+        )
+        rows, row_labels = pd.factorize(df["row"])
+        cols, col_labels = pd.factorize(df["col"])
+        return SparseMatrix(
+            row_labels.tolist(),
+            col_labels.tolist(),
+            rows.astype(np.int64),
+            cols.astype(np.int64),
+            df["amount"].to_numpy(dtype=np.float64),
+        )
+
+    def production_arrays(self, activity_ids):
+        """Production exchanges as arrays for ``IOTableBackend``.
+
+        Args:
+            * *activity_ids* (dict): ``{activity code: database id}``.
+
+        """
+        matrix = self.get_numeric_data_matrix("production-exchanges")
+        ids = map_labels(matrix.col_labels, activity_ids, matrix.cols)
+        return sparse_arrays(ids, ids, np.where(matrix.values == 0, 1, matrix.values))
+
+    def technosphere_arrays(self, activity_ids):
+        """Technosphere exchanges as arrays for ``IOTableBackend``; product inputs are linked to the activity producing them.
+
+        Args:
+            * *activity_ids* (dict): ``{activity code: database id}``.
+
+        """
+        matrix = self.get_numeric_data_matrix("hiot")
+        product_ids = {
+            product: activity_ids[activity]
+            for product, activity in self.product_to_activities.items()
+        }
+        return sparse_arrays(
+            map_labels(matrix.row_labels, product_ids, matrix.rows),
+            map_labels(matrix.col_labels, activity_ids, matrix.cols),
+            matrix.values,
+            flip=True,
+        )
+
+    def biosphere_arrays(self, activity_ids):
+        """Biosphere exchanges as arrays for ``IOTableBackend``.
+
+        EXIOBASE extensions can correspond to several ecoinvent flows, so each value is repeated once per corresponding flow, and multiplied by its disaggregation factor.
+
+        Args:
+            * *activity_ids* (dict): ``{activity code: database id}``.
+
+        """
+        matrix = self.get_numeric_data_matrix("extension-exchanges")
+        correspondence = self.get_biosphere_correspondence()
+        extensions = {
+            o["id"]: (o["name"], o.get("compartment"))
+            for o in mrio_common_metadata.get_metadata_resource(
+                self.dirpath, "extensions"
+            )
+        }
+        flows = [
+            correspondence.get(extensions[label], []) for label in matrix.row_labels
+        ]
+
+        # Flows for row label ``i`` are ``flow_ids[starts[i]:starts[i] + counts[i]]``
+        counts = np.array([len(lst) for lst in flows], dtype=np.int64)
+        starts = np.cumsum(counts) - counts
+        flow_ids = np.array(
+            [flow.id for lst in flows for flow, _ in lst], dtype=np.int64
+        )
+        scales = np.array(
+            [scale for lst in flows for _, scale in lst], dtype=np.float64
+        )
+
+        # Repeat each value once per flow
+        repeats = counts[matrix.rows]
+        entries = np.repeat(np.arange(len(matrix.rows)), repeats)
+        pairs = starts[matrix.rows][entries] + (
+            np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        )
+
+        return sparse_arrays(
+            flow_ids[pairs],
+            map_labels(matrix.col_labels, activity_ids, matrix.cols)[entries],
+            matrix.values[entries] * scales[pairs],
+        )
+
     def write_database(self):
         mrio = IOTableBackend(self.db_name)
-        mrio.write(self.datasets, self.exchanges)
+        if not supports_array_exchanges():
+            mrio.write(self.datasets, self.exchanges)
+            return
+
+        mrio.write(self.datasets)
+        activity_ids = {obj["code"]: obj.id for obj in mrio}
+        write_array_exchanges(
+            self.db_name,
+            concatenate_arrays(
+                self.production_arrays(activity_ids),
+                self.technosphere_arrays(activity_ids),
+            ),
+            self.biosphere_arrays(activity_ids),
+            ["biosphere3"],
+        )
@@ -1,9 +1,15 @@
-import itertools
-
+import numpy as np
 from bw2data import Database, Method, config, databases, get_activity, methods
 from bw2data.backends.iotable import IOTableBackend
 
 from ..extractors import Exiobase3MonetaryDataExtractor
+from ..extractors.cache import get_array_cache
+from ..iotable import (
+    concatenate_arrays,
+    map_labels,
+    sparse_arrays,
+    write_array_exchanges,
+)
 from ..strategies.exiobase import (
     add_biosphere_ids,
     add_product_ids,
@@ -19,20 +25,31 @@ from .base_lci import LCIImporter
 class Exiobase3MonetaryImporter(LCIImporter):
     format = "Exiobase 3"
 
-    def __init__(self, dirpath, db_name, ignore_small_balancing_corrections=True):
+    def __init__(
+        self,
+        dirpath,
+        db_name,
+        ignore_small_balancing_corrections=True,
+        cache=False,
+    ):
+        """Initialize the importer.
+
+        Args:
+            * *dirpath* (str or Path): EXIOBASE data folder or zip file.
+            * *db_name* (str): Name of database to create.
+            * *ignore_small_balancing_corrections* (bool): Skip values smaller than 1e-15.
+            * *cache*: Cache parsed tables of zip files as memory-mapped arrays. ``True`` to use the default cache directory, a directory path, or an ``ArrayCache``.
+
+        """
         self.strategies = []
         self.dirpath = dirpath
         self.db_name = db_name
-        self.products = Exiobase3MonetaryDataExtractor.get_products(dirpath)
-        self.techosphere_iterator = (
-            Exiobase3MonetaryDataExtractor.get_technosphere_iterator(
-                dirpath, len(self.products), ignore_small_balancing_corrections
-            )
-        )
-        self.flows = Exiobase3MonetaryDataExtractor.get_flows(dirpath)
-        self.biosphere_iterator = Exiobase3MonetaryDataExtractor.get_biosphere_iterator(
-            dirpath, ignore_small_balancing_corrections
+        self.ignore_small_balancing_corrections = ignore_small_balancing_corrections
+        self.cache = get_array_cache(cache)
+        self.products = Exiobase3MonetaryDataExtractor.get_products(
+            dirpath, self.cache
         )
+        self.flows = Exiobase3MonetaryDataExtractor.get_flows(dirpath, self.cache)
         self.biosphere_correspondence = get_exiobase_biosphere_correspondence()
 
     def apply_strategy(self, *args, **kwargs):
@@ -106,6 +123,50 @@ class Exiobase3MonetaryImporter(LCIImporter):
         remove_numeric_codes(self.products)
         add_stam_labels(self.products)
 
+    def technosphere_arrays(self, product_mapping):
+        """Get technosphere matrix values as arrays for ``IOTableBackend``, including production exchanges.
+
+        Args:
+            * *product_mapping* (dict): ``{(name, location): database id}``.
+
+        """
+        matrix = Exiobase3MonetaryDataExtractor.get_technosphere_matrix(
+            self.dirpath, self.ignore_small_balancing_corrections, self.cache
+        )
+        production = np.fromiter(
+            product_mapping.values(), dtype=np.int64, count=len(product_mapping)
+        )
+        return concatenate_arrays(
+            sparse_arrays(
+                map_labels(matrix.row_labels, product_mapping, matrix.rows),
+                map_labels(matrix.col_labels, product_mapping, matrix.cols),
+                matrix.values,
+                flip=True,
+            ),
+            sparse_arrays(production, production, np.ones(len(production))),
+        )
+
+    def biosphere_arrays(self, biosphere_mapping, biosphere_scales, product_mapping):
+        """Get biosphere matrix values as arrays for ``IOTableBackend``.
+
+        Args:
+            * *biosphere_mapping* (dict): ``{exiobase flow name: database id}``.
+            * *biosphere_scales* (dict): ``{exiobase flow name: scale factor}``.
+            * *product_mapping* (dict): ``{(name, location): database id}``.
+
+        """
+        matrix = Exiobase3MonetaryDataExtractor.get_biosphere_matrix(
+            self.dirpath, self.ignore_small_balancing_corrections, self.cache
+        )
+        scales = map_labels(
+            matrix.row_labels, biosphere_scales, matrix.rows, dtype=np.float64
+        )
+        return sparse_arrays(
+            map_labels(matrix.row_labels, biosphere_mapping, matrix.rows),
+            map_labels(matrix.col_labels, product_mapping, matrix.cols),
+            matrix.values * scales,
+        )
+
     def write_database(self, biosphere=None):
         new_biosphere = self.add_unlinked_flows_to_new_biosphere_database()
         main_biosphere = biosphere or config.biosphere
@@ -137,35 +198,11 @@ class Exiobase3MonetaryImporter(LCIImporter):
             if "id" in o
         }
 
-        technosphere = itertools.chain(
-            (
-                {
-                    "row": product_mapping[x],
-                    "col": product_mapping[y],
-                    "amount": z,
-                    "flip": True,
-                    "uncertainty_type": 0,
-                }
-                for x, y, z in self.techosphere_iterator
-            ),
-            (
-                {"row": x, "col": x, "amount": 1, "flip": False, "uncertainty_type": 0}
-                for x in product_mapping.values()
-            ),
-        )
-        biosphere = (
-            {
-                "row": biosphere_mapping[x],
-                "col": product_mapping[y],
-                "amount": z * biosphere_scales[x],
-                "flip": False,
-                "uncertainty_type": 0,
-            }
-            for x, y, z in self.biosphere_iterator
+        technosphere = self.technosphere_arrays(product_mapping)
+        biosphere = self.biosphere_arrays(
+            biosphere_mapping, biosphere_scales, product_mapping
         )
 
         dependents = [new_biosphere, main_biosphere]
 
-        IOTableBackend(self.db_name).write_exchanges(
-            technosphere, biosphere, dependents
-        )
+        write_array_exchanges(self.db_name, technosphere, biosphere, dependents)
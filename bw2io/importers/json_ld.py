@@ -35,8 +35,25 @@ class JSONLDImporter(LCIImporter):
     format = "OLCA JSON-LD"
     extractor = JSONLDExtractor
 
-    def __init__(self, dirpath, database_name, preferred_allocation=None):
-        self.data = self.extractor.extract(dirpath)
+    def __init__(
+        self,
+        dirpath,
+        database_name,
+        preferred_allocation=None,
+        lazy=True,
+        processes=None,
+    ):
+        """Initialize the importer.
+
+        Args:
+            * *dirpath* (str or Path): JSON-LD directory or zip archive.
+            * *database_name* (str): Name of database to create.
+            * *preferred_allocation* (str, optional): Allocation method for multifunctional processes.
+            * *lazy* (bool): Don't load ``processes`` until the first strategy is applied. ``self.data["processes"]`` is then a ``JSONLDFolder``, which parses each file when it is first accessed.
+            * *processes* (int, optional): Number of worker processes used to parse ``processes`` files.
+
+        """
+        self.data = self.extractor.extract(dirpath, lazy=lazy, processes=processes)
         self.db_name = database_name
         self._biosphere_database_warned = False
         self.biosphere_database = self.flows_as_biosphere_database(
@@ -18,7 +18,8 @@ class JSONLDLCIAImporter(LCIAImporter):
     extractor = JSONLDExtractor
 
     def __init__(self, dirpath):
-        self.data = self.extractor.extract(dirpath)
+        # Processes aren't needed, so don't read them
+        self.data = self.extractor.extract(dirpath, lazy=True)
         KEEP = ("lcia_categories", "lcia_methods", "flows")
         for key in list(self.data.keys()):
             if key not in KEEP:
@@ -13,8 +13,8 @@ from ..strategies import (
     fix_zero_allocation_products,
     link_iterable_by_fields,
     link_technosphere_based_on_name_unit_location,
-    migrate_datasets,
     migrate_exchanges,
+    migrate_many,
     normalize_biosphere_categories,
     normalize_biosphere_names,
     normalize_simapro_biosphere_categories,
@@ -42,13 +42,16 @@ class SimaProCSVImporter(LCIImporter):
         normalize_biosphere=True,
         biosphere_db=None,
         extractor=SimaProCSVExtractor,
+        processes=None,
     ):
         start = time()
+        kwargs = {"processes": processes} if processes else {}
         self.data, self.global_parameters, self.metadata = extractor.extract(
             filepath=filepath,
             delimiter=delimiter,
             name=name,
             encoding=encoding,
+            **kwargs
         )
         print(
             u"Extracted {} unallocated datasets in {:.2f} seconds".format(
@@ -69,8 +72,7 @@ class SimaProCSVImporter(LCIImporter):
             fix_zero_allocation_products,
             split_simapro_name_geo,
             strip_biosphere_exc_locations,
-            functools.partial(migrate_datasets, migration="default-units"),
-            functools.partial(migrate_exchanges, migration="default-units"),
+            functools.partial(migrate_many, migrations=["default-units"]),
             functools.partial(set_code_by_activity_hash, overwrite=True),
             link_technosphere_based_on_name_unit_location,
             change_electricity_unit_mj_to_kwh,
@@ -0,0 +1,90 @@
+import bw2data
+import numpy as np
+from bw2data.backends.iotable import IOTableBackend
+from bw_processing import INDICES_DTYPE
+
+
+def supports_array_exchanges():
+    """``IOTableBackend.write_exchanges`` accepts dictionaries of arrays since bw2data 4.0"""
+    version = bw2data.__version__
+    if isinstance(version, str):
+        version = version.split(".")
+    try:
+        return int(version[0]) >= 4
+    except (TypeError, ValueError):
+        return False
+
+
+def sparse_arrays(rows, cols, values, flip=False):
+    """Create the arrays for one block of matrix values.
+
+    Args:
+        * *rows* (array): Row ids, e.g. database ids of products or biosphere flows.
+        * *cols* (array): Column ids, e.g. database ids of activities.
+        * *values* (array): Matrix values.
+        * *flip* (bool or array): Whether each value is consumed and should have its sign flipped in the technosphere matrix.
+
+    Returns:
+        Dictionary with ``indices_array``, ``data_array`` and ``flip_array``, which can be passed to ``bw_processing`` and ``IOTableBackend.write_exchanges``.
+
+    """
+    indices = np.empty(len(rows), dtype=INDICES_DTYPE)
+    indices["row"] = rows
+    indices["col"] = cols
+    if np.isscalar(flip):
+        flip = np.full(len(rows), flip, dtype=bool)
+    return {
+        "indices_array": indices,
+        "data_array": np.asarray(values, dtype=np.float64),
+        "flip_array": np.asarray(flip, dtype=bool),
+    }
+
+
+def concatenate_arrays(*arrays):
+    """Combine several dictionaries from ``sparse_arrays``"""
+    return {key: np.concatenate([obj[key] for obj in arrays]) for key in arrays[0]}
+
+
+def map_labels(labels, mapping, indices, dtype=np.int64):
+    """Look up ``mapping[labels[i]]`` for each ``i`` in the array ``indices``.
+
+    Each distinct label is only looked up once; raises ``KeyError`` if a label used in ``indices`` is missing from ``mapping``."""
+    used, inverse = np.unique(indices, return_inverse=True)
+    values = np.array([mapping[labels[i]] for i in used.tolist()], dtype=dtype)
+    return values[inverse]
+
+
+def iterate_arrays(arrays):
+    """Iterate over ``sparse_arrays`` as exchange dictionaries, for older versions of bw2data"""
+    indices = arrays["indices_array"]
+    for row, col, amount, flip in zip(
+        indices["row"].tolist(),
+        indices["col"].tolist(),
+        arrays["data_array"].tolist(),
+        arrays["flip_array"].tolist(),
+    ):
+        yield {
+            "row": row,
+            "col": col,
+            "amount": amount,
+            "flip": flip,
+            "uncertainty_type": 0,
+        }
+
+
+def write_array_exchanges(db_name, technosphere, biosphere, dependents):
+    """Write ``technosphere`` and ``biosphere`` arrays to the processed datapackage of ``IOTableBackend`` database ``db_name``.
+
+    The arrays are passed to the backend as is, without creating a dictionary for each exchange.
+
+    Args:
+        * *db_name* (str): Name of existing ``iotable`` database.
+        * *technosphere* (dict): Technosphere arrays from ``sparse_arrays``.
+        * *biosphere* (dict): Biosphere arrays from ``sparse_arrays``.
+        * *dependents* (list): Names of databases linked to.
+
+    """
+    if not supports_array_exchanges():
+        technosphere = iterate_arrays(technosphere)
+        biosphere = iterate_arrays(biosphere)
+    IOTableBackend(db_name).write_exchanges(technosphere, biosphere, dependents)
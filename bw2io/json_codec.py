@@ -0,0 +1,157 @@
+"""Read and write JSON with the fastest available library.
+
+All JSON in ``bw2io`` is read and written with the functions in this module. They use `orjson <https://github.com/ijl/orjson>`__ for reading and writing, or `pysimdjson <https://github.com/TkTech/pysimdjson>`__ for reading, if installed, and the standard library ``json`` otherwise. The results are the same for every backend:
+
+* Invalid JSON for the fast libraries, like ``NaN`` and ``Infinity``, or a byte order mark, is read by the standard library.
+* Data the fast libraries can't write, like very large integers, or ``NaN`` and infinite floats, which ``orjson`` would write as ``null``, is written by the standard library.
+* NumPy arrays and scalars aren't supported by every backend, so they are never written; convert them with ``tolist()`` first.
+
+One difference remains: ``orjson`` reads integers larger than 64 bits as floats.
+
+Use ``set_backend`` to choose a backend explicitly, e.g. for benchmarking.
+
+"""
+import json
+import marshal
+import os
+import re
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# In order of preference
+BACKENDS = ("orjson", "simdjson", "json")
+
+_available = {
+    "orjson": orjson is not None,
+    "simdjson": simdjson is not None,
+    "json": True,
+}
+_backend = next(name for name in BACKENDS if _available[name])
+
+
+def available_backends():
+    """Return list of installed backends, fastest first"""
+    return [name for name in BACKENDS if _available[name]]
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(name=None):
+    """Use backend ``name``, one of ``BACKENDS``. Default is the fastest installed backend."""
+    global _backend
+    if name is None:
+        name = available_backends()[0]
+    if name not in BACKENDS:
+        raise ValueError(
+            "Unknown JSON backend {}; must be one of {}".format(name, BACKENDS)
+        )
+    if not _available[name]:
+        raise ImportError("JSON backend {} is not installed".format(name))
+    _backend = name
+
+
+def loads(data):
+    """Parse JSON string or bytes ``data``"""
+    if _backend == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    elif _backend == "simdjson":
+        try:
+            return simdjson.loads(data)
+        except ValueError:
+            pass
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def load(file):
+    """Parse JSON from ``file``, a filepath or a file-like object opened in binary or text mode"""
+    if hasattr(file, "read"):
+        return loads(file.read())
+    with open(file, "rb") as f:
+        return loads(f.read())
+
+
+def _orjson_options(indent):
+    options = orjson.OPT_NON_STR_KEYS
+    if indent:
+        options |= orjson.OPT_INDENT_2
+    return options
+
+
+# Non-finite floats in ``marshal`` data: the float type code, with or without
+# the reference flag, and eight little-endian bytes with all exponent bits set
+MARSHAL_NON_FINITE = re.compile(rb"[g\xe7][\s\S]{6}[\xf0-\xff][\x7f\xff]")
+
+
+def _has_non_finite(obj):
+    """Return ``True`` if ``obj`` contains ``NaN`` or infinite floats.
+
+    ``marshal`` walks built-in types in C, and writes floats as eight bytes, so searching its output is much faster than walking ``obj`` in Python. Other bytes, like those of strings, can also match; this only means that ``obj`` is written by the standard library. Objects which ``marshal`` can't write, like subclasses of ``dict``, are walked in Python."""
+    try:
+        return MARSHAL_NON_FINITE.search(marshal.dumps(obj)) is not None
+    except ValueError:
+        return _walk_non_finite(obj)
+
+
+def _walk_non_finite(obj):
+    stack = [obj]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        value = pop()
+        if isinstance(value, float):
+            # Only ``NaN`` and infinite floats don't give zero
+            if value - value != 0:
+                return True
+        elif isinstance(value, dict):
+            extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            extend(value)
+    return False
+
+
+def encode(obj, indent=None):
+    """Serialize ``obj`` to UTF-8 encoded JSON bytes.
+
+    Non-ASCII characters are written as is, not escaped. ``indent`` is ``None`` or a number of spaces; ``orjson`` only supports indenting by two spaces."""
+    if _backend == "orjson" and indent in (None, 2):
+        try:
+            data = orjson.dumps(obj, option=_orjson_options(indent))
+        except TypeError:
+            pass
+        else:
+            # ``orjson`` writes ``NaN`` and infinite floats as ``null``, like
+            # ``None``; if there is a ``null``, check which one it was
+            if b"null" not in data or not _has_non_finite(obj):
+                return data
+    return json.dumps(obj, indent=indent, ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj, indent=None):
+    """Serialize ``obj`` to a JSON string. See ``encode``."""
+    return encode(obj, indent).decode("utf-8")
+
+
+def dump(obj, filepath, indent=None):
+    """Write ``obj`` as UTF-8 encoded JSON to ``filepath``.
+
+    The file is first written to a temporary file, and then moved, so readers never see partial data."""
+    filepath = Path(filepath)
+    tmp = filepath.with_name(filepath.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(encode(obj, indent))
+    os.replace(tmp, filepath)
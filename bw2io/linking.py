@@ -0,0 +1,117 @@
+import pprint
+
+from bw2data import Database, databases, projects
+
+from .errors import StrategyError
+from .utils import DEFAULT_FIELDS, activity_key
+
+
+def format_nonunique_key_error(obj, fields, others):
+    template = """Object in source database can't be uniquely linked to target database.\nProblematic dataset is:\n{ds}\nPossible targets include (at least one not shown):\n{targets}"""
+    fields_to_print = list(fields or DEFAULT_FIELDS) + ["filename"]
+    _ = lambda x: {field: x.get(field, "(missing)") for field in fields_to_print}
+    return template.format(
+        ds=pprint.pformat(_(obj)), targets=pprint.pformat([_(x) for x in others])
+    )
+
+
+class LinkIndex:
+    """Lookup table from the normalized values of ``fields`` to ``(database, code)`` keys.
+
+    Build once, and then link any number of exchanges with one dictionary lookup each. Keys are the tuples returned by ``activity_key``, so matching follows the same rules as ``activity_hash`` (case-insensitive, missing fields are empty strings), without computing any hashes.
+
+    Use ``LinkIndex.for_database`` to get an index for a ``Database``; these are cached and rebuilt only when the database is modified.
+
+    Args:
+        * *iterable*: Datasets to link to. Each must have ``database`` and ``code``.
+        * *fields* (list): Fields to match on. Default is ``DEFAULT_FIELDS``.
+
+    """
+
+    _cache = {}
+
+    def __init__(self, iterable=(), fields=None):
+        self.fields = tuple(fields or DEFAULT_FIELDS)
+        self.candidates, self.duplicates = {}, {}
+        self.source = None
+        self.extend(iterable)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __repr__(self):
+        return "LinkIndex on {} with {} candidates".format(self.fields, len(self))
+
+    def key(self, obj):
+        return activity_key(obj, self.fields)
+
+    def extend(self, iterable):
+        try:
+            # Iterable can be a generator, so a bit convoluted
+            for ds in iterable:
+                key = activity_key(ds, self.fields)
+                if key in self.candidates:
+                    self.duplicates.setdefault(key, []).append(ds)
+                else:
+                    self.candidates[key] = (ds["database"], ds["code"])
+        except KeyError:
+            raise StrategyError(
+                "Not all datasets in database to be linked have "
+                "``database`` or ``code`` attributes"
+            )
+
+    def get(self, obj):
+        """Return the ``(database, code)`` key matching ``obj``, or ``None``.
+
+        Raises ``StrategyError`` if more than one candidate matches."""
+        key = activity_key(obj, self.fields)
+        if key in self.duplicates:
+            raise StrategyError(
+                format_nonunique_key_error(obj, self.fields, self.duplicates[key])
+            )
+        return self.candidates.get(key)
+
+    @classmethod
+    def for_database(cls, name, fields=None, types=None):
+        """Get the index for database ``name``, building it if needed.
+
+        If ``types`` is given, only include datasets whose ``type`` is in ``types``. Datasets without a ``type`` are processes.
+
+        Indices are cached per project, database, ``fields`` and ``types``, and are thrown away when the database ``modified`` timestamp changes."""
+        if name not in databases:
+            raise StrategyError("Can't find external database {}".format(name))
+        fields = tuple(fields or DEFAULT_FIELDS)
+        types = frozenset([types] if isinstance(types, str) else types or [])
+        cache_key = (projects.current, name, fields, types)
+        modified = databases[name].get("modified")
+
+        try:
+            timestamp, index = cls._cache[cache_key]
+            if timestamp == modified:
+                return index
+        except KeyError:
+            pass
+
+        index = cls(
+            (
+                obj
+                for obj in Database(name)
+                if not types or obj.get("type", "process") in types
+            ),
+            fields=fields,
+        )
+        index.source = (name, fields, types)
+        cls._cache[cache_key] = (modified, index)
+        return index
+
+    def current(self):
+        """Return an up-to-date index.
+
+        Indices from ``for_database`` are looked up again, so that changes to the database since this index was created are included. Other indices are returned unchanged."""
+        if self.source is None:
+            return self
+        return self.for_database(*self.source)
+
+    @classmethod
+    def clear_cache(cls):
+        cls._cache.clear()
@@ -1,9 +1,11 @@
 import os
+import pickle
 
 from bw2data import projects
 from bw2data.data_store import DataStore
-from bw2data.serialization import JsonWrapper, SerializedDict
+from bw2data.serialization import SerializedDict
 
+from . import json_codec
 from .data import (
     get_biosphere_2_3_category_migration_data,
     get_biosphere_2_3_name_migration_data,
@@ -14,6 +16,10 @@ from .data import (
     get_us_lci_migration_data,
 )
 from .units import get_default_units_migration_data, get_unusual_units_migration_data
+from .utils import activity_key
+
+# Increment when the structure of ``CompiledMigration`` changes
+COMPILED_FORMAT = 1
 
 
 class _Migrations(SerializedDict):
@@ -23,8 +29,31 @@ class _Migrations(SerializedDict):
 migrations = _Migrations()
 
 
+class CompiledMigration(object):
+    """Lookup table from the ``activity_key`` of the migration ``fields`` to the new data.
+
+    Built by ``Migration.compile``."""
+
+    def __init__(self, fields, data):
+        self.fields = tuple(fields)
+        # Later entries with the same lookup values replace earlier entries
+        self.mapping = {
+            activity_key(dict(zip(self.fields, old)), self.fields): new
+            for old, new in data
+        }
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def get(self, obj):
+        """Return the new data for ``obj``, or ``None`` if it isn't migrated"""
+        return self.mapping.get(activity_key(obj, self.fields))
+
+
 class Migration(DataStore):
     _metadata = migrations
+    # Compiled migrations already loaded in this process, by filepath
+    _compiled = {}
 
     def __init__(self, *args, **kwargs):
         super(Migration, self).__init__(*args, **kwargs)
@@ -34,6 +63,14 @@ class Migration(DataStore):
     def description(self):
         return self.metadata["description"]
 
+    @property
+    def filepath(self):
+        return os.path.join(self._intermediate_dir, self.filename + ".json")
+
+    @property
+    def compiled_filepath(self):
+        return os.path.join(self._intermediate_dir, self.filename + ".compiled.pickle")
+
     def validate(self, *args, **kwargs):
         return
 
@@ -44,63 +81,108 @@ class Migration(DataStore):
             migrations[self.name]["description"] = description
         except:
             self.register(description=description)
-        filepath = os.path.join(self._intermediate_dir, self.filename + ".json")
-        JsonWrapper.dump(data, filepath)
+        self._compiled.pop(self.filepath, None)
+        if os.path.exists(self.compiled_filepath):
+            os.remove(self.compiled_filepath)
+        json_codec.dump(data, self.filepath, indent=2)
 
     def load(self):
         self.register()
-        filepath = os.path.join(self._intermediate_dir, self.filename + ".json")
-        return JsonWrapper.load(filepath)
-
-
-def create_core_migrations():
-    """Add pre-defined core migrations data files"""
-    Migration("biosphere-2-3-categories").write(
-        get_biosphere_2_3_category_migration_data(),
-        "Change biosphere category and subcategory labels to ecoinvent version 3",
-    )
-    Migration("biosphere-2-3-names").write(
-        get_biosphere_2_3_name_migration_data(),
-        "Change biosphere flow names to ecoinvent version 3",
-    )
-    Migration("simapro-ecoinvent-3.1").write(
-        get_simapro_ecoinvent_3_migration_data("3.1"),
-        "Change SimaPro names from ecoinvent 3.1 to ecoinvent names",
-    )
-    Migration("simapro-ecoinvent-3.2").write(
-        get_simapro_ecoinvent_3_migration_data("3.2"),
-        "Change SimaPro names from ecoinvent 3.2 to ecoinvent names",
-    )
-    Migration("simapro-ecoinvent-3.3").write(
-        get_simapro_ecoinvent_3_migration_data("3.3"),
-        "Change SimaPro names from ecoinvent 3.3 to ecoinvent names",
-    )
-    Migration("simapro-ecoinvent-3.4").write(
-        get_simapro_ecoinvent_3_migration_data("3.4"),
-        "Change SimaPro names from ecoinvent 3.4 to ecoinvent names",
-    )
-    Migration("simapro-ecoinvent-3.5").write(
-        get_simapro_ecoinvent_3_migration_data("3.5"),
-        "Change SimaPro names from ecoinvent 3.5 to ecoinvent names",
-    )
-    Migration("simapro-water").write(
-        get_simapro_water_migration_data(),
-        "Change SimaPro water flows to more standard names",
-    )
-    Migration("us-lci").write(
-        get_us_lci_migration_data(), "Fix names in US LCI database"
-    )
-    Migration("default-units").write(
-        get_default_units_migration_data(), "Convert to default units"
-    )
-    Migration("unusual-units").write(
-        get_unusual_units_migration_data(), "Convert non-Ecoinvent units"
-    )
-    Migration("exiobase-biosphere").write(
-        get_exiobase_biosphere_migration_data(),
-        "Change biosphere flow names to ecoinvent version 3",
-    )
-    Migration("fix-ecoinvent-flows-pre-35").write(
-        get_ecoinvent_pre35_migration_data(),
-        "Update new biosphere UUIDs in Consequential 3.4",
-    )
+        return json_codec.load(self.filepath)
+
+    def compile(self):
+        """Return a ``CompiledMigration`` for this migration.
+
+        The compiled lookup table is built once, and stored next to the JSON data file, so that later calls (in this or other processes) don't need to parse the JSON again. It is rebuilt if the JSON file changes."""
+        stat = os.stat(self.filepath)
+        stamp = (COMPILED_FORMAT, stat.st_size, stat.st_mtime_ns)
+
+        try:
+            cached_stamp, compiled = self._compiled[self.filepath]
+            if cached_stamp == stamp:
+                return compiled
+        except KeyError:
+            pass
+
+        try:
+            with open(self.compiled_filepath, "rb") as f:
+                cached_stamp, compiled = pickle.load(f)
+        except Exception:
+            # Missing, corrupt, or written by another version of ``bw2io``
+            cached_stamp = None
+
+        if cached_stamp != stamp:
+            data = self.load()
+            compiled = CompiledMigration(data["fields"], data["data"])
+            tmp = self.compiled_filepath + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump((stamp, compiled), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.compiled_filepath)
+
+        self._compiled[self.filepath] = (stamp, compiled)
+        return compiled
+
+
+def get_core_migrations_data():
+    """Return the data of the pre-defined core migrations.
+
+    Returns:
+        List of ``(name, description, data)`` tuples.
+
+    """
+    return [
+        (
+            "biosphere-2-3-categories",
+            "Change biosphere category and subcategory labels to ecoinvent version 3",
+            get_biosphere_2_3_category_migration_data(),
+        ),
+        (
+            "biosphere-2-3-names",
+            "Change biosphere flow names to ecoinvent version 3",
+            get_biosphere_2_3_name_migration_data(),
+        ),
+    ] + [
+        (
+            "simapro-ecoinvent-{}".format(version),
+            "Change SimaPro names from ecoinvent {} to ecoinvent names".format(version),
+            get_simapro_ecoinvent_3_migration_data(version),
+        )
+        for version in ("3.1", "3.2", "3.3", "3.4", "3.5")
+    ] + [
+        (
+            "simapro-water",
+            "Change SimaPro water flows to more standard names",
+            get_simapro_water_migration_data(),
+        ),
+        ("us-lci", "Fix names in US LCI database", get_us_lci_migration_data()),
+        (
+            "default-units",
+            "Convert to default units",
+            get_default_units_migration_data(),
+        ),
+        (
+            "unusual-units",
+            "Convert non-Ecoinvent units",
+            get_unusual_units_migration_data(),
+        ),
+        (
+            "exiobase-biosphere",
+            "Change biosphere flow names to ecoinvent version 3",
+            get_exiobase_biosphere_migration_data(),
+        ),
+        (
+            "fix-ecoinvent-flows-pre-35",
+            "Update new biosphere UUIDs in Consequential 3.4",
+            get_ecoinvent_pre35_migration_data(),
+        ),
+    ]
+
+
+def create_core_migrations(data=None):
+    """Add pre-defined core migrations data files.
+
+    ``data`` is a list of ``(name, description, data)`` tuples; default is ``get_core_migrations_data()``."""
+    if data is None:
+        data = get_core_migrations_data()
+    for name, description, migration_data in data:
+        Migration(name).write(migration_data, description)
@@ -1,21 +1,91 @@
+import bz2
+import itertools
+import multiprocessing
 import os
 import warnings
+import zipfile
 from time import time
 
 from bw2data import projects
 from bw2data.logs import get_logger
-from bw2data.serialization import JsonSanitizer, JsonWrapper
+from bw2data.serialization import JsonSanitizer
 from bw2data.utils import download_file
 from bw_processing import safe_filename
 from voluptuous import Invalid
 
+from . import json_codec
 from .errors import InvalidPackage, UnsafeData
+from .parallel import can_use_mp, imap_ordered
 from .validation import bw2package_validator
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Version of the chunked package format. Version 1 is a single bzip2-compressed
+# JSON document, and has no manifest.
+PACKAGE_FORMAT = 2
+# Format 2 can't be read by bw2io 0.9.DEV14 and earlier, so it is opt-in
+DEFAULT_PACKAGE_FORMAT = 1
+# Number of data items, e.g. activities or characterization factors, per chunk
+CHUNK_SIZE = 1000
+COMPRESSION_EXTENSIONS = {"bz2": "bz2", "zstd": "zst"}
+
+
+def _compress(payload, compression):
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(payload)
+    return bz2.compress(payload)
+
+
+def _decompress(payload, compression):
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return bz2.decompress(payload)
+
+
+def _encode_chunk(items, compression):
+    return _compress(
+        b"".join(
+            json_codec.encode(JsonSanitizer.sanitize(item)) + b"\n" for item in items
+        ),
+        compression,
+    )
+
+
+def _decode_chunk(payload, compression):
+    return [
+        JsonSanitizer.load(json_codec.loads(line))
+        for line in _decompress(payload, compression).splitlines()
+    ]
+
+
+_worker_state = {}
+
+
+def _open_archive(filepath):
+    _worker_state["archive"] = zipfile.ZipFile(filepath)
+
+
+def _decode_member(member, compression):
+    return _decode_chunk(_worker_state["archive"].read(member), compression)
+
+
+def _map_chunks(func, chunks, compression, processes):
+    """Apply ``func(chunk, compression)`` to each chunk, in a process pool if there is more than one chunk"""
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes > 1 and len(chunks) > 1 and can_use_mp():
+        return imap_ordered(func, chunks, args=(compression,), processes=processes)
+    return (func(chunk, compression) for chunk in chunks)
+
 
 class BW2Package(object):
     """This is a format for saving objects which implement the :ref:`datastore` API. Data is stored as a BZip2-compressed file of JSON data. This archive format is compatible across Python versions, and is, at least in theory, programming-language agnostic.
 
+    Since format version 2, a package can be a zip archive. The data of each object is split into chunks of ``CHUNK_SIZE`` items (datasets or characterization factors), and each chunk is stored as a separate member of compressed JSON lines. ``manifest.json`` lists the objects, with everything but their data, and the chunks of each object. Chunks are compressed and parsed in parallel, and objects are imported one at a time. Packages are still written in format 1, a single compressed JSON document, by default, as older versions of ``bw2io`` can't read format 2.
+
     Validation is done with ``bw2data.validate.bw2package_validator``.
 
     The data format is:
@@ -122,17 +192,86 @@ class BW2Package(object):
 
     @classmethod
     def _write_file(cls, filepath, data):
-        JsonWrapper.dump_bz2(JsonSanitizer.sanitize(data), filepath)
+        payload = json_codec.encode(JsonSanitizer.sanitize(data))
+        tmp = filepath + ".tmp"
+        with bz2.BZ2File(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, filepath)
+
+    @classmethod
+    def _write_chunked_file(
+        cls,
+        filepath,
+        objs,
+        backwards_compatible=False,
+        compression="bz2",
+        chunk_size=CHUNK_SIZE,
+        processes=None,
+    ):
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError("Unknown compression {}".format(compression))
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the `zstandard` library")
+
+        manifest = {"format": PACKAGE_FORMAT, "compression": compression, "objects": []}
+        tmp = filepath + ".tmp"
+        # Chunks are already compressed
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_STORED) as archive:
+            for index, obj in enumerate(objs):
+                ds = cls._prepare_obj(obj, backwards_compatible)
+                data = ds.pop("data")
+                if isinstance(data, dict):
+                    kind, items = "dict", [[key, value] for key, value in data.items()]
+                elif isinstance(data, list):
+                    kind, items = "list", data
+                else:
+                    kind, items = "object", [data]
+                del data
+
+                chunks = [
+                    items[i : i + chunk_size] for i in range(0, len(items), chunk_size)
+                ]
+                members = []
+                for number, payload in enumerate(
+                    _map_chunks(_encode_chunk, chunks, compression, processes)
+                ):
+                    member = "objects/{}/{:06d}.jsonl.{}".format(
+                        index, number, COMPRESSION_EXTENSIONS[compression]
+                    )
+                    archive.writestr(member, payload)
+                    members.append(member)
+
+                ds["metadata"] = JsonSanitizer.sanitize(ds["metadata"])
+                ds["name"] = JsonSanitizer.sanitize(ds["name"])
+                ds["data type"] = kind
+                ds["chunks"] = members
+                manifest["objects"].append(ds)
+            archive.writestr("manifest.json", json_codec.encode(manifest, indent=2))
+        os.replace(tmp, filepath)
 
     @classmethod
-    def export_objs(cls, objs, filename, folder="export", backwards_compatible=False):
+    def export_objs(
+        cls,
+        objs,
+        filename,
+        folder="export",
+        backwards_compatible=False,
+        package_format=DEFAULT_PACKAGE_FORMAT,
+        compression="bz2",
+        chunk_size=CHUNK_SIZE,
+        processes=None,
+    ):
         """Export a list of objects. Can have heterogeneous types.
 
         Args:
             * *objs* (list): List of objects to export.
             * *filename* (str): Name of file to create.
             * *folder* (str, optional): Folder to create file in. Default is ``export``.
-            * *backwards_compatible* (bool, optional): Create package compatible with bw2data version 1.
+            * *backwards_compatible* (bool, optional): Create package compatible with bw2data version 1. Always uses package format 1.
+            * *package_format* (int, optional): Package format version, 1 or 2. Default is 1. Format 2 is faster to write and read, but can only be read by ``bw2io`` 0.9.DEV15 and later.
+            * *compression* (str, optional): Compression of data chunks in format 2, ``bz2`` or ``zstd``. ``zstd`` is much faster, but requires the ``zstandard`` library to read and write. Default is ``bz2``.
+            * *chunk_size* (int, optional): Number of data items per chunk in format 2.
+            * *processes* (int, optional): Number of processes used to compress chunks in format 2. Default is the number of CPUs.
 
         Returns:
             Filepath of created file.
@@ -141,14 +280,21 @@ class BW2Package(object):
         filepath = os.path.join(
             projects.request_directory(folder), safe_filename(filename) + u".bw2package"
         )
-        cls._write_file(
-            filepath, [cls._prepare_obj(o, backwards_compatible) for o in objs]
-        )
+        if package_format not in (1, PACKAGE_FORMAT):
+            raise ValueError("Unknown package format {}".format(package_format))
+        if backwards_compatible or package_format == 1:
+            cls._write_file(
+                filepath, [cls._prepare_obj(o, backwards_compatible) for o in objs]
+            )
+        else:
+            cls._write_chunked_file(
+                filepath, objs, backwards_compatible, compression, chunk_size, processes
+            )
         return filepath
 
     @classmethod
     def export_obj(
-        cls, obj, filename=None, folder="export", backwards_compatible=False
+        cls, obj, filename=None, folder="export", backwards_compatible=False, **kwargs
     ):
         """Export an object.
 
@@ -158,44 +304,124 @@ class BW2Package(object):
             * *folder* (str, optional): Folder to create file in. Default is ``export``.
             * *backwards_compatible* (bool, optional): Create package compatible with bw2data version 1.
 
+        Other keyword arguments are passed to ``export_objs``.
+
         Returns:
             Filepath of created file.
 
         """
         if filename is None:
             filename = obj.filename
-        return cls.export_objs([obj], filename, folder, backwards_compatible)
+        return cls.export_objs([obj], filename, folder, backwards_compatible, **kwargs)
+
+    @classmethod
+    def _iterate_chunked_file(cls, filepath, whitelist=True, processes=None):
+        """Load the objects in a format 2 package one at a time.
+
+        The class and metadata of all objects are validated before any data is read. Chunks are read from the archive and parsed one at a time, or by the workers of a process pool, which open the archive themselves."""
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        with zipfile.ZipFile(filepath) as archive:
+            try:
+                manifest = json_codec.loads(archive.read("manifest.json"))
+            except (KeyError, ValueError):
+                raise InvalidPackage("Can't read package manifest")
+            if manifest.get("format") != PACKAGE_FORMAT:
+                raise InvalidPackage(
+                    "Unsupported package format {}".format(manifest.get("format"))
+                )
+            compression = manifest["compression"]
+            if compression == "zstd" and zstandard is None:
+                raise ImportError("This package requires the `zstandard` library")
+
+            members = set(archive.namelist())
+            objs = []
+            for header in manifest["objects"]:
+                if header.get("data type") not in ("dict", "list", "object"):
+                    raise InvalidPackage(
+                        "Unknown data type {}".format(header.get("data type"))
+                    )
+                if not members.issuperset(header["chunks"]):
+                    raise InvalidPackage("Missing data chunks in package")
+                obj = cls._load_obj(
+                    {
+                        "metadata": JsonSanitizer.load(header["metadata"]),
+                        "name": JsonSanitizer.load(header["name"]),
+                        "class": header["class"],
+                        "data": None,
+                    },
+                    whitelist,
+                )
+                objs.append((obj, header))
+
+            for obj, header in objs:
+                if processes > 1 and len(header["chunks"]) > 1 and can_use_mp():
+                    chunks = imap_ordered(
+                        _decode_member,
+                        header["chunks"],
+                        args=(compression,),
+                        processes=processes,
+                        initializer=_open_archive,
+                        initargs=(filepath,),
+                    )
+                else:
+                    chunks = (
+                        _decode_chunk(archive.read(member), compression)
+                        for member in header["chunks"]
+                    )
+                items = itertools.chain.from_iterable(chunks)
+                if header["data type"] == "dict":
+                    obj["data"] = dict(items)
+                elif header["data type"] == "list":
+                    obj["data"] = list(items)
+                else:
+                    obj["data"] = next(items)
+                yield obj
 
     @classmethod
-    def load_file(cls, filepath, whitelist=True):
+    def load_file(cls, filepath, whitelist=True, processes=None):
         """Load a bw2package file with one or more objects. Does not create new objects.
 
         Args:
             * *filepath* (str): Path of file to import
             * *whitelist* (bool): Apply whitelist of approved classes to allowed types. Default is ``True``.
+            * *processes* (int, optional): Number of processes used to parse chunks of format 2 packages. Default is the number of CPUs.
 
         Returns the loaded data in the bw2package dict data format, with the following changes:
             * ``"class"`` is an actual Python class object (but not instantiated).
 
         """
-        raw_data = JsonSanitizer.load(JsonWrapper.load_bz2(filepath))
+        if zipfile.is_zipfile(filepath):
+            return list(cls._iterate_chunked_file(filepath, whitelist, processes))
+        with bz2.BZ2File(filepath) as f:
+            raw_data = JsonSanitizer.load(json_codec.loads(f.read()))
         if isinstance(raw_data, dict):
             return cls._load_obj(raw_data, whitelist)
         else:
             return [cls._load_obj(o, whitelist) for o in raw_data]
 
     @classmethod
-    def import_file(cls, filepath, whitelist=True):
+    def import_file(cls, filepath, whitelist=True, processes=None):
         """Import bw2package file, and create the loaded objects, including registering, writing, and processing the created objects.
 
+        Objects in format 2 packages are loaded and written one at a time, after all of them have been validated.
+
         Args:
             * *filepath* (str): Path of file to import
             * *whitelist* (bool): Apply whitelist to allowed types. Default is ``True``.
+            * *processes* (int, optional): Number of processes used to parse chunks of format 2 packages. Default is the number of CPUs.
 
         Returns:
             Created object or list of created objects.
 
         """
+        if zipfile.is_zipfile(filepath):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                return [
+                    cls._create_obj(obj)
+                    for obj in cls._iterate_chunked_file(filepath, whitelist, processes)
+                ]
         loaded = cls.load_file(filepath, whitelist)
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
@@ -0,0 +1,79 @@
+import multiprocessing
+from functools import partial
+
+# Upper limit on the number of items sent to a worker in one batch; keeps
+# results flowing back while still amortizing the pickling overhead
+MAX_CHUNKSIZE = 64
+
+
+def can_use_mp():
+    """Check if we can start a process pool from the current process.
+
+    Pool workers are daemonic, and daemonic processes can't have children."""
+    return not multiprocessing.current_process().daemon
+
+
+def default_chunksize(num_items, processes):
+    """Give each worker about four chunks, with at most ``MAX_CHUNKSIZE`` items per chunk"""
+    return max(1, min(MAX_CHUNKSIZE, num_items // (processes * 4)))
+
+
+def _apply_indexed(func, args, item):
+    index, obj = item
+    return index, func(obj, *args)
+
+
+def imap_ordered(
+    func,
+    iterable,
+    args=(),
+    processes=None,
+    chunksize=None,
+    start_method=None,
+    initializer=None,
+    initargs=(),
+):
+    """Apply ``func(obj, *args)`` to each ``obj`` in ``iterable`` in a process pool.
+
+    Items are sent to the workers in chunks with ``imap_unordered``, but results
+    are yielded in the order of ``iterable``, as soon as all preceding results are
+    available. If the returned generator is closed before it is exhausted, the
+    worker processes are terminated.
+
+    ``func`` and ``args`` are pickled and sent to the workers, so ``func`` must be
+    importable (a module-level function or a method of a module-level class),
+    which also makes this work with the ``spawn`` and ``forkserver`` start methods.
+
+    Args:
+        * *func*: Function to apply.
+        * *iterable*: Items to process.
+        * *args*: Additional positional arguments for ``func``.
+        * *processes*: Number of worker processes. Default is the number of CPUs.
+        * *chunksize*: Number of items per batch. Default from ``default_chunksize``.
+        * *start_method*: Multiprocessing start method, e.g. ``"spawn"``. Default is the platform default.
+        * *initializer*: Called as ``initializer(*initargs)`` once in each worker when it starts. Use this to send large shared data to each worker once, instead of with every chunk.
+        * *initargs*: Arguments for ``initializer``.
+
+    """
+    items = list(iterable)
+    if not items:
+        return
+    processes = min(processes or multiprocessing.cpu_count(), len(items))
+    if chunksize is None:
+        chunksize = default_chunksize(len(items), processes)
+
+    context = multiprocessing.get_context(start_method)
+    pool = context.Pool(processes=processes, initializer=initializer, initargs=initargs)
+    try:
+        finished, position = {}, 0
+        for index, result in pool.imap_unordered(
+            partial(_apply_indexed, func, args), enumerate(items), chunksize=chunksize
+        ):
+            finished[index] = result
+            while position in finished:
+                yield finished.pop(position)
+                position += 1
+    finally:
+        # Also runs on ``GeneratorExit`` when the caller stops iterating early
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,215 @@
+import csv
+import pickle
+import tracemalloc
+from hashlib import blake2b
+from time import perf_counter, process_time
+
+from . import json_codec
+
+FIELDS = [
+    "strategy",
+    "wall time",
+    "cpu time",
+    "memory peak",
+    "datasets",
+    "datasets added",
+    "datasets removed",
+    "datasets changed",
+    "exchanges",
+    "exchanges added",
+    "exchanges removed",
+    "exchanges changed",
+    "error",
+]
+
+strategy_hooks = []
+
+
+def add_strategy_hook(hook):
+    """Call ``hook(importer, record)`` each time an importer applies a strategy.
+
+    ``record`` is a dictionary with the keys in ``FIELDS``; see ``StrategyProfiler``. Hooks are called for every importer, and can be used to send timings to an external metrics system."""
+    if hook not in strategy_hooks:
+        strategy_hooks.append(hook)
+    return hook
+
+
+def remove_strategy_hook(hook):
+    """Stop calling ``hook``. Does nothing if ``hook`` wasn't added."""
+    if hook in strategy_hooks:
+        strategy_hooks.remove(hook)
+
+
+def _digest(obj):
+    try:
+        return blake2b(pickle.dumps(obj, protocol=4), digest_size=16).digest()
+    except Exception:
+        # Can't pickle e.g. lambdas; treat as always changed
+        return object()
+
+
+class StrategyProfiler:
+    """Measure the effects of applying one strategy to importer data.
+
+    Wall and CPU time, and the number of datasets and exchanges before and after the strategy, are always recorded. If ``detailed``, also record the peak memory allocated while the strategy runs (using ``tracemalloc``), and the number of datasets and exchanges which were added, removed or changed. Detailed profiling keeps a digest of each dataset and exchange, and makes applying strategies a lot slower.
+
+    Usage::
+
+        profiler = StrategyProfiler("my_strategy", data)
+        data = my_strategy(data)
+        record = profiler.finish(data)
+
+    Args:
+        * *name* (str): Strategy name, used in the record.
+        * *data* (list): Data before the strategy is applied.
+        * *detailed* (bool): Record memory and changed objects.
+
+    """
+
+    def __init__(self, name, data, detailed=False):
+        self.record = dict.fromkeys(FIELDS)
+        self.record["strategy"] = name
+        self.detailed = detailed
+        self.before = self.snapshot(data)
+        if detailed:
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            elif hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.wall, self.cpu = perf_counter(), process_time()
+
+    def snapshot(self, data):
+        """Count, and if ``detailed``, digest, datasets and exchanges in ``data``.
+
+        Objects are identified by ``id``, so we can tell whether they were replaced or modified in place. References to the objects are kept until the strategy is finished, so that their ``id`` can't be reused by new objects."""
+        if not isinstance(data, list):
+            # Can't look inside generators without consuming them
+            return None
+        if not self.detailed:
+            return len(data), sum(len(ds.get("exchanges", [])) for ds in data)
+        datasets, exchanges = {}, {}
+        for ds in data:
+            datasets[id(ds)] = (ds, _digest(ds))
+            for exc in ds.get("exchanges", []):
+                exchanges[id(exc)] = (exc, _digest(exc))
+        return datasets, exchanges
+
+    def compare(self, before, after, label):
+        self.record[label] = len(after)
+        if not self.detailed:
+            return
+        self.record[label + " added"] = len(after.keys() - before.keys())
+        self.record[label + " removed"] = len(before.keys() - after.keys())
+        self.record[label + " changed"] = sum(
+            1
+            for key, (_, digest) in after.items()
+            if key in before and before[key][1] != digest
+        )
+
+    def finish(self, data, error=None):
+        """Stop measuring, and return the completed record.
+
+        Args:
+            * *data* (list): Data after the strategy is applied.
+            * *error* (str, optional): Error message if the strategy failed.
+
+        """
+        self.record["wall time"] = perf_counter() - self.wall
+        self.record["cpu time"] = process_time() - self.cpu
+        self.stop()
+        self.record["error"] = error
+        after = self.snapshot(data)
+        if self.before is not None and after is not None:
+            if self.detailed:
+                self.compare(self.before[0], after[0], "datasets")
+                self.compare(self.before[1], after[1], "exchanges")
+            else:
+                self.record["datasets"], self.record["exchanges"] = after
+                self.record["datasets added"] = max(after[0] - self.before[0], 0)
+                self.record["datasets removed"] = max(self.before[0] - after[0], 0)
+                self.record["exchanges added"] = max(after[1] - self.before[1], 0)
+                self.record["exchanges removed"] = max(self.before[1] - after[1], 0)
+        self.before = None
+        return self.record
+
+    def stop(self):
+        """Stop measuring memory, if ``detailed``. Called by ``finish``; call it directly if the strategy failed and ``finish`` won't be called."""
+        if self.detailed and self.memory is not None:
+            self.record["memory peak"] = max(
+                tracemalloc.get_traced_memory()[1] - self.memory, 0
+            )
+            if self.started_tracing:
+                tracemalloc.stop()
+            self.memory = None
+
+
+class StrategyReport:
+    """Records of strategies applied by an importer, as returned by ``importer.strategy_report()``.
+
+    Iterate over a report to get the individual records (dictionaries with the keys in ``FIELDS``). Times are in seconds, memory in bytes. Counts which weren't measured are ``None``; without detailed profiling, ``added`` and ``removed`` are the net change in the number of objects.
+
+    Args:
+        * *records* (list): List of records from ``StrategyProfiler``.
+
+    """
+
+    def __init__(self, records):
+        self.records = list(records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    @property
+    def total_time(self):
+        return sum(record["wall time"] for record in self.records)
+
+    def slowest(self, n=5):
+        """Return the ``n`` records with the highest wall time"""
+        return sorted(self.records, key=lambda x: x["wall time"], reverse=True)[:n]
+
+    def to_json(self, filepath=None):
+        """Return report as JSON string, and write it to ``filepath`` if given."""
+        data = json_codec.dumps(self.records, indent=2)
+        if filepath is not None:
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(data)
+        return data
+
+    def to_csv(self, filepath):
+        """Write report to ``filepath`` as CSV, with one row per strategy."""
+        with open(filepath, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for record in self.records:
+                writer.writerow(record)
+        return filepath
+
+    def __str__(self):
+        lines = [
+            "{:<60} {:>10} {:>10} {:>10} {:>12}".format(
+                "Strategy", "Wall (s)", "CPU (s)", "Datasets", "Exchanges"
+            )
+        ]
+        for record in self.records:
+            lines.append(
+                "{:<60} {:>10.3f} {:>10.3f} {:>10} {:>12}".format(
+                    record["strategy"][:60],
+                    record["wall time"],
+                    record["cpu time"],
+                    "" if record["datasets"] is None else record["datasets"],
+                    "" if record["exchanges"] is None else record["exchanges"],
+                )
+            )
+        lines.append("Total wall time: {:.3f} seconds".format(self.total_time))
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return "StrategyReport with {} strategies".format(len(self))
@@ -0,0 +1,77 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from bw2data import config, projects
+
+from .extractors.cache import user_cache_dirpath
+from .setup_bundle import DEFAULT_BIOSPHERE_VERSION
+from .version import version
+
+# Increment when the way templates are created or copied changes
+TEMPLATE_FORMAT = 1
+
+
+def template_dirpath(name="bw2setup", biosphere_version=DEFAULT_BIOSPHERE_VERSION):
+    """Directory of the cached project template ``name``.
+
+    Templates are stored in the ``bw2io`` cache directory (see ``user_cache_dirpath``), outside the Brightway data directory, and are keyed by the ``bw2io`` and biosphere versions, so a new template is created after an upgrade."""
+    return user_cache_dirpath(
+        "templates",
+        "v{}".format(TEMPLATE_FORMAT),
+        "{}-{}-biosphere-{}".format(
+            name, ".".join(str(x) for x in version), biosphere_version
+        ),
+    )
+
+
+def create_project_template(dirpath, setup):
+    """Create a project template at ``dirpath``.
+
+    ``setup`` is a function without arguments which adds data to the current project, e.g. ``bw2setup``. It is called in a new temporary project, whose directory is then moved to ``dirpath``. The temporary project is deleted, and the current project is restored afterwards.
+
+    If another process creates the same template at the same time, the first template is kept.
+
+    Returns:
+        ``dirpath`` as ``Path``.
+
+    """
+    dirpath = Path(dirpath)
+    current = projects.current
+    name = "bw2io-template-{}".format(uuid.uuid4().hex)
+    tmp = dirpath.with_name(dirpath.name + "." + uuid.uuid4().hex)
+    dirpath.parent.mkdir(parents=True, exist_ok=True)
+    projects.set_current(name)
+    try:
+        setup()
+        _close_sqlite_databases()
+        shutil.copytree(projects.dir, tmp)
+    finally:
+        projects.set_current(current)
+        projects.delete_project(name, delete_dir=True)
+    try:
+        os.replace(tmp, dirpath)
+    except OSError:
+        # Template was created by another process in the meantime
+        if not dirpath.is_dir():
+            raise
+        shutil.rmtree(tmp)
+    return dirpath
+
+
+def copy_project_template(dirpath):
+    """Copy the project template at ``dirpath`` into the current project.
+
+    Existing files with the same name are overwritten. Files are copied, not linked, as Brightway changes some of its files, like SQLite databases and metadata, in place. The metadata and databases of the current project are reloaded afterwards."""
+    dirpath = Path(dirpath)
+    if not dirpath.is_dir():
+        raise ValueError("Can't find project template at {}".format(dirpath))
+    _close_sqlite_databases()
+    shutil.copytree(dirpath, projects.dir, dirs_exist_ok=True)
+    projects.set_current(projects.current)
+
+
+def _close_sqlite_databases():
+    for _, substitutable_db in config.sqlite3_databases:
+        substitutable_db.db.close()
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import warnings
+import zipfile
+from pathlib import Path
+
+from . import json_codec
+from .errors import InvalidSetupBundle
+from .version import version
+
+# Increment when the structure of the bundle changes
+SETUP_BUNDLE_FORMAT = 1
+DEFAULT_BIOSPHERE_VERSION = "3.9"
+
+BIOSPHERE_FORMAT = "Ecoinvent XML"
+MEMBERS = ("biosphere.json", "methods.json", "migrations.json")
+
+
+def setup_bundle_filepath(biosphere_version=DEFAULT_BIOSPHERE_VERSION):
+    """Path of the setup bundle shipped with ``bw2io`` for ``biosphere_version``"""
+    return (
+        Path(__file__).parent.resolve()
+        / "data"
+        / "bw2setup-{}.zip".format(biosphere_version)
+    )
+
+
+def write_setup_bundle(filepath, biosphere, methods, migrations, biosphere_version):
+    """Write a setup bundle.
+
+    The bundle is a zip archive with the JSON files ``biosphere.json``, ``methods.json`` and ``migrations.json``, and a ``manifest.json`` which stores the bundle format, the ``bw2io`` and biosphere versions, and the SHA-256 checksum of each JSON file.
+
+    Args:
+        * *filepath* (str or Path): Path of the bundle.
+        * *biosphere* (list): Biosphere flow datasets, with strategies already applied.
+        * *methods* (list): LCIA method datasets, linked to the biosphere flows.
+        * *migrations* (list): ``(name, description, data)`` tuples.
+        * *biosphere_version* (str): Version of the biosphere flow list.
+
+    Returns:
+        Path of the bundle.
+
+    """
+    filepath = Path(filepath)
+    contents = {
+        "biosphere.json": json_codec.encode(biosphere),
+        "methods.json": json_codec.encode(methods),
+        "migrations.json": json_codec.encode(
+            [
+                {"name": name, "description": description, "data": data}
+                for name, description, data in migrations
+            ]
+        ),
+    }
+    manifest = {
+        "format": SETUP_BUNDLE_FORMAT,
+        "bw2io": ".".join(str(x) for x in version),
+        "biosphere version": biosphere_version,
+        "checksums": {
+            name: hashlib.sha256(data).hexdigest() for name, data in contents.items()
+        },
+    }
+    tmp = filepath.with_name(filepath.name + ".tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("manifest.json", json_codec.encode(manifest, indent=2))
+        for name, data in contents.items():
+            archive.writestr(name, data)
+    os.replace(tmp, filepath)
+    return filepath
+
+
+def build_setup_bundle(filepath=None, biosphere_version=DEFAULT_BIOSPHERE_VERSION):
+    """Build the setup bundle from the data files shipped with ``bw2io``.
+
+    Reads the ecoinvent elementary flows XML file, the prepared LCIA methods and the data of the core migrations. Run this whenever this data changes, and before each release; ``dev/build_setup_bundle.py`` also checks that the bundle is valid and packaged.
+
+    Args:
+        * *filepath* (str or Path, optional): Path of the bundle. Default is ``setup_bundle_filepath(biosphere_version)``.
+        * *biosphere_version* (str): Version of the ecoinvent elementary flows.
+
+    Returns:
+        Path of the bundle.
+
+    """
+    from .data import get_default_lcia_methods_data
+    from .importers import Ecospold2BiosphereImporter
+    from .migrations import get_core_migrations_data
+
+    eb = Ecospold2BiosphereImporter(version=biosphere_version)
+    eb.apply_strategies(verbose=False)
+
+    return write_setup_bundle(
+        filepath or setup_bundle_filepath(biosphere_version),
+        biosphere=eb.data,
+        methods=get_default_lcia_methods_data(),
+        migrations=get_core_migrations_data(),
+        biosphere_version=biosphere_version,
+    )
+
+
+def read_setup_bundle(filepath, biosphere_version=DEFAULT_BIOSPHERE_VERSION):
+    """Read and verify a setup bundle.
+
+    Raises ``InvalidSetupBundle`` if the bundle can't be read, has a different format or biosphere version, or if a checksum doesn't match. Warns if the bundle was built by another version of ``bw2io``.
+
+    Args:
+        * *filepath* (str or Path): Path of the bundle.
+        * *biosphere_version* (str, optional): Required version of the biosphere flow list. ``None`` accepts any version.
+
+    Returns:
+        Tuple of ``(manifest, biosphere, methods, migrations)``; see ``write_setup_bundle``.
+
+    """
+    try:
+        with zipfile.ZipFile(filepath) as archive:
+            manifest = json_codec.loads(archive.read("manifest.json"))
+            contents = {name: archive.read(name) for name in MEMBERS}
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise InvalidSetupBundle("Can't read setup bundle {}: {}".format(filepath, e))
+
+    if manifest.get("format") != SETUP_BUNDLE_FORMAT:
+        raise InvalidSetupBundle(
+            "Setup bundle {} has format {}, but {} is required".format(
+                filepath, manifest.get("format"), SETUP_BUNDLE_FORMAT
+            )
+        )
+    if (
+        biosphere_version is not None
+        and manifest.get("biosphere version") != biosphere_version
+    ):
+        raise InvalidSetupBundle(
+            "Setup bundle {} has biosphere version {}, but {} is required".format(
+                filepath, manifest.get("biosphere version"), biosphere_version
+            )
+        )
+    bw2io_version = ".".join(str(x) for x in version)
+    if manifest.get("bw2io") != bw2io_version:
+        warnings.warn(
+            "Setup bundle {} was built with bw2io {}, but this is bw2io {}".format(
+                filepath, manifest.get("bw2io"), bw2io_version
+            )
+        )
+    for name, data in contents.items():
+        if hashlib.sha256(data).hexdigest() != manifest["checksums"].get(name):
+            raise InvalidSetupBundle(
+                "Checksum of {} in setup bundle {} doesn't match".format(name, filepath)
+            )
+
+    biosphere = json_codec.loads(contents["biosphere.json"])
+    for ds in biosphere:
+        ds["categories"] = tuple(ds["categories"])
+    methods = json_codec.loads(contents["methods.json"])
+    for method in methods:
+        method["name"] = tuple(method["name"])
+    migrations = [
+        (obj["name"], obj["description"], obj["data"])
+        for obj in json_codec.loads(contents["migrations.json"])
+    ]
+    return manifest, biosphere, methods, migrations
+
+
+def load_setup_bundle(
+    filepath=None,
+    biosphere_name="biosphere3",
+    overwrite=False,
+    biosphere_version=DEFAULT_BIOSPHERE_VERSION,
+):
+    """Write the biosphere database, LCIA methods and core migrations in a setup bundle to the current project.
+
+    The bundle is verified before anything is written. No data files are parsed, and no strategies are applied.
+
+    Args:
+        * *filepath* (str or Path, optional): Path of the bundle. Default is ``setup_bundle_filepath()``.
+        * *biosphere_name* (str): Name of the biosphere database.
+        * *overwrite* (bool): Overwrite existing LCIA methods.
+        * *biosphere_version* (str, optional): Required version of the biosphere flow list; see ``read_setup_bundle``.
+
+    Returns:
+        The bundle manifest.
+
+    """
+    from .importers.base_lci import LCIImporter
+    from .importers.base_lcia import LCIAImporter
+    from .migrations import create_core_migrations
+
+    filepath = filepath or setup_bundle_filepath()
+    manifest, biosphere, methods, migrations = read_setup_bundle(
+        filepath, biosphere_version
+    )
+
+    for ds in biosphere:
+        ds["database"] = biosphere_name
+    for method in methods:
+        for cf in method["exchanges"]:
+            cf["input"] = (biosphere_name, cf["input"][1])
+
+    importer = LCIImporter(biosphere_name)
+    importer.data = biosphere
+    importer.write_database(backend="sqlite", format=BIOSPHERE_FORMAT)
+
+    importer = LCIAImporter(os.path.basename(filepath), biosphere=biosphere_name)
+    importer.data = methods
+    importer.write_methods(overwrite=overwrite)
+
+    create_core_migrations(migrations)
+    return manifest
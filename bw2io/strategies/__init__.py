@@ -54,6 +54,7 @@ __all__ = [
     "match_subcategories",
     "migrate_datasets",
     "migrate_exchanges",
+    "migrate_many",
     "normalize_biosphere_categories",
     "normalize_biosphere_names",
     "normalize_simapro_biosphere_categories",
@@ -163,7 +164,7 @@ from .lcia import (
     set_biosphere_type,
 )
 from .locations import update_ecoinvent_locations
-from .migrations import migrate_datasets, migrate_exchanges
+from .migrations import migrate_datasets, migrate_exchanges, migrate_many
 from .simapro import (
     change_electricity_unit_mj_to_kwh,
     fix_localized_water_flows,
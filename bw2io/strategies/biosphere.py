@@ -1,7 +1,11 @@
 from .migrations import migrate_datasets, migrate_exchanges
+from .pipeline import dataset_transform, exchange_transform
 
+UNSPECIFIED = {"unspecified", "(unspecified)", "", None}
 
-def drop_unspecified_subcategories(db):
+
+@dataset_transform
+def drop_unspecified_subcategories(ds):
     """Drop subcategories if they are in the following:
     * ``unspecified``
     * ``(unspecified)``
@@ -9,16 +13,13 @@ def drop_unspecified_subcategories(db):
     * ``None``
 
     """
-    UNSPECIFIED = {"unspecified", "(unspecified)", "", None}
-    for ds in db:
-        if ds.get("categories"):
-            while ds["categories"] and ds["categories"][-1] in UNSPECIFIED:
-                ds["categories"] = ds["categories"][:-1]
-        for exc in ds.get("exchanges", []):
-            if exc.get("categories"):
-                while exc["categories"] and exc["categories"][-1] in UNSPECIFIED:
-                    exc["categories"] = exc["categories"][:-1]
-    return db
+    if ds.get("categories"):
+        while ds["categories"] and ds["categories"][-1] in UNSPECIFIED:
+            ds["categories"] = ds["categories"][:-1]
+    for exc in ds.get("exchanges", []):
+        if exc.get("categories"):
+            while exc["categories"] and exc["categories"][-1] in UNSPECIFIED:
+                exc["categories"] = exc["categories"][:-1]
 
 
 def normalize_biosphere_names(db, lcia=False):
@@ -39,17 +40,14 @@ def normalize_biosphere_categories(db, lcia=False):
     return db
 
 
-def strip_biosphere_exc_locations(db):
+@exchange_transform(skip_missing=True)
+def strip_biosphere_exc_locations(exc):
     """Biosphere flows don't have locations - if any are included they can confuse linking"""
-    for ds in db:
-        for exc in ds.get("exchanges", []):
-            if exc.get("type") == "biosphere" and "location" in exc:
-                del exc["location"]
-    return db
+    if exc.get("type") == "biosphere" and "location" in exc:
+        del exc["location"]
 
 
-def ensure_categories_are_tuples(db):
-    for ds in db:
-        if ds.get("categories") and type(ds["categories"]) != tuple:
-            ds["categories"] = tuple(ds["categories"])
-    return db
+@dataset_transform
+def ensure_categories_are_tuples(ds):
+    if ds.get("categories") and type(ds["categories"]) != tuple:
+        ds["categories"] = tuple(ds["categories"])
@@ -7,6 +7,7 @@ from stats_arrays import LognormalUncertainty, UndefinedUncertainty
 
 from ..utils import es2_activity_hash, format_for_logging
 from .migrations import migrate_exchanges, migrations
+from .pipeline import dataset_transform, exchange_filter, exchange_transform
 
 
 def link_biosphere_by_flow_uuid(db, biosphere="biosphere3"):
@@ -23,82 +24,66 @@ def link_biosphere_by_flow_uuid(db, biosphere="biosphere3"):
     return db
 
 
-def remove_zero_amount_coproducts(db):
+@exchange_filter
+def remove_zero_amount_coproducts(exc):
     """Remove coproducts with zero production amounts from ``exchanges``"""
-    for ds in db:
-        ds[u"exchanges"] = [
-            exc
-            for exc in ds["exchanges"]
-            if (exc["type"] != "production" or exc["amount"])
-        ]
-    return db
+    return exc["type"] != "production" or exc["amount"]
 
 
-def remove_zero_amount_inputs_with_no_activity(db):
+@exchange_filter
+def remove_zero_amount_inputs_with_no_activity(exc):
     """Remove technosphere exchanges with amount of zero and no uncertainty.
 
     Input exchanges with zero amounts are the result of the ecoinvent linking algorithm, and can be safely discarded."""
-    for ds in db:
-        ds[u"exchanges"] = [
-            exc
-            for exc in ds["exchanges"]
-            if not (
-                exc["uncertainty type"] == UndefinedUncertainty.id
-                and exc["amount"] == 0
-                and exc["type"] == "technosphere"
-            )
-        ]
-    return db
+    return not (
+        exc["uncertainty type"] == UndefinedUncertainty.id
+        and exc["amount"] == 0
+        and exc["type"] == "technosphere"
+    )
 
 
-def remove_unnamed_parameters(db):
+@dataset_transform
+def remove_unnamed_parameters(ds):
     """Remove parameters which have no name. They can't be used in formulas or referenced."""
-    for ds in db:
-        if "parameters" in ds:
-            ds["parameters"] = {
-                key: value
-                for key, value in ds["parameters"].items()
-                if not value.get("unnamed")
-            }
-    return db
+    if "parameters" in ds:
+        ds["parameters"] = {
+            key: value
+            for key, value in ds["parameters"].items()
+            if not value.get("unnamed")
+        }
 
 
-def es2_assign_only_product_with_amount_as_reference_product(db):
+@dataset_transform
+def es2_assign_only_product_with_amount_as_reference_product(ds):
     """If a multioutput process has one product with a non-zero amount, assign that product as reference product.
 
     This is by default called after ``remove_zero_amount_coproducts``, which will delete the zero-amount coproducts in any case. However, we still keep the zero-amount logic in case people want to keep all coproducts."""
-    for ds in db:
-        amounted = [
-            prod
-            for prod in ds["exchanges"]
-            if prod["type"] == "production" and prod["amount"]
-        ]
-        # OK if it overwrites existing reference product; need flow as well
-        if len(amounted) == 1:
-            ds[u"reference product"] = amounted[0]["name"]
-            ds[u"flow"] = amounted[0][u"flow"]
-            if not ds.get("unit"):
-                ds[u"unit"] = amounted[0]["unit"]
-            ds[u"production amount"] = amounted[0]["amount"]
-    return db
-
-
-def assign_single_product_as_activity(db):
-    for ds in db:
-        prod_exchanges = [
-            exc for exc in ds.get("exchanges") if exc["type"] == "production"
-        ]
-        # raise ValueError
-        if len(prod_exchanges) == 1:
-            prod_exchanges[0]["activity"] = ds["activity"]
-    return db
-
-
-def create_composite_code(db):
+    amounted = [
+        prod
+        for prod in ds["exchanges"]
+        if prod["type"] == "production" and prod["amount"]
+    ]
+    # OK if it overwrites existing reference product; need flow as well
+    if len(amounted) == 1:
+        ds[u"reference product"] = amounted[0]["name"]
+        ds[u"flow"] = amounted[0][u"flow"]
+        if not ds.get("unit"):
+            ds[u"unit"] = amounted[0]["unit"]
+        ds[u"production amount"] = amounted[0]["amount"]
+
+
+@dataset_transform
+def assign_single_product_as_activity(ds):
+    prod_exchanges = [exc for exc in ds.get("exchanges") if exc["type"] == "production"]
+    # raise ValueError
+    if len(prod_exchanges) == 1:
+        prod_exchanges[0]["activity"] = ds["activity"]
+
+
+@dataset_transform
+def create_composite_code(ds):
     """Create composite code from activity and flow names"""
-    for ds in db:
-        ds[u"code"] = es2_activity_hash(ds["activity"], ds["flow"])
-    return db
+    ds[u"code"] = es2_activity_hash(ds["activity"], ds["flow"])
 
 
 def link_internal_technosphere_by_composite_code(db):
@@ -196,7 +181,8 @@ def delete_ghost_exchanges(db):
     return db
 
 
-def remove_uncertainty_from_negative_loss_exchanges(db):
+@dataset_transform
+def remove_uncertainty_from_negative_loss_exchanges(ds):
     """Remove uncertainty from negative lognormal exchanges.
 
     There are 15699 of these in ecoinvent 3.3 cutoff.
@@ -208,44 +194,36 @@ def remove_uncertainty_from_negative_loss_exchanges(db):
     Only applies to exchanges which decrease net production.
 
     """
-    for ds in db:
-        production_names = {
-            exc["name"]
-            for exc in ds.get("exchanges", [])
-            if exc["type"] == "production"
-        }
-        for exc in ds.get("exchanges", []):
-            if (
-                exc["amount"] < 0
-                and exc["uncertainty type"] == LognormalUncertainty.id
-                and exc["name"] in production_names
-            ):
-                exc["uncertainty type"] = UndefinedUncertainty.id
-                exc["loc"] = exc["amount"]
-                del exc["scale"]
-    return db
-
-
-def set_lognormal_loc_value(db):
+    production_names = {
+        exc["name"] for exc in ds.get("exchanges", []) if exc["type"] == "production"
+    }
+    for exc in ds.get("exchanges", []):
+        if (
+            exc["amount"] < 0
+            and exc["uncertainty type"] == LognormalUncertainty.id
+            and exc["name"] in production_names
+        ):
+            exc["uncertainty type"] = UndefinedUncertainty.id
+            exc["loc"] = exc["amount"]
+            del exc["scale"]
+
+
+@exchange_transform(skip_missing=True)
+def set_lognormal_loc_value(exc):
     """Make sure ``loc`` value is correct for lognormal uncertainty distributions"""
-    for ds in db:
-        for exc in ds.get("exchanges", []):
-            if exc["uncertainty type"] == LognormalUncertainty.id:
-                exc["loc"] = math.log(abs(exc["amount"]))
-    return db
+    if exc["uncertainty type"] == LognormalUncertainty.id:
+        exc["loc"] = math.log(abs(exc["amount"]))
 
 
-def fix_unreasonably_high_lognormal_uncertainties(db, cutoff=2.5, replacement=0.25):
+@exchange_transform(skip_missing=True)
+def fix_unreasonably_high_lognormal_uncertainties(exc, cutoff=2.5, replacement=0.25):
     """Fix unreasonably high uncertainty values.
 
     With the default cutoff value of 2.5 and a median of 1, the 95% confidence
     interval has a high to low ratio of 20.000."""
-    for ds in db:
-        for exc in ds.get("exchanges", []):
-            if exc["uncertainty type"] == LognormalUncertainty.id:
-                if exc["scale"] > cutoff:
-                    exc["scale"] = replacement
-    return db
+    if exc["uncertainty type"] == LognormalUncertainty.id:
+        if exc["scale"] > cutoff:
+            exc["scale"] = replacement
 
 
 def fix_ecoinvent_flows_pre35(db):
@@ -261,53 +239,50 @@ def fix_ecoinvent_flows_pre35(db):
         return db
 
 
-def drop_temporary_outdated_biosphere_flows(db):
+TEMPORARY_OUTDATED_BIOSPHERE_FLOWS = {
+    "Fluorene_temp",
+    "Fluoranthene_temp",
+    "Dibenz(a,h)anthracene_temp",
+    "Benzo(k)fluoranthene_temp",
+    "Benzo(ghi)perylene_temp",
+    "Benzo(b)fluoranthene_temp",
+    "Benzo(a)anthracene_temp",
+    "Acenaphthylene_temp",
+    "Chrysene_temp",
+    "Pyrene_temp",
+    "Phenanthrene_temp",
+    "Indeno(1,2,3-c,d)pyrene_temp",
+}
+
+
+@exchange_filter
+def drop_temporary_outdated_biosphere_flows(exc):
     """Drop biosphere exchanges which aren't used and are outdated"""
-    names = {
-        "Fluorene_temp",
-        "Fluoranthene_temp",
-        "Dibenz(a,h)anthracene_temp",
-        "Benzo(k)fluoranthene_temp",
-        "Benzo(ghi)perylene_temp",
-        "Benzo(b)fluoranthene_temp",
-        "Benzo(a)anthracene_temp",
-        "Acenaphthylene_temp",
-        "Chrysene_temp",
-        "Pyrene_temp",
-        "Phenanthrene_temp",
-        "Indeno(1,2,3-c,d)pyrene_temp",
-    }
-    for ds in db:
-        ds["exchanges"] = [
-            obj
-            for obj in ds["exchanges"]
-            if not (obj.get("name") in names and obj.get("type") == "biosphere")
-        ]
-    return db
+    return not (
+        exc.get("name") in TEMPORARY_OUTDATED_BIOSPHERE_FLOWS
+        and exc.get("type") == "biosphere"
+    )
 
 
-def add_cpc_classification_from_single_reference_product(db):
-    def has_cpc(exc):
-        return (
-            "classifications" in exc
-            and "CPC" in exc["classifications"]
-            and exc["classifications"]["CPC"]
-        )
+def _has_cpc(exc):
+    return (
+        "classifications" in exc
+        and "CPC" in exc["classifications"]
+        and exc["classifications"]["CPC"]
+    )
 
-    for ds in db:
-        assert "classifications" in ds
-        products = [exc for exc in ds["exchanges"] if exc["type"] == "production"]
-        if len(products) == 1 and has_cpc(products[0]):
-            ds["classifications"].append(
-                ("CPC", products[0]["classifications"]["CPC"][0])
-            )
-    return db
 
+@dataset_transform
+def add_cpc_classification_from_single_reference_product(ds):
+    assert "classifications" in ds
+    products = [exc for exc in ds["exchanges"] if exc["type"] == "production"]
+    if len(products) == 1 and _has_cpc(products[0]):
+        ds["classifications"].append(("CPC", products[0]["classifications"]["CPC"][0]))
 
-def delete_none_synonyms(db):
-    for ds in db:
-        ds["synonyms"] = [s for s in ds["synonyms"] if s is not None]
-    return db
+
+@dataset_transform
+def delete_none_synonyms(ds):
+    ds["synonyms"] = [s for s in ds["synonyms"] if s is not None]
 
 
 def update_social_flows_in_older_consequential(db, biosphere_db):
@@ -1,9 +1,9 @@
 import csv
-import json
 import re
 
 from bw2data import Database, config
 
+from .. import json_codec
 from ..data import dirpath as data_directory
 
 
@@ -33,8 +33,8 @@ def remove_numeric_codes(products):
 def add_stam_labels(data):
     stam = {
         el: stam
-        for stam, lst in json.load(
-            open(data_directory / "lci" / "EXIOBASE_STAM_categories.json")
+        for stam, lst in json_codec.load(
+            data_directory / "lci" / "EXIOBASE_STAM_categories.json"
         )["data"].items()
         for el in lst
     }
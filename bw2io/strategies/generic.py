@@ -1,26 +1,25 @@
 import numbers
-import pprint
 from copy import deepcopy
 
 import numpy as np
-from bw2data import Database, databases
+from bw2data import databases
+from bw2data.data_store import DataStore
 
 from ..errors import StrategyError
+from ..linking import LinkIndex, format_nonunique_key_error
 from ..units import normalize_units as normalize_units_function
-from ..utils import DEFAULT_FIELDS, activity_hash
-
-
-def format_nonunique_key_error(obj, fields, others):
-    template = """Object in source database can't be uniquely linked to target database.\nProblematic dataset is:\n{ds}\nPossible targets include (at least one not shown):\n{targets}"""
-    fields_to_print = list(fields or DEFAULT_FIELDS) + ["filename"]
-    _ = lambda x: {field: x.get(field, "(missing)") for field in fields_to_print}
-    return template.format(
-        ds=pprint.pformat(_(obj)), targets=pprint.pformat([_(x) for x in others])
-    )
+from ..utils import activity_hashes
+from .pipeline import dataset_transform, exchange_filter, exchange_transform
 
 
 def link_iterable_by_fields(
-    unlinked, other=None, fields=None, kind=None, internal=False, relink=False
+    unlinked,
+    other=None,
+    fields=None,
+    kind=None,
+    internal=False,
+    relink=False,
+    other_types=None,
 ):
     """Generic function to link objects in ``unlinked`` to objects in ``other`` using fields ``fields``.
 
@@ -30,7 +29,11 @@ def link_iterable_by_fields(
 
     If ``relink``, link to objects which already have an ``input``. Otherwise, skip already linked objects.
 
-    If ``internal``, linked ``unlinked`` to other objects in ``unlinked``. Each object must have the attributes ``database`` and ``code``."""
+    If ``internal``, linked ``unlinked`` to other objects in ``unlinked``. Each object must have the attributes ``database`` and ``code``.
+
+    ``other`` can be an iterable of datasets, a ``Database``, the name of a database, or a ``LinkIndex``. Indices for a database are built when this function is called, and cached (see ``LinkIndex.for_database``), so repeated linking against the same database only builds the lookup table once. A ``LinkIndex`` is used with its own ``fields``; raises ``ValueError`` if different ``fields`` are given.
+
+    If ``other_types``, only link to datasets in ``other`` whose ``type`` is in ``other_types``. Datasets without a ``type`` are processes. Not used with a ``LinkIndex``."""
     if kind:
         kind = {kind} if isinstance(kind, str) else kind
         if relink:
@@ -46,34 +49,36 @@ def link_iterable_by_fields(
     if internal:
         other = unlinked
 
-    duplicates, candidates = {}, {}
-    try:
-        # Other can be a generator, so a bit convoluted
-        for ds in other:
-            key = activity_hash(ds, fields)
-            if key in candidates:
-                duplicates.setdefault(key, []).append(ds)
-            else:
-                candidates[key] = (ds["database"], ds["code"])
-    except KeyError:
-        raise StrategyError(
-            "Not all datasets in database to be linked have "
-            "``database`` or ``code`` attributes"
+    if isinstance(other, LinkIndex):
+        if fields is not None and tuple(fields) != other.fields:
+            raise ValueError(
+                "Fields {} differ from the fields {} of the given LinkIndex".format(
+                    tuple(fields), other.fields
+                )
+            )
+        index = other.current()
+    elif isinstance(other, str):
+        index = LinkIndex.for_database(other, fields, other_types)
+    elif isinstance(other, DataStore) and other.name in databases:
+        index = LinkIndex.for_database(other.name, fields, other_types)
+    elif other_types:
+        other_types = {other_types} if isinstance(other_types, str) else other_types
+        index = LinkIndex(
+            (ds for ds in other if ds.get("type", "process") in other_types), fields
         )
+    else:
+        index = LinkIndex(other, fields)
 
     for container in unlinked:
         for obj in filter(filter_func, container.get("exchanges", [])):
-            key = activity_hash(obj, fields)
-            if key in duplicates:
-                raise StrategyError(
-                    format_nonunique_key_error(obj, fields, duplicates[key])
-                )
-            elif key in candidates:
-                obj["input"] = candidates[key]
+            key = index.get(obj)
+            if key is not None:
+                obj["input"] = key
     return unlinked
 
 
-def assign_only_product_as_production(db):
+@dataset_transform
+def assign_only_product_as_production(ds):
     """Assign only product as reference product.
 
     Skips datasets that already have a reference product or no production exchanges. Production exchanges must have a ``name`` and an amount.
@@ -85,20 +90,18 @@ def assign_only_product_as_production(db):
     * 'production amount' - amount of reference product
 
     """
-    for ds in db:
-        if ds.get("reference product"):
-            continue
-        products = [x for x in ds.get("exchanges", []) if x.get("type") == "production"]
-        if len(products) == 1:
-            product = products[0]
-            assert product["name"]
-            ds["reference product"] = (
-                product.get("reference product", []) or product["name"]
-            )
-            ds["production amount"] = product["amount"]
-            ds["name"] = ds.get("name") or product["name"]
-            ds["unit"] = ds.get("unit") or product.get("unit") or "Unknown"
-    return db
+    if ds.get("reference product"):
+        return
+    products = [x for x in ds.get("exchanges", []) if x.get("type") == "production"]
+    if len(products) == 1:
+        product = products[0]
+        assert product["name"]
+        ds["reference product"] = (
+            product.get("reference product", []) or product["name"]
+        )
+        ds["production amount"] = product["amount"]
+        ds["name"] = ds.get("name") or product["name"]
+        ds["unit"] = ds.get("unit") or product.get("unit") or "Unknown"
 
 
 def link_technosphere_by_activity_hash(db, external_db_name=None, fields=None):
@@ -113,17 +116,16 @@ def link_technosphere_by_activity_hash(db, external_db_name=None, fields=None):
             raise StrategyError(
                 "Can't find external database {}".format(external_db_name)
             )
-        other = (
-            obj
-            for obj in Database(external_db_name)
-            if obj.get("type", "process") == "process"
-        )
         internal = False
     else:
-        other = None
         internal = True
     return link_iterable_by_fields(
-        db, other, internal=internal, kind=TECHNOSPHERE_TYPES, fields=fields
+        db,
+        external_db_name,
+        internal=internal,
+        kind=TECHNOSPHERE_TYPES,
+        fields=fields,
+        other_types=None if internal else {"process"},
     )
 
 
@@ -131,93 +133,84 @@ def set_code_by_activity_hash(db, overwrite=False):
     """Use ``activity_hash`` to set dataset code.
 
     By default, won't overwrite existing codes, but will if ``overwrite`` is ``True``."""
-    for ds in db:
-        if "code" not in ds or overwrite:
-            ds["code"] = activity_hash(ds)
+    todo = [ds for ds in db if "code" not in ds or overwrite]
+    for ds, code in zip(todo, activity_hashes(todo)):
+        ds["code"] = code
     return db
 
 
-def tupleize_categories(db):
-    for ds in db:
-        if ds.get("categories"):
-            ds["categories"] = tuple(ds["categories"])
-        for exc in ds.get("exchanges", []):
-            if exc.get("categories"):
-                exc["categories"] = tuple(exc["categories"])
-    return db
+@dataset_transform
+def tupleize_categories(ds):
+    if ds.get("categories"):
+        ds["categories"] = tuple(ds["categories"])
+    for exc in ds.get("exchanges", []):
+        if exc.get("categories"):
+            exc["categories"] = tuple(exc["categories"])
 
 
-def drop_unlinked(db):
+@exchange_filter
+def drop_unlinked(exc):
     """This is the nuclear option - use at your own risk!"""
-    for ds in db:
-        ds["exchanges"] = [obj for obj in ds["exchanges"] if obj.get("input")]
-    return db
+    return exc.get("input")
 
 
-def normalize_units(db):
+@dataset_transform
+def normalize_units(ds):
     """Normalize units in datasets and their exchanges"""
-    for ds in db:
-        if "unit" in ds:
-            ds["unit"] = normalize_units_function(ds["unit"])
-        for exc in ds.get("exchanges", []):
-            if "unit" in exc:
-                exc["unit"] = normalize_units_function(exc["unit"])
-            if "reference unit" in exc:
-                exc["reference unit"] = normalize_units_function(exc["reference unit"])
-        for param in ds.get("parameters", {}).values():
-            if "unit" in param:
-                param["unit"] = normalize_units_function(param["unit"])
-    return db
-
-
-def add_database_name(db, name):
+    if "unit" in ds:
+        ds["unit"] = normalize_units_function(ds["unit"])
+    for exc in ds.get("exchanges", []):
+        if "unit" in exc:
+            exc["unit"] = normalize_units_function(exc["unit"])
+        if "reference unit" in exc:
+            exc["reference unit"] = normalize_units_function(exc["reference unit"])
+    for param in ds.get("parameters", {}).values():
+        if "unit" in param:
+            param["unit"] = normalize_units_function(param["unit"])
+
+
+@dataset_transform
+def add_database_name(ds, name):
     """Add database name to datasets"""
-    for ds in db:
-        ds["database"] = name
-    return db
+    ds["database"] = name
 
 
-def convert_uncertainty_types_to_integers(db):
+@exchange_transform
+def convert_uncertainty_types_to_integers(exc):
     """Generic number conversion function convert to floats. Return to integers."""
-    for ds in db:
-        for exc in ds["exchanges"]:
-            try:
-                exc["uncertainty type"] = int(exc["uncertainty type"])
-            except:
-                pass
-    return db
+    try:
+        exc["uncertainty type"] = int(exc["uncertainty type"])
+    except:
+        pass
+
 
+UNCERTAINTY_FIELDS = [
+    "minimum",
+    "maximum",
+    "scale",
+    "shape",
+    "loc",
+]
 
-def drop_falsey_uncertainty_fields_but_keep_zeros(db):
+
+@exchange_transform
+def drop_falsey_uncertainty_fields_but_keep_zeros(exc):
     """Drop fields like '' but keep zero and NaN.
 
     Note that this doesn't strip `False`, which behaves *exactly* like 0.
 
     """
-    uncertainty_fields = [
-        "minimum",
-        "maximum",
-        "scale",
-        "shape",
-        "loc",
-    ]
-
-    def drop_if_appropriate(exc):
-        for field in uncertainty_fields:
-            if field not in exc or exc[field] == 0:
-                continue
-            elif isinstance(exc[field], numbers.Number) and np.isnan(exc[field]):
-                continue
-            elif not exc[field]:
-                del exc[field]
-
-    for ds in db:
-        for exc in ds["exchanges"]:
-            drop_if_appropriate(exc)
-    return db
+    for field in UNCERTAINTY_FIELDS:
+        if field not in exc or exc[field] == 0:
+            continue
+        elif isinstance(exc[field], numbers.Number) and np.isnan(exc[field]):
+            continue
+        elif not exc[field]:
+            del exc[field]
 
 
-def convert_activity_parameters_to_list(data):
+@dataset_transform
+def convert_activity_parameters_to_list(ds):
     """Convert activity parameters from dictionary to list of dictionaries"""
 
     def _(key, value):
@@ -225,11 +218,8 @@ def convert_activity_parameters_to_list(data):
         dct["name"] = key
         return dct
 
-    for ds in data:
-        if "parameters" in ds:
-            ds["parameters"] = [_(x, y) for x, y in ds["parameters"].items()]
-
-    return data
+    if "parameters" in ds:
+        ds["parameters"] = [_(x, y) for x, y in ds["parameters"].items()]
 
 
 def split_exchanges(data, filter_params, changed_attributes, allocation_factors=None):
@@ -104,10 +104,12 @@ def json_ld_allocate_datasets(db, preferred_allocation=None):
     if preferred_allocation is not None:
         assert preferred_allocation in VALID_METHODS, "Invalid allocation method given"
 
-    new_datasets = {}
+    unallocated, new_datasets = {}, {}
 
-    for ds in db["processes"].values():
+    # ``items()`` of a lazy ``JSONLDFolder`` parses all remaining files at once
+    for key, ds in db["processes"].items():
         if not allocation_needed(ds):
+            unallocated[key] = ds
             continue
         allocation_dict = get_allocation_dict(ds["allocationFactors"])
         allocation_method = (
@@ -152,11 +154,6 @@ def json_ld_allocate_datasets(db, preferred_allocation=None):
             new_ds["allocationFactors"] = []
             new_datasets[new_ds["code"]] = new_ds
 
-    unallocated = {
-        key: value
-        for key, value in db["processes"].items()
-        if not allocation_needed(value)
-    }
     db["processes"] = {**unallocated, **new_datasets}
 
     return db
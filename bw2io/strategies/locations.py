@@ -1,3 +1,5 @@
+from .pipeline import dataset_transform
+
 GEO_UPDATE = {
     "Al producing Area 2, North America": "IAI Area, North America",
     "IAI Area 2, North America": "IAI Area, North America",
@@ -28,12 +30,11 @@ GEO_UPDATE = {
 }
 
 
-def update_ecoinvent_locations(db):
+@dataset_transform
+def update_ecoinvent_locations(ds):
     """Update old ecoinvent location codes"""
-    for ds in db:
-        if "location" in ds:
-            ds["location"] = GEO_UPDATE.get(ds["location"], ds["location"])
-        for exc in ds.get("exchanges", []):
-            if "location" in exc:
-                exc["location"] = GEO_UPDATE.get(exc["location"], exc["location"])
-    return db
+    if "location" in ds:
+        ds["location"] = GEO_UPDATE.get(ds["location"], ds["location"])
+    for exc in ds.get("exchanges", []):
+        if "location" in exc:
+            exc["location"] = GEO_UPDATE.get(exc["location"], exc["location"])
@@ -1,68 +1,81 @@
+import copy
+
 from ..errors import MissingMigration
 from ..migrations import Migration, migrations
-from ..utils import activity_hash, rescale_exchange
+from ..utils import rescale_exchange
 
 
-def migrate_datasets(db, migration):
+def _compile_migration(migration):
     if migration not in migrations:
         raise MissingMigration(
             "Migration `{}` is missing; did you run `bw2setup()` in this project? You can also (re-)install core migrations  with `create_core_migrations()`".format(
                 migration
             )
         )
-    migration_data = Migration(migration).load()
+    return Migration(migration).compile()
 
-    to_dict = lambda x: dict(zip(migration_data["fields"], x))
 
-    mapping = {
-        activity_hash(to_dict(obj[0]), fields=migration_data["fields"]): obj[1]
-        for obj in migration_data["data"]
-    }
+def _copy_value(value):
+    # Compiled migrations are shared by all imports in this process, so
+    # datasets must not get references to their lists or dictionaries
+    if isinstance(value, (list, dict)):
+        return copy.deepcopy(value)
+    return value
 
-    for ds in db:
-        try:
-            new_data = mapping[activity_hash(ds, fields=migration_data["fields"])]
-        except KeyError:
-            # This dataset is not in the list to be migrated
+
+def _migrate_dataset(ds, compiled):
+    new_data = compiled.get(ds)
+    if new_data is None:
+        # This dataset is not in the list to be migrated
+        return
+    for field, value in new_data.items():
+        if field == "multiplier":
+            # This change should only be done by `migrate_exchanges`
             continue
-        for field, value in new_data.items():
-            if field == "multiplier":
-                # This change should only be done by `migrate_exchanges`
-                continue
-            else:
-                ds[field] = value
+        else:
+            ds[field] = _copy_value(value)
+
+
+def _migrate_exchange(exc, compiled):
+    new_data = compiled.get(exc)
+    if new_data is None:
+        # This exchange is not in the list to be migrated
+        return
+    for field, value in new_data.items():
+        if field == "multiplier":
+            rescale_exchange(exc, value)
+        else:
+            exc[field] = _copy_value(value)
+
+
+def migrate_datasets(db, migration):
+    compiled = _compile_migration(migration)
+    for ds in db:
+        _migrate_dataset(ds, compiled)
     return db
 
 
 def migrate_exchanges(db, migration):
-    if migration not in migrations:
-        raise MissingMigration(
-            "Migration `{}` is missing; did you run `bw2setup()` in this project? You can also (re-)install core migrations  with `create_core_migrations()`".format(
-                migration
-            )
-        )
-    migration_data = Migration(migration).load()
+    compiled = _compile_migration(migration)
+    for ds in db:
+        for exc in ds.get("exchanges", []):
+            _migrate_exchange(exc, compiled)
+    return db
 
-    to_dict = lambda x: dict(zip(migration_data["fields"], x))
 
-    # Create dict of lookup fields to new data. There shouldn't be
-    # duplicates for the lookup fields, as they will be overwritten
-    # during mapping creation.
-    mapping = {
-        activity_hash(to_dict(obj[0]), fields=migration_data["fields"]): obj[1]
-        for obj in migration_data["data"]
-    }
+def migrate_many(db, migrations, datasets=True, exchanges=True):
+    """Apply several migrations in one pass over ``db``.
 
+    Gives the same result as calling ``migrate_datasets`` (if ``datasets``) and ``migrate_exchanges`` (if ``exchanges``) for each migration in ``migrations`` in turn, but each dataset and exchange is only visited once.
+
+    To use this function as a strategy, you will need to curry it first using ``functools.partial``."""
+    compiled = [_compile_migration(migration) for migration in migrations]
     for ds in db:
-        for exc in ds.get("exchanges", []):
-            try:
-                new_data = mapping[activity_hash(exc, fields=migration_data["fields"])]
-            except KeyError:
-                # This exchange is not in the list to be migrated
-                continue
-            for field, value in new_data.items():
-                if field == "multiplier":
-                    rescale_exchange(exc, value)
-                else:
-                    exc[field] = value
+        if datasets:
+            for obj in compiled:
+                _migrate_dataset(ds, obj)
+        if exchanges:
+            for exc in ds.get("exchanges", []):
+                for obj in compiled:
+                    _migrate_exchange(exc, obj)
     return db
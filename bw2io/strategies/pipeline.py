@@ -0,0 +1,240 @@
+"""Declare strategies as dataset or exchange transforms, so they can be fused.
+
+Most strategies only look at one dataset, or one exchange, at a time. Writing them with one of the decorators in this module still gives a normal strategy which takes and returns the whole database, but also lets ``ImportBase.apply_strategies(fuse=True)`` combine consecutive transforms into a single pass over the data.
+
+The decorated function changes its argument in place; any other arguments given to the strategy are passed along:
+
+* ``dataset_transform``: ``func(ds, ...)`` is called for each dataset.
+* ``exchange_transform``: ``func(exc, ...)`` is called for each exchange.
+* ``exchange_filter``: ``func(exc, ...)`` is called for each exchange; exchanges for which it returns a falsey value are removed.
+
+Like a loop over ``ds["exchanges"]``, exchange transforms and filters raise ``KeyError`` for datasets without ``exchanges``. Use e.g. ``@exchange_transform(skip_missing=True)`` to skip these datasets instead.
+
+Transforms must only use the dataset or exchange they are given, and must not raise ``StrategyError``. Strategies which need the whole database (e.g. linking) are applied on their own, and act as barriers between fused passes.
+
+Transforms are also shard-safe: ``ImportBase.apply_strategies(processes=...)`` can split the data into shards and apply them in a process pool (see ``apply_sharded``). Other strategies which give the same result when applied to parts of the database can be marked with ``shard_safe``.
+
+"""
+import functools
+import math
+import multiprocessing
+
+from ..parallel import imap_ordered
+
+DATASET = "dataset"
+EXCHANGE = "exchange"
+EXCHANGE_FILTER = "exchange filter"
+
+# Strategies which can be applied to any part of the database
+SHARD_SAFE = set()
+
+
+def _declare(kind, func, strategy, skip_missing=False):
+    # Not ``functools.update_wrapper``, as ``__wrapped__`` would make
+    # ``inspect.signature`` show the signature of ``func``. The module and
+    # qualified name let ``pickle`` find the strategy in worker processes.
+    for attr in ("__module__", "__name__", "__qualname__", "__doc__"):
+        setattr(strategy, attr, getattr(func, attr))
+    strategy.transform = (kind, func)
+    strategy.skip_missing = skip_missing
+    SHARD_SAFE.add(strategy)
+    return strategy
+
+
+def shard_safe(strategy):
+    """Mark ``strategy`` as safe to apply separately to shards of the database.
+
+    Shard-safe strategies only look at one dataset at a time, so that applying them to consecutive slices of the database and concatenating the results is the same as applying them to the whole database. They are run in worker processes, so they must be importable, and can't depend on the current project. Dataset and exchange transforms are shard-safe automatically."""
+    SHARD_SAFE.add(strategy)
+    return strategy
+
+
+def is_shard_safe(strategy):
+    """Check if ``strategy`` is shard-safe. Works with strategies curried with keyword arguments."""
+    if isinstance(strategy, functools.partial):
+        if strategy.args:
+            return False
+        strategy = strategy.func
+    return strategy in SHARD_SAFE
+
+
+def dataset_transform(func):
+    def strategy(db, *args, **kwargs):
+        for ds in db:
+            func(ds, *args, **kwargs)
+        return db
+
+    return _declare(DATASET, func, strategy)
+
+
+def exchange_transform(func=None, skip_missing=False):
+    if func is None:
+        return functools.partial(exchange_transform, skip_missing=skip_missing)
+
+    def strategy(db, *args, **kwargs):
+        for ds in db:
+            if skip_missing and "exchanges" not in ds:
+                continue
+            for exc in ds["exchanges"]:
+                func(exc, *args, **kwargs)
+        return db
+
+    return _declare(EXCHANGE, func, strategy, skip_missing)
+
+
+def exchange_filter(func=None, skip_missing=False):
+    if func is None:
+        return functools.partial(exchange_filter, skip_missing=skip_missing)
+
+    def strategy(db, *args, **kwargs):
+        for ds in db:
+            if skip_missing and "exchanges" not in ds:
+                continue
+            ds["exchanges"] = [
+                exc for exc in ds["exchanges"] if func(exc, *args, **kwargs)
+            ]
+        return db
+
+    return _declare(EXCHANGE_FILTER, func, strategy, skip_missing)
+
+
+def get_transform(strategy):
+    """Return ``(kind, func)`` if ``strategy`` can be fused, otherwise ``None``.
+
+    Works with strategies curried with keyword arguments using ``functools.partial``."""
+    kwargs = {}
+    if isinstance(strategy, functools.partial):
+        if strategy.args:
+            return None
+        kwargs = strategy.keywords
+        strategy = strategy.func
+    try:
+        kind, func = strategy.transform
+    except AttributeError:
+        return None
+    return kind, (functools.partial(func, **kwargs) if kwargs else func)
+
+
+def _skips_missing(strategy):
+    if isinstance(strategy, functools.partial):
+        strategy = strategy.func
+    return getattr(strategy, "skip_missing", False)
+
+
+def group_strategies(strategies, predicate=None):
+    """Split ``strategies`` into lists of consecutive fusable strategies.
+
+    Strategies which can't be fused are returned in lists by themselves. Pass a different ``predicate``, e.g. ``is_shard_safe``, to group on something else."""
+    if predicate is None:
+        predicate = lambda x: get_transform(x) is not None
+    groups, current = [], []
+    for strategy in strategies:
+        if not predicate(strategy):
+            if current:
+                groups.append(current)
+                current = []
+            groups.append([strategy])
+        else:
+            current.append(strategy)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def fuse(strategies):
+    """Create one strategy which applies all ``strategies`` in a single pass over the data.
+
+    Each of ``strategies`` must be a transform (see ``get_transform``). For each dataset, transforms are applied in order; consecutive exchange transforms and filters are applied together in a single loop over the exchanges."""
+    segments = []
+    for strategy in strategies:
+        kind, func = get_transform(strategy)
+        step = (kind, func, _skips_missing(strategy))
+        if kind == DATASET:
+            segments.append((DATASET, func))
+        elif segments and segments[-1][0] != DATASET:
+            segments[-1][1].append(step)
+        else:
+            segments.append((EXCHANGE, [step]))
+    # Only rebuild exchange lists if something can be removed. Datasets without
+    # exchanges are skipped only if all steps of an exchange pass skip them.
+    segments = [
+        (kind, obj)
+        if kind == DATASET
+        else (
+            EXCHANGE_FILTER
+            if any(step[0] == EXCHANGE_FILTER for step in obj)
+            else EXCHANGE,
+            ([(step[0], step[1]) for step in obj], all(step[2] for step in obj)),
+        )
+        for kind, obj in segments
+    ]
+
+    def apply_to_exchange(exc, steps):
+        for kind, func in steps:
+            if kind == EXCHANGE:
+                func(exc)
+            elif not func(exc):
+                return False
+        return True
+
+    def fused(db):
+        for ds in db:
+            for kind, obj in segments:
+                if kind == DATASET:
+                    obj(ds)
+                    continue
+                steps, skip_missing = obj
+                if skip_missing and "exchanges" not in ds:
+                    continue
+                elif kind == EXCHANGE_FILTER:
+                    ds["exchanges"] = [
+                        exc
+                        for exc in ds["exchanges"]
+                        if apply_to_exchange(exc, steps)
+                    ]
+                else:
+                    for exc in ds["exchanges"]:
+                        apply_to_exchange(exc, steps)
+        return db
+
+    return fused
+
+
+def _apply_to_shard(shard, strategies):
+    for group in group_strategies(strategies):
+        strategy = fuse(group) if len(group) > 1 else group[0]
+        shard = strategy(shard)
+    return shard
+
+
+def apply_sharded(db, strategies, processes=None, start_method=None):
+    """Apply shard-safe ``strategies`` to ``db`` in a process pool.
+
+    ``db`` is split into consecutive shards, a few per worker. Each worker applies all ``strategies`` to its shards, fusing transforms, and the results are joined in their original order. The datasets in the returned list are copies, not the objects in ``db``.
+
+    Args:
+        * *db* (list): Data to transform.
+        * *strategies* (list): Shard-safe strategies (see ``shard_safe``).
+        * *processes* (int, optional): Number of worker processes. Default is the number of CPUs.
+        * *start_method* (str, optional): Multiprocessing start method.
+
+    Returns:
+        A new list of datasets.
+
+    """
+    if not db:
+        return db
+    processes = processes or multiprocessing.cpu_count()
+    size = max(1, math.ceil(len(db) / (processes * 4)))
+    shards = [db[i : i + size] for i in range(0, len(db), size)]
+    result = []
+    for shard in imap_ordered(
+        _apply_to_shard,
+        shards,
+        args=(list(strategies),),
+        processes=processes,
+        chunksize=1,
+        start_method=start_method,
+    ):
+        result.extend(shard)
+    return result
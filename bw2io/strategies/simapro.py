@@ -15,12 +15,14 @@ from ..data import get_valid_geonames
 from ..utils import load_json_data_file, rescale_exchange
 from .generic import link_iterable_by_fields, link_technosphere_by_activity_hash
 from .locations import GEO_UPDATE
+from .pipeline import dataset_transform, exchange_transform, shard_safe
 
 # Pattern for SimaPro munging of ecoinvent names
 detoxify_pattern = "^(?P<name>.+?)/(?P<geo>[A-Za-z]{2,10})(/I)? [SU]$"
 detoxify_re = re.compile(detoxify_pattern)
 
 
+@shard_safe
 def sp_allocate_products(db):
     """Create a dataset from each product in a raw SimaPro dataset"""
     new_db = []
@@ -82,28 +84,25 @@ def sp_allocate_products(db):
     return new_db
 
 
-def fix_zero_allocation_products(db):
+@dataset_transform
+def fix_zero_allocation_products(ds):
     """Drop all inputs from allocated products which had zero allocation factors.
 
     The final production amount is the initial amount times the allocation factor. If this is zero, a singular technosphere matrix is created. We fix this by setting the production amount to one, and deleting all inputs.
 
     Does not modify datasets with more than one production exchange."""
-    for ds in db:
-        if (
-            len([exc for exc in ds.get("exchanges", []) if exc["type"] == "production"])
-            == 1
-        ) and all(
-            exc["amount"] == 0
-            for exc in ds.get("exchanges", [])
-            if exc["type"] == "production"
-        ):
-            ds["exchanges"] = [
-                exc for exc in ds["exchanges"] if exc["type"] == "production"
-            ]
-            exc = ds["exchanges"][0]
-            exc["amount"] = exc["loc"] = 1
-            exc["uncertainty type"] = 0
-    return db
+    if (
+        len([exc for exc in ds.get("exchanges", []) if exc["type"] == "production"])
+        == 1
+    ) and all(
+        exc["amount"] == 0
+        for exc in ds.get("exchanges", [])
+        if exc["type"] == "production"
+    ):
+        ds["exchanges"] = [exc for exc in ds["exchanges"] if exc["type"] == "production"]
+        exc = ds["exchanges"][0]
+        exc["amount"] = exc["loc"] = 1
+        exc["uncertainty type"] = 0
 
 
 def link_technosphere_based_on_name_unit_location(db, external_db_name=None):
@@ -115,27 +114,27 @@ def link_technosphere_based_on_name_unit_location(db, external_db_name=None):
     )
 
 
-def split_simapro_name_geo(db):
+@dataset_transform
+def split_simapro_name_geo(ds):
     """Split a name like 'foo/CH U' into name and geo components.
 
     Sets original name to ``simapro name``."""
-    for ds in db:
-        match = detoxify_re.match(ds["name"])
+    match = detoxify_re.match(ds["name"])
+    if match:
+        gd = match.groupdict()
+        ds["simapro name"] = ds["name"]
+        ds["location"] = gd["geo"]
+        ds["name"] = ds["reference product"] = gd["name"]
+    for exc in ds.get("exchanges", []):
+        match = detoxify_re.match(exc["name"])
         if match:
             gd = match.groupdict()
-            ds["simapro name"] = ds["name"]
-            ds["location"] = gd["geo"]
-            ds["name"] = ds["reference product"] = gd["name"]
-        for exc in ds.get("exchanges", []):
-            match = detoxify_re.match(exc["name"])
-            if match:
-                gd = match.groupdict()
-                exc["simapro name"] = exc["name"]
-                exc["location"] = gd["geo"]
-                exc["name"] = gd["name"]
-    return db
+            exc["simapro name"] = exc["name"]
+            exc["location"] = gd["geo"]
+            exc["name"] = gd["name"]
 
 
+@shard_safe
 def normalize_simapro_biosphere_categories(db):
     """Normalize biosphere categories to ecoinvent standard."""
     for ds in db:
@@ -153,6 +152,7 @@ def normalize_simapro_biosphere_categories(db):
     return db
 
 
+@shard_safe
 def normalize_simapro_biosphere_names(db):
     """Normalize biosphere flow names to ecoinvent standard"""
     mapping = {tuple(x[:2]): x[2] for x in load_json_data_file("simapro-biosphere")}
@@ -185,9 +185,16 @@ iff_exp = re.compile(
 )
 
 
+decimal_comma_exp = re.compile(r"\d,\d")
+
+
 def fix_iff_formula(string):
-    while iff_exp.findall(string):
-        match = next(iff_exp.finditer(string))
+    if "iff" not in string.lower():
+        return string
+    while True:
+        match = iff_exp.search(string)
+        if match is None:
+            break
         string = (
             string[: match.start()]
             + "(({when_true}) if ({condition}) else ({when_false}))".format(
@@ -205,25 +212,24 @@ def normalize_simapro_formulae(formula, settings):
         return match.group(0).replace(",", ".")
 
     formula = formula.replace("^", "**")
-    if settings and settings.get("Decimal separator") == ",":
-        formula = re.sub("\d,\d", replace_comma, formula)
+    if settings and settings.get("Decimal separator") == "," and "," in formula:
+        formula = decimal_comma_exp.sub(replace_comma, formula)
     formula = fix_iff_formula(formula)
     return formula
 
 
-def change_electricity_unit_mj_to_kwh(db):
+@exchange_transform(skip_missing=True)
+def change_electricity_unit_mj_to_kwh(exc):
     """Change datasets with the string ``electricity`` in their name from units of MJ to kilowatt hour."""
-    for ds in db:
-        for exc in ds.get("exchanges", []):
-            if (
-                exc.get("name", "").lower().startswith("electricity")
-                or exc.get("name", "").lower().startswith("market for electricity")
-            ) and exc.get("unit") == "megajoule":
-                exc["unit"] = "kilowatt hour"
-                rescale_exchange(exc, 1 / 3.6)
-    return db
+    if (
+        exc.get("name", "").lower().startswith("electricity")
+        or exc.get("name", "").lower().startswith("market for electricity")
+    ) and exc.get("unit") == "megajoule":
+        exc["unit"] = "kilowatt hour"
+        rescale_exchange(exc, 1 / 3.6)
 
 
+@shard_safe
 def fix_localized_water_flows(db):
     """Change ``Water, BR`` to ``Water``.
 
@@ -262,13 +268,11 @@ def fix_localized_water_flows(db):
     return db
 
 
-def set_lognormal_loc_value_uncertainty_safe(db):
+@exchange_transform(skip_missing=True)
+def set_lognormal_loc_value_uncertainty_safe(exc):
     """Make sure ``loc`` value is correct for lognormal uncertainty distributions"""
-    for ds in db:
-        for exc in ds.get("exchanges", []):
-            if exc.get("uncertainty type") == LognormalUncertainty.id:
-                exc["loc"] = np.log(abs(exc["amount"]))
-    return db
+    if exc.get("uncertainty type") == LognormalUncertainty.id:
+        exc["loc"] = np.log(abs(exc["amount"]))
 
 
 def flip_sign_on_waste(db, other):
@@ -0,0 +1,191 @@
+from bw2data import databases, geomapping
+from bw2data.backends import ActivityDataset, ExchangeDataset, sqlite3_lci_db
+from bw2data.backends.utils import dict_as_activitydataset, dict_as_exchangedataset
+from bw2data.errors import InvalidExchange, UntypedExchange
+
+try:
+    from bw2data.utils import set_correct_process_type
+except ImportError:
+    # Older versions of bw2data don't change process types on write
+    set_correct_process_type = lambda ds: ds
+
+try:
+    from bw2data.search import IndexManager
+except ImportError:
+    IndexManager = None
+
+# Number of codes per query; SQLite limits the number of variables in a query
+BATCH_SIZE = 500
+# Number of exchange rows per insert, with six fields per row
+EXCHANGE_BATCH_SIZE = 125
+
+
+def _batches(lst, size=BATCH_SIZE):
+    for i in range(0, len(lst), size):
+        yield lst[i : i + size]
+
+
+def _stored_documents(name, codes):
+    """Get activity and exchange documents for ``codes`` in database ``name``.
+
+    Returns ``{code: (activity data, [exchange data])}``."""
+    stored = {
+        code: (data, [])
+        for code, data in ActivityDataset.select(
+            ActivityDataset.code, ActivityDataset.data
+        )
+        .where(ActivityDataset.database == name, ActivityDataset.code << codes)
+        .tuples()
+    }
+    for code, data in (
+        ExchangeDataset.select(ExchangeDataset.output_code, ExchangeDataset.data)
+        .where(
+            ExchangeDataset.output_database == name,
+            ExchangeDataset.output_code << codes,
+        )
+        .order_by(ExchangeDataset.id)
+        .tuples()
+    ):
+        if code in stored:
+            stored[code][1].append(data)
+    return stored
+
+
+def _prepare(ds):
+    """Apply the same changes to ``ds`` as ``Database.write``"""
+    ds = set_correct_process_type(ds)
+    for exc in ds.get("exchanges", []):
+        if "output" not in exc:
+            exc["output"] = (ds["database"], ds["code"])
+    return ds
+
+
+def _compare(ds, stored):
+    """Return whether the activity document and the exchanges of ``ds`` are unchanged"""
+    if stored is None:
+        return False, False
+    activity, exchanges = stored
+    return (
+        activity == {k: v for k, v in ds.items() if k != "exchanges"},
+        exchanges == ds.get("exchanges", []),
+    )
+
+
+def _find_changes(db, data):
+    """Like ``find_changes``, but also returns the set of codes of changed datasets whose exchanges changed"""
+    existing = {
+        code
+        for (code,) in ActivityDataset.select(ActivityDataset.code)
+        .where(ActivityDataset.database == db.name)
+        .tuples()
+    }
+    new, changed, unchanged = [], [], []
+    exchanges_changed = set()
+    candidates = []
+    for ds in data:
+        ds = _prepare(ds)
+        if ds["code"] in existing:
+            candidates.append(ds)
+        else:
+            new.append(ds)
+    for batch in _batches(candidates):
+        stored = _stored_documents(db.name, [ds["code"] for ds in batch])
+        for ds in batch:
+            same_activity, same_exchanges = _compare(ds, stored.get(ds["code"]))
+            if same_activity and same_exchanges:
+                unchanged.append(ds)
+            else:
+                changed.append(ds)
+                if not same_exchanges:
+                    exchanges_changed.add(ds["code"])
+    return new, changed, unchanged, exchanges_changed
+
+
+def find_changes(db, data):
+    """Split ``data`` into new, changed and unchanged datasets, compared to ``db``.
+
+    Only the codes of all activities in ``db`` are loaded; the stored documents of activities which are also in ``data`` are then loaded in batches and compared.
+
+    Args:
+        * *db* (``Database``): Existing SQLite database.
+        * *data* (list): Datasets to write. Will be modified in the same way as ``Database.write`` would.
+
+    Returns:
+        Lists of new, changed, and unchanged datasets.
+
+    """
+    return _find_changes(db, data)[:3]
+
+
+def _exchange_rows(ds):
+    rows = []
+    for exc in ds.get("exchanges", []):
+        if "input" not in exc or "amount" not in exc:
+            raise InvalidExchange
+        if "type" not in exc:
+            raise UntypedExchange
+        rows.append(dict_as_exchangedataset(exc))
+    return rows
+
+
+def upsert_database(db, data, process=True):
+    """Insert new and update changed activities in existing SQLite database ``db``.
+
+    Unlike ``Database.write``, which deletes and rewrites everything, activities already in ``db`` which aren't in ``data``, or are identical to their version in ``data``, are left alone, and neither the existing database nor the changes are built up in memory. Changed activities are updated in place, so they keep their ids. Their exchanges are only deleted and written again if they changed. All changes are written in batches in a single transaction.
+
+    Args:
+        * *db* (``Database``): Existing database using the ``sqlite`` backend.
+        * *data* (list): Datasets to write, with ``database`` and ``code``.
+        * *process* (bool): Process the database after writing. Default is ``True``.
+
+    Returns:
+        Dictionary with the number of ``new``, ``changed`` and ``unchanged`` activities.
+
+    """
+    new, changed, unchanged, exchanges_changed = _find_changes(db, data)
+    to_write = changed + new
+
+    if to_write:
+        with sqlite3_lci_db.db.atomic():
+            exchanges = []
+            for ds in changed:
+                row = dict_as_activitydataset(
+                    {k: v for k, v in ds.items() if k != "exchanges"}
+                )
+                ActivityDataset.update(**row).where(
+                    ActivityDataset.database == db.name,
+                    ActivityDataset.code == ds["code"],
+                ).execute()
+                if ds["code"] in exchanges_changed:
+                    exchanges.extend(_exchange_rows(ds))
+            for batch in _batches(sorted(exchanges_changed)):
+                ExchangeDataset.delete().where(
+                    ExchangeDataset.output_database == db.name,
+                    ExchangeDataset.output_code << batch,
+                ).execute()
+            for batch in _batches(exchanges, EXCHANGE_BATCH_SIZE):
+                ExchangeDataset.insert_many(batch).execute()
+
+            exchanges, activities = [], []
+            for ds in new:
+                exchanges, activities = db._efficient_write_dataset(
+                    ds, exchanges, activities
+                )
+            if activities:
+                ActivityDataset.insert_many(activities).execute()
+            if exchanges:
+                ExchangeDataset.insert_many(exchanges).execute()
+
+        geomapping.add({ds["location"] for ds in to_write if ds.get("location")})
+        if IndexManager is not None and databases[db.name].get("searchable"):
+            index = IndexManager(db.filename)
+            for ds in changed:
+                index.delete_dataset(ds)
+            index.add_datasets(to_write)
+
+        databases[db.name]["number"] = len(db)
+        databases.set_modified(db.name)
+        if process:
+            db.process()
+
+    return {"new": len(new), "changed": len(changed), "unchanged": len(unchanged)}
@@ -1,15 +1,50 @@
+import functools
 import hashlib
-import json
 import os
 import pprint
 from numbers import Number
 
 from stats_arrays import *
 
+from . import json_codec
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 DEFAULT_FIELDS = ("name", "categories", "unit", "reference product", "location")
 
 
-def activity_hash(data, fields=None, case_insensitive=True):
+def _md5(string):
+    return hashlib.md5(string.encode("utf-8")).hexdigest()
+
+
+def _blake2b(string):
+    return hashlib.blake2b(string.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _xxhash(string):
+    if xxhash is None:
+        raise ImportError("The `xxhash` hash algorithm requires the `xxhash` library")
+    return xxhash.xxh3_128_hexdigest(string.encode("utf-8"))
+
+
+# MD5 is the default, and is needed to reproduce codes stored in existing
+# databases. ``xxhash`` is a much faster non-cryptographic hash.
+HASH_ALGORITHMS = {
+    "md5": _md5,
+    "blake2b": _blake2b,
+    "xxhash": _xxhash,
+}
+
+
+@functools.lru_cache(maxsize=2**16)
+def _hash_key(key, algorithm):
+    return HASH_ALGORITHMS[algorithm](u"".join(key))
+
+
+def activity_hash(data, fields=None, case_insensitive=True, algorithm="md5"):
     """Hash an activity dataset.
 
     Used to import data formats like ecospold 1 (ecoinvent v1-2) and SimaPro, where no unique attributes for datasets are given. This is clearly an imperfect and brittle solution, but there is no other obvious approach at this time.
@@ -29,22 +64,51 @@ def activity_hash(data, fields=None, case_insensitive=True):
         * *data* (dict): The :ref:`activity dataset data <database-documents>`.
         * *fields* (list): Optional list of fields to hash together. Default is ``('name', 'categories', 'unit', 'reference product', 'location')``.
         * *case_insensitive* (bool): Cast everything to lowercase before computing hash. Default is ``True``.
+        * *algorithm* (str): One of ``HASH_ALGORITHMS``. Default is ``md5``; only ``md5`` gives the same codes as earlier versions. ``xxhash`` is fastest, but requires the ``xxhash`` library.
+
+    Hashes are memoized on the normalized field values, so hashing many exchanges with the same values is cheap.
 
     Returns:
-        A MD5 hash string, hex-encoded.
+        A hash string, hex-encoded.
 
     """
-    lower = lambda x: x.lower() if case_insensitive else x
+    return _hash_key(activity_key(data, fields, case_insensitive), algorithm)
 
-    def get_value(obj, field):
-        if isinstance(data.get(field), (list, tuple)):
-            return lower("".join(data.get(field) or []))
-        else:
-            return lower(data.get(field) or "")
 
-    fields = fields or DEFAULT_FIELDS
-    string = u"".join([get_value(data, field) for field in fields])
-    return str(hashlib.md5(string.encode("utf-8")).hexdigest())
+def activity_hashes(iterable, fields=None, case_insensitive=True, algorithm="md5"):
+    """Compute ``activity_hash`` for each dataset in ``iterable``.
+
+    Returns a list of hex-encoded hash strings in the same order. Each distinct combination of field values is only hashed once.
+
+    """
+    hasher = HASH_ALGORITHMS[algorithm]
+    fields = tuple(fields or DEFAULT_FIELDS)
+    seen = {}
+    result = []
+    for data in iterable:
+        key = activity_key(data, fields, case_insensitive)
+        try:
+            result.append(seen[key])
+        except KeyError:
+            result.append(seen.setdefault(key, hasher(u"".join(key))))
+    return result
+
+
+def activity_key(data, fields=None, case_insensitive=True):
+    """Normalized values of ``fields`` in ``data``, as used by ``activity_hash``.
+
+    Lists and tuples are joined together, missing values are replaced with an empty string, and everything is cast to lower case if ``case_insensitive``. Returns a tuple which can be used as a dictionary key instead of the hash itself.
+
+    """
+    values = []
+    for field in fields or DEFAULT_FIELDS:
+        value = data.get(field)
+        if isinstance(value, (list, tuple)):
+            value = "".join(value or [])
+        else:
+            value = value or ""
+        values.append(value.lower() if case_insensitive else value)
+    return tuple(values)
 
 
 def es2_activity_hash(activity, flow):
@@ -58,7 +122,7 @@ def load_json_data_file(filename):
     DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
     if filename[-5:] != ".json":
         filename = filename + ".json"
-    return json.load(open(os.path.join(DATA_DIR, filename), encoding="utf-8"))
+    return json_codec.load(os.path.join(DATA_DIR, filename))
 
 
 def format_for_logging(obj):
@@ -19,3 +19,11 @@ def pytest_collection_modifyitems(config, items):
     for item in items:
         if "slow" in item.keywords:
             item.add_marker(skip_slow)
+
+
+@pytest.fixture(autouse=True)
+def bw2io_user_dirs(tmp_path_factory, monkeypatch):
+    """Don't write caches and snapshots to the user directories during tests"""
+    dirpath = tmp_path_factory.getbasetemp()
+    monkeypatch.setenv("BW2IO_CACHE_DIR", str(dirpath / "cache"))
+    monkeypatch.setenv("BW2IO_SNAPSHOT_DIR", str(dirpath / "snapshots"))
@@ -0,0 +1,50 @@
+"""Build the setup bundle shipped with ``bw2io``, and check that it will be packaged.
+
+Usage: python dev/build_setup_bundle.py [--check]
+
+Run before each release, and commit the bundle. With ``--check``, the existing bundle isn't rebuilt, only verified; the script exits with an error if the bundle is missing, doesn't validate, or isn't matched by ``package_data`` in ``setup.py``."""
+import fnmatch
+import os
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+os.environ["BRIGHTWAY2_DIR"] = tempfile.mkdtemp()
+
+from bw2io.setup_bundle import (
+    build_setup_bundle,
+    read_setup_bundle,
+    setup_bundle_filepath,
+)
+
+ROOT = Path(__file__).parent.parent
+# Keep in sync with ``package_data`` in ``setup.py``
+PACKAGE_DATA = ["data/*.*", "data/examples/*.*", "data/lci/*.*", "data/lcia/*.*"]
+
+
+def main(check=False):
+    filepath = setup_bundle_filepath()
+    if not check:
+        build_setup_bundle(filepath)
+    if not filepath.is_file():
+        sys.exit("Setup bundle {} is missing".format(filepath))
+    with warnings.catch_warnings():
+        # A bundle built by another ``bw2io`` version is stale
+        warnings.simplefilter("error")
+        manifest = read_setup_bundle(filepath)[0]
+    member = filepath.relative_to(ROOT / "bw2io").as_posix()
+    if not any(fnmatch.fnmatch(member, pattern) for pattern in PACKAGE_DATA):
+        sys.exit("Setup bundle {} isn't included in package_data".format(member))
+    print(
+        "Setup bundle {} ({:.1f} MB) is valid: bw2io {}, biosphere {}".format(
+            member,
+            filepath.stat().st_size / 1e6,
+            manifest["bw2io"],
+            manifest["biosphere version"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(check="--check" in sys.argv[1:])
@@ -0,0 +1,153 @@
+"""Compare the JSON backends of ``bw2io.json_codec`` on the JSON paths used by ``bw2io``.
+
+Usage: python dev/json_benchmark.py [repeats]
+
+Each path is timed with every installed backend; the best of ``repeats`` runs is shown in milliseconds. BW2Package, migration, and setup bundle paths use a temporary Brightway data directory."""
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+os.environ["BRIGHTWAY2_DIR"] = tempfile.mkdtemp()
+
+from bw2data import Database, projects
+
+from bw2io import json_codec
+from bw2io.data import get_default_lcia_methods_data
+from bw2io.migrations import Migration, get_core_migrations_data
+from bw2io.package import BW2Package
+from bw2io.setup_bundle import read_setup_bundle, write_setup_bundle
+from bw2io.extractors.json_ld import JSONLDExtractor
+from bw2io.utils import load_json_data_file
+
+ROOT = Path(__file__).parent.parent
+DATA = ROOT / "bw2io" / "data"
+JSON_LD = ROOT / "tests" / "fixtures" / "json-ld"
+
+
+def read_lcia_archive():
+    with zipfile.ZipFile(DATA / "lcia" / "lcia_39_ecoinvent.zip") as archive:
+        return json_codec.loads(archive.read("data.json"))
+
+
+def read_data_files():
+    for name in ("chemid_cache", "simapro-biosphere", "exiomigration", "us-lci"):
+        load_json_data_file(name)
+
+
+def read_json_ld():
+    for dirpath in JSON_LD.iterdir():
+        if dirpath.is_dir():
+            JSONLDExtractor.extract(dirpath)
+
+
+def write_lcia_data(dirpath, data):
+    json_codec.dump(data, Path(dirpath) / "data.json")
+
+
+def create_database(name="json-benchmark", size=2000):
+    """Create a database with ``size`` activities and 10 exchanges per activity"""
+    data = {
+        (name, str(i)): {
+            "name": "activity {}".format(i),
+            "unit": "kilogram",
+            "location": "GLO",
+            "categories": ("a", "b"),
+            "comment": None,
+            "exchanges": [
+                {
+                    "input": (name, str((i + j) % size)),
+                    "amount": 0.5 + j,
+                    "type": "technosphere",
+                    "uncertainty type": 2,
+                    "loc": 0.1,
+                    "scale": 0.2,
+                    "minimum": None,
+                }
+                for j in range(10)
+            ],
+        }
+        for i in range(size)
+    }
+    db = Database(name)
+    db.write(data)
+    return db
+
+
+def write_migrations(migrations):
+    for name, description, data in migrations:
+        Migration(name).write(data, description)
+
+
+def load_migrations(migrations):
+    for name, _, _ in migrations:
+        Migration(name).load()
+
+
+def setup_bundle_data(methods):
+    """Biosphere flows for the characterization factors in ``methods``"""
+    codes = sorted({cf["input"][1] for method in methods for cf in method["exchanges"]})
+    return [
+        {"code": code, "name": code, "categories": ("air",), "unit": "kilogram"}
+        for code in codes
+    ]
+
+
+def best_of(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(repeats=5):
+    lcia_data = read_lcia_archive()
+    projects.set_current("json-benchmark")
+    db = create_database()
+    migrations = get_core_migrations_data()
+    methods = get_default_lcia_methods_data()
+    biosphere = setup_bundle_data(methods)
+    with tempfile.TemporaryDirectory() as dirpath:
+        package_fp = BW2Package.export_obj(db, folder=dirpath, package_format=2)
+        bundle_fp = Path(dirpath) / "bundle.zip"
+        write_bundle = lambda: write_setup_bundle(
+            bundle_fp, biosphere, methods, migrations, "benchmark"
+        )
+        write_bundle()
+        # Chunks are parsed in this process, as workers use the default backend
+        paths = {
+            "LCIA archive (read)": read_lcia_archive,
+            "Data files (read)": read_data_files,
+            "JSON-LD fixtures (read)": read_json_ld,
+            "LCIA data (write)": lambda: write_lcia_data(dirpath, lcia_data),
+            "BW2Package (export)": lambda: BW2Package.export_obj(
+                db, folder=dirpath, package_format=2, processes=1
+            ),
+            "BW2Package (load)": lambda: BW2Package.load_file(
+                package_fp, processes=1
+            ),
+            "Migrations (write)": lambda: write_migrations(migrations),
+            "Migrations (load)": lambda: load_migrations(migrations),
+            "Setup bundle (write)": write_bundle,
+            "Setup bundle (read)": lambda: read_setup_bundle(bundle_fp),
+        }
+        backends = json_codec.available_backends()
+        print("{:<28}".format("Path") + "".join("{:>12}".format(b) for b in backends))
+        for label, func in paths.items():
+            row = []
+            for backend in backends:
+                json_codec.set_backend(backend)
+                row.append(best_of(func, repeats) * 1000)
+            print(
+                "{:<28}".format(label)
+                + "".join("{:>12.1f}".format(t) for t in row)
+            )
+    json_codec.set_backend()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
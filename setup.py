@@ -9,6 +9,8 @@ REQUIREMENTS = [
     "mrio_common_metadata",
     "numpy",
     "openpyxl",
+    "pandas",
+    "platformdirs",
     "psutil",
     "pyprind",
     "requests",
@@ -21,6 +23,16 @@ REQUIREMENTS = [
     "xlsxwriter",
 ]
 
+# Optional libraries which make some operations faster
+EXTRAS_REQUIREMENTS = {
+    "json": ["orjson", "pysimdjson"],
+    "xxhash": ["xxhash"],
+    "zstd": ["zstandard"],
+}
+EXTRAS_REQUIREMENTS["all"] = sorted(
+    {name for names in EXTRAS_REQUIREMENTS.values() for name in names}
+)
+
 v_temp = {}
 with open("bw2io/version.py") as fp:
     exec(fp.read(), v_temp)
@@ -48,6 +60,7 @@ setup(
     author_email="cmutel@gmail.com",
     license="BSD 3-clause",
     install_requires=REQUIREMENTS,
+    extras_require=EXTRAS_REQUIREMENTS,
     url="https://github.com/brightway-lca/brightway2-io",
     long_description=open("README.rst").read(),
     description=("Tools for importing and export life cycle inventory databases"),
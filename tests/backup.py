@@ -0,0 +1,283 @@
+import gzip
+import io
+import os
+import tarfile
+import zlib
+from pathlib import Path
+
+import pytest
+from bw2data import Database, Method, databases, methods, projects
+from bw2data.tests import bw2test
+from bw_processing import safe_filename
+
+from bw2io import backup, json_codec
+from bw2io.backup import (
+    SnapshotStore,
+    backup_data_directory,
+    backup_project_directory,
+    restore_project_directory,
+    restore_project_snapshot,
+    snapshot_project_directory,
+)
+
+
+def create_project():
+    projects.set_current("backed up")
+    db = Database("food", backend="sqlite")
+    db.write(
+        {
+            ("food", "lunch"): {
+                "name": "lunch",
+                "type": "process",
+                "exchanges": [
+                    {"input": ("food", "lunch"), "amount": 1, "type": "production"}
+                ],
+            },
+            ("food", "dinner"): {"name": "dinner", "type": "process", "exchanges": []},
+        }
+    )
+    method = Method(("a", "method"))
+    method.register()
+    method.write([(("food", "lunch"), 1)])
+    projects.set_current("default")
+
+
+def restore_deleted(fp):
+    projects.delete_project("backed up", delete_dir=True)
+    assert "backed up" not in projects
+    assert restore_project_directory(fp) == "backed up"
+    assert projects.current == "default"
+    projects.set_current("backed up")
+
+
+@bw2test
+def test_backup_restore(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BLOCK_SIZE", 1000)
+    create_project()
+    fp = backup_project_directory("backed up", threads=2, dirpath=str(tmp_path))
+    assert fp.endswith(".tar.gz")
+
+    with gzip.open(fp) as f:
+        f.read()
+    with tarfile.open(fp, "r:gz") as tar:
+        names = tar.getnames()
+    assert names[0] == safe_filename("backed up") + "/.project-name.json"
+    assert any("/processed/" in name for name in names)
+
+    restore_deleted(fp)
+    assert len(Database("food")) == 2
+    assert Method(("a", "method")).load() == [(Database("food").get("lunch").id, 1)]
+
+
+@bw2test
+def test_backup_exclude_caches(tmp_path):
+    create_project()
+    fp = backup_project_directory(
+        "backed up", exclude_caches=True, dirpath=str(tmp_path)
+    )
+    with tarfile.open(fp, "r:gz") as tar:
+        names = tar.getnames()
+    assert not any("/processed/" in name for name in names)
+    assert not any("/search/" in name for name in names)
+
+    restore_deleted(fp)
+    assert os.path.isfile(Database("food").filepath_processed())
+    assert os.path.isfile(Method(("a", "method")).filepath_processed())
+    assert Database("food").search("dinner")[0]["name"] == "dinner"
+
+
+@bw2test
+def test_restore_version_1_archive(tmp_path):
+    create_project()
+    arcname = safe_filename("backed up")
+    fp = str(tmp_path / "old.tar.gz")
+    with tarfile.open(fp, "w:gz") as tar:
+        tar.add(os.path.join(projects._base_data_dir, arcname), arcname=arcname)
+        payload = b'{"name": "backed up"}'
+        info = tarfile.TarInfo(arcname + "/.project-name.json")
+        info.size = len(payload)
+        tar.addfile(info, io.BytesIO(payload))
+
+    restore_deleted(fp)
+    assert len(Database("food")) == 2
+
+
+@bw2test
+def test_backup_compression(tmp_path):
+    create_project()
+    with pytest.raises(ValueError):
+        backup_project_directory("backed up", compression="foo", dirpath=str(tmp_path))
+    if backup.zstandard is None:
+        with pytest.raises(ImportError):
+            backup_project_directory(
+                "backed up", compression="zstd", dirpath=str(tmp_path)
+            )
+    else:
+        fp = backup_project_directory(
+            "backed up", compression="zstd", dirpath=str(tmp_path)
+        )
+        assert fp.endswith(".tar.zst")
+        restore_deleted(fp)
+        assert len(Database("food")) == 2
+
+
+@bw2test
+def test_backup_failure_cleans_up(tmp_path, monkeypatch):
+    create_project()
+    writers = []
+    compressed_writer = backup._compressed_writer
+
+    def record_writer(*args):
+        writers.append(compressed_writer(*args))
+        return writers[-1]
+
+    def fail(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(backup, "_compressed_writer", record_writer)
+    monkeypatch.setattr(tarfile.TarFile, "add", fail)
+    with pytest.raises(OSError):
+        backup_project_directory("backed up", dirpath=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+    assert writers[0].closed
+    assert writers[0].executor._shutdown
+
+
+@bw2test
+def test_backup_data_directory(tmp_path):
+    fp = backup_data_directory(dirpath=str(tmp_path))
+    with tarfile.open(fp, "r:gz") as tar:
+        assert tar.getnames()
+
+
+@bw2test
+def test_snapshot_restore(tmp_path):
+    create_project()
+    store = SnapshotStore(tmp_path / "store")
+    first = backup_project_directory("backed up", dirpath=store.dirpath, snapshot=True)
+    num_chunks = len(list((store.dirpath / "chunks").glob("*/*")))
+    assert num_chunks
+
+    # Unchanged project: no new chunks
+    second = snapshot_project_directory("backed up", store)
+    assert second != first
+    assert len(list((store.dirpath / "chunks").glob("*/*"))) == num_chunks
+    assert json_codec.load(first)["files"] == json_codec.load(second)["files"]
+
+    projects.set_current("backed up")
+    Database("food").new_activity(code="breakfast", name="breakfast").save()
+    projects.set_current("default")
+    third = snapshot_project_directory("backed up", store)
+    assert store.snapshots("backed up") == [first, second, third]
+
+    assert restore_project_snapshot(first, "old") == "old"
+    projects.set_current("old")
+    assert len(Database("food")) == 2
+    projects.set_current("default")
+
+    restore_deleted(third)
+    assert len(Database("food")) == 3
+    with pytest.raises(ValueError):
+        restore_project_snapshot(third)
+
+
+def test_snapshot_store_default_dirpath(monkeypatch):
+    assert SnapshotStore().dirpath == Path(os.environ["BW2IO_SNAPSHOT_DIR"])
+    monkeypatch.delenv("BW2IO_SNAPSHOT_DIR")
+    dirpath = SnapshotStore().dirpath
+    assert dirpath.name == "snapshots"
+    assert Path(projects._base_data_dir) not in dirpath.parents
+
+
+@bw2test
+def test_snapshot_missing_chunks(tmp_path):
+    create_project()
+    store = SnapshotStore(tmp_path)
+    first = snapshot_project_directory("backed up", store)
+    for obj in json_codec.load(first)["files"]:
+        for digest in obj["chunks"]:
+            store.chunk_filepath(digest).unlink(missing_ok=True)
+
+    # Unchanged files are read again if their chunks are gone
+    second = snapshot_project_directory("backed up", store)
+    assert json_codec.load(first)["files"] == json_codec.load(second)["files"]
+    restore_deleted(second)
+    assert len(Database("food")) == 2
+
+
+def overwrite_keeping_stat(fp, payload):
+    stat = fp.stat()
+    assert len(payload) == stat.st_size
+    fp.write_bytes(payload)
+    os.utime(fp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+@bw2test
+def test_snapshot_reads_changed_files(tmp_path):
+    create_project()
+    store = SnapshotStore(tmp_path)
+    dir_path = Path(projects._base_data_dir) / safe_filename("backed up")
+    (dir_path / "notes.txt").write_bytes(b"old")
+    first = snapshot_project_directory("backed up", store)
+    files = {obj["path"]: obj for obj in json_codec.load(first)["files"]}
+    db_path = next(path for path in files if path.endswith(".db"))
+
+    overwrite_keeping_stat(dir_path / "notes.txt", b"new")
+    payload = (dir_path / db_path).read_bytes()
+    overwrite_keeping_stat(dir_path / db_path, payload[:-1] + b"x")
+
+    # SQLite files are always read again, other files only with ``verify``
+    second = snapshot_project_directory("backed up", store)
+    changed = {obj["path"]: obj for obj in json_codec.load(second)["files"]}
+    assert changed[db_path]["chunks"] != files[db_path]["chunks"]
+    assert changed["notes.txt"]["chunks"] == files["notes.txt"]["chunks"]
+
+    third = backup_project_directory(
+        "backed up", dirpath=store.dirpath, snapshot=True, verify=True
+    )
+    changed = {obj["path"]: obj for obj in json_codec.load(third)["files"]}
+    assert changed["notes.txt"]["chunks"] != files["notes.txt"]["chunks"]
+
+
+@bw2test
+def test_snapshot_exclude_caches(tmp_path):
+    create_project()
+    fp = snapshot_project_directory("backed up", tmp_path, exclude_caches=True)
+    paths = [obj["path"] for obj in json_codec.load(fp)["files"]]
+    assert not any(path.startswith(("processed/", "search/")) for path in paths)
+    restore_deleted(fp)
+    assert os.path.isfile(Database("food").filepath_processed())
+
+
+@bw2test
+def test_snapshot_prune(tmp_path):
+    create_project()
+    store = SnapshotStore(tmp_path)
+    first = snapshot_project_directory("backed up", store)
+    projects.set_current("backed up")
+    Database("food").new_activity(code="breakfast", name="breakfast").save()
+    projects.set_current("default")
+    second = snapshot_project_directory("backed up", store)
+    assert store.prune() == (0, 0)
+
+    num_chunks = len(list((store.dirpath / "chunks").glob("*/*")))
+    removed_snapshots, removed_chunks = store.prune(keep=1)
+    assert removed_snapshots == 1
+    assert 0 < removed_chunks < num_chunks
+    assert store.snapshots() == [second]
+    assert not first.exists()
+
+    restore_deleted(second)
+    assert len(Database("food")) == 3
+
+
+@bw2test
+def test_snapshot_corrupted_chunk(tmp_path):
+    create_project()
+    store = SnapshotStore(tmp_path)
+    fp = snapshot_project_directory("backed up", store)
+    digest = json_codec.load(fp)["files"][0]["chunks"][0]
+    with open(store.chunk_filepath(digest), "wb") as f:
+        f.write(zlib.compress(b"something else"))
+    with pytest.raises(ValueError):
+        restore_project_snapshot(fp, "other")
@@ -2,7 +2,9 @@ import pytest
 from bw2data import Database, config
 from bw2data.tests import bw2test
 
+from bw2io import LinkIndex
 from bw2io.importers.base_lcia import LCIAImporter
+from bw2io.strategies import link_iterable_by_fields
 
 from .fixtures import biosphere as biosphere_data
 
@@ -57,3 +59,32 @@ def test_add_missing_cfs():
     assert toys["unit"] == "kilogram"
     assert toys["database"] == "biosphere"
     assert len(toys._data.keys()) == 7
+
+
+@bw2test
+def test_link_index_built_when_linking():
+    initial_biosphere()
+    LinkIndex.clear_cache()
+    imp = LCIAImporter("fake", biosphere="biosphere")
+    assert not LinkIndex._cache
+    imp.data = [
+        {
+            "exchanges": [
+                {
+                    "name": "an emission",
+                    "categories": ("things",),
+                    "unit": "kg",
+                    "amount": 1,
+                    "type": "biosphere",
+                }
+            ]
+        }
+    ]
+    link = next(
+        obj
+        for obj in imp.strategies
+        if getattr(obj, "func", None) is link_iterable_by_fields
+    )
+    imp.apply_strategy(link)
+    assert imp.data[0]["exchanges"][0]["input"][0] == "biosphere"
+    assert LinkIndex._cache
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+import pytest
+
 from bw2io.extractors.ecospold2 import Ecospold2DataExtractor
 
 FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "ecospold2"
@@ -276,3 +278,35 @@ def test_extraction_with_synonyms():
     }
     print(data[0])
     assert data[0] == expected
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "00000_11111111-2222-3333-4444-555555555555_66666666-7777-8888-9999-000000000000.spold",
+        "00000_11111111-2222-3333-4444-555555555555_66666666-7777-8888-9999-000000000000_with_synonyms.spold",
+    ],
+)
+def test_iterparse_engine_same_as_objectify(filename):
+    expected = Ecospold2DataExtractor.extract(
+        str(FIXTURES / filename), "ei", use_mp=False, engine="objectify"
+    )
+    data = Ecospold2DataExtractor.extract(
+        str(FIXTURES / filename), "ei", use_mp=False, engine="iterparse"
+    )
+    assert data == expected
+
+
+def test_iterparse_engine_directory():
+    data = Ecospold2DataExtractor.extract(
+        FIXTURES, "ei", use_mp=False, engine="iterparse"
+    )
+    assert sorted(ds["filename"] for ds in data) == sorted(
+        ds["filename"]
+        for ds in Ecospold2DataExtractor.extract(FIXTURES, "ei", use_mp=False)
+    )
+
+
+def test_extract_unknown_engine():
+    with pytest.raises(ValueError):
+        Ecospold2DataExtractor.extract(FIXTURES, "ei", engine="foo")
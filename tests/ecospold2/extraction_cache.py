@@ -0,0 +1,94 @@
+import os
+import shutil
+from pathlib import Path
+
+from bw2data import projects
+
+from bw2io.extractors.cache import ExtractionCache, get_cache, user_cache_dirpath
+from bw2io.extractors.ecospold2 import Ecospold2DataExtractor
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "ecospold2"
+
+
+def copy_fixtures(tmp_path):
+    dirpath = tmp_path / "spold"
+    shutil.copytree(FIXTURES, dirpath)
+    return dirpath
+
+
+def test_cache_warm_extraction_same_data(tmp_path):
+    dirpath = copy_fixtures(tmp_path)
+    expected = Ecospold2DataExtractor.extract(str(dirpath), "ei", use_mp=False)
+
+    cache = ExtractionCache(tmp_path / "cache")
+    cold = Ecospold2DataExtractor.extract(
+        str(dirpath), "ei", use_mp=False, cache=cache
+    )
+    assert cache.misses == 2 and cache.hits == 0
+
+    cache = ExtractionCache(tmp_path / "cache")
+    warm = Ecospold2DataExtractor.extract(
+        str(dirpath), "other", use_mp=False, cache=cache
+    )
+    assert cache.hits == 2 and cache.misses == 0
+    assert cold == expected
+    for ds in expected:
+        ds["database"] = "other"
+    assert warm == expected
+
+
+def test_cache_reparses_changed_files(tmp_path):
+    dirpath = copy_fixtures(tmp_path)
+    cache = ExtractionCache(tmp_path / "cache")
+    Ecospold2DataExtractor.extract(str(dirpath), "ei", use_mp=False, cache=cache)
+
+    filepath = sorted(dirpath.iterdir())[0]
+    filepath.write_text(filepath.read_text().replace("Germans", "Swiss"))
+    os.utime(filepath, ns=(0, 0))
+
+    cache = ExtractionCache(tmp_path / "cache")
+    data = Ecospold2DataExtractor.extract(
+        str(dirpath), "ei", use_mp=False, cache=cache
+    )
+    assert cache.hits == 1 and cache.misses == 1
+    assert any("Swiss" in ds["comment"] for ds in data)
+
+
+def test_cache_unchanged_contents_not_reparsed(tmp_path):
+    dirpath = copy_fixtures(tmp_path)
+    cache = ExtractionCache(tmp_path / "cache")
+    Ecospold2DataExtractor.extract(str(dirpath), "ei", use_mp=False, cache=cache)
+
+    for filepath in dirpath.iterdir():
+        os.utime(filepath, ns=(0, 0))
+
+    cache = ExtractionCache(tmp_path / "cache")
+    Ecospold2DataExtractor.extract(str(dirpath), "ei", use_mp=False, cache=cache)
+    assert cache.hits == 2 and cache.misses == 0
+
+
+def test_cache_lru_eviction(tmp_path):
+    dirpath = copy_fixtures(tmp_path)
+    cache = ExtractionCache(tmp_path / "cache", max_size=1)
+    Ecospold2DataExtractor.extract(str(dirpath), "ei", use_mp=False, cache=cache)
+    assert not cache.blobs
+    assert not list((tmp_path / "cache").glob("*.pickle.zlib"))
+
+
+def test_get_cache(tmp_path):
+    assert get_cache(False) is None
+    cache = ExtractionCache(tmp_path)
+    assert get_cache(cache) is cache
+    assert get_cache(tmp_path).dirpath == tmp_path
+
+
+def test_default_cache_dirpath(tmp_path, monkeypatch):
+    monkeypatch.setenv("BW2IO_CACHE_DIR", str(tmp_path))
+    assert user_cache_dirpath("extraction") == tmp_path / "extraction"
+    assert ExtractionCache().dirpath == tmp_path / "extraction"
+
+    monkeypatch.delenv("BW2IO_CACHE_DIR")
+    dirpath = user_cache_dirpath("extraction")
+    assert dirpath.name == "extraction"
+    # Not deleted by ``projects.purge_deleted_directories``
+    assert Path(projects._base_data_dir) not in dirpath.parents
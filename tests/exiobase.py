@@ -0,0 +1,432 @@
+import bz2
+import collections
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from bw2io import download_utils
+from bw2io.extractors import cache as cache_module
+from bw2io.extractors.cache import ArrayCache, get_array_cache
+from bw2io.extractors.exiobase import Exiobase3MonetaryDataExtractor as EX
+from bw2io.importers.exiobase3_hybrid import Exiobase3HybridImporter
+from bw2io.importers.exiobase3_monetary import Exiobase3MonetaryImporter
+
+A = """region\t\tAT\tAT\tDE
+sector\t\tWheat (01)\tSteel\tWheat (01)
+region\tsector\t\t\t
+AT\tWheat (01)\t0.5\t0\t1e-16
+AT\tSteel\t\t0.25\t0.1
+DE\tWheat (01)\t-2\t0.0\t3
+"""
+
+S = """region\tAT\tAT\tDE
+stressor\tWheat (01)\tSteel\tWheat (01)
+CO2\t1\t0\t2
+Water\t1e-20\t\t0.5
+"""
+
+UNIT = """region\tsector\tunit
+AT\tWheat (01)\tM.EUR
+AT\tSteel\tM.EUR
+DE\tWheat (01)\tM.EUR
+"""
+
+SATELLITE_UNIT = """stressor\tunit
+CO2\tkg
+Water\tMm3
+"""
+
+
+def write_files(dirpath):
+    (dirpath / "satellite").mkdir()
+    (dirpath / "A.txt").write_text(A)
+    (dirpath / "unit.txt").write_text(UNIT)
+    (dirpath / "satellite" / "S.txt").write_text(S)
+    (dirpath / "satellite" / "unit.txt").write_text(SATELLITE_UNIT)
+    return dirpath
+
+
+TECHNOSPHERE = [
+    (("Wheat", "AT"), ("Wheat", "AT"), 0.5),
+    (("Steel", "AT"), ("Steel", "AT"), 0.25),
+    (("Steel", "AT"), ("Wheat", "DE"), 0.1),
+    (("Wheat", "DE"), ("Wheat", "AT"), -2),
+    (("Wheat", "DE"), ("Wheat", "DE"), 3),
+]
+
+BIOSPHERE = [
+    ("CO2", ("Wheat", "AT"), 1),
+    ("CO2", ("Wheat", "DE"), 2),
+    ("Water", ("Wheat", "DE"), 0.5),
+]
+
+
+def test_technosphere_iterator(tmp_path):
+    dirpath = write_files(tmp_path)
+    assert list(EX.get_technosphere_iterator(dirpath, 3)) == TECHNOSPHERE
+    result = list(EX.get_technosphere_iterator(dirpath, 3, False))
+    assert result[1] == (("Wheat", "AT"), ("Wheat", "DE"), 1e-16)
+    assert len(result) == 6
+
+
+def test_biosphere_iterator(tmp_path):
+    dirpath = write_files(tmp_path)
+    assert list(EX.get_biosphere_iterator(dirpath)) == BIOSPHERE
+    result = list(EX.get_biosphere_iterator(dirpath, False))
+    assert ("Water", ("Wheat", "AT"), 1e-20) in result
+    assert len(result) == 4
+
+
+def test_technosphere_matrix(tmp_path):
+    matrix = EX.get_technosphere_matrix(write_files(tmp_path))
+    assert matrix.row_labels == [("Wheat", "AT"), ("Steel", "AT"), ("Wheat", "DE")]
+    assert matrix.col_labels == matrix.row_labels
+    assert matrix.rows.tolist() == [0, 1, 1, 2, 2]
+    assert matrix.cols.tolist() == [0, 1, 2, 0, 2]
+    assert np.allclose(matrix.values, [0.5, 0.25, 0.1, -2, 3])
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 1000])
+def test_read_matrix_block_size(tmp_path, block_size):
+    dirpath = write_files(tmp_path)
+    matrix = EX._read_matrix(dirpath / "A.txt", 2, True, block_size=block_size)
+    assert matrix.rows.tolist() == [0, 1, 1, 2, 2]
+    assert matrix.cols.tolist() == [0, 1, 2, 0, 2]
+    assert len(matrix.row_labels) == 3
+
+
+def write_zipfile(tmp_path):
+    (tmp_path / "IOT_2011_ixi").mkdir()
+    write_files(tmp_path / "IOT_2011_ixi")
+    zip_path = tmp_path / "data.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for path in sorted((tmp_path / "IOT_2011_ixi").rglob("*.txt")):
+            zf.write(path, path.relative_to(tmp_path))
+    return zip_path
+
+
+def test_biosphere_matrix_zipfile(tmp_path):
+    zip_path = write_zipfile(tmp_path)
+    matrix = EX.get_biosphere_matrix(zip_path)
+    assert matrix.row_labels == ["CO2", "Water"]
+    assert list(EX._iterate_matrix(matrix)) == BIOSPHERE
+    assert EX.get_flows(zip_path) == {"CO2": "kg", "Water": "Mm3"}
+
+
+def as_tuples(arrays):
+    return [
+        (row, col, amount, flip)
+        for row, col, amount, flip in zip(
+            arrays["indices_array"]["row"].tolist(),
+            arrays["indices_array"]["col"].tolist(),
+            arrays["data_array"].tolist(),
+            arrays["flip_array"].tolist(),
+        )
+    ]
+
+
+PRODUCTS = {("Wheat", "AT"): 1, ("Steel", "AT"): 2, ("Wheat", "DE"): 3}
+
+
+def test_monetary_technosphere_arrays(tmp_path):
+    imp = Exiobase3MonetaryImporter(write_files(tmp_path), "exio")
+    expected = [(PRODUCTS[x], PRODUCTS[y], z, True) for x, y, z in TECHNOSPHERE]
+    expected += [(x, x, 1, False) for x in PRODUCTS.values()]
+    assert as_tuples(imp.technosphere_arrays(PRODUCTS)) == expected
+
+
+def test_monetary_biosphere_arrays(tmp_path):
+    imp = Exiobase3MonetaryImporter(write_files(tmp_path), "exio")
+    arrays = imp.biosphere_arrays(
+        {"CO2": 10, "Water": 11}, {"CO2": 2, "Water": 1e6}, PRODUCTS
+    )
+    assert as_tuples(arrays) == [
+        (10, 1, 2, False),
+        (10, 3, 4, False),
+        (11, 3, 5e5, False),
+    ]
+
+
+def test_monetary_biosphere_arrays_missing_flow(tmp_path):
+    imp = Exiobase3MonetaryImporter(write_files(tmp_path), "exio")
+    with pytest.raises(KeyError):
+        imp.biosphere_arrays({"CO2": 10}, {"CO2": 2}, PRODUCTS)
+
+
+def write_resource(dirpath, name, rows):
+    with bz2.open(dirpath / (name + ".csv.bz2"), "wt") as f:
+        for row in rows:
+            f.write(",".join(str(x) for x in row) + "\n")
+
+
+def metadata_resource(name, fields):
+    return {
+        "name": name,
+        "path": name + ".csv.bz2",
+        "schema": {"fields": [{"name": field} for field in fields]},
+    }
+
+
+def numeric_resource(name, row_resource, col_resource):
+    resource = metadata_resource(name, ["row", "col", "amount"])
+    resource["foreignKeys"] = [
+        {"fields": "row", "reference": {"resource": row_resource, "fields": "id"}},
+        {"fields": "col", "reference": {"resource": col_resource, "fields": "id"}},
+    ]
+    return resource
+
+
+def write_hybrid_files(dirpath):
+    resources = [
+        metadata_resource("activities", ["id", "name"]),
+        metadata_resource("products", ["id", "name", "unit"]),
+        metadata_resource("extensions", ["id", "name", "compartment"]),
+        numeric_resource("production-exchanges", "products", "activities"),
+        numeric_resource("hiot", "products", "activities"),
+        numeric_resource("extension-exchanges", "extensions", "activities"),
+    ]
+    with open(dirpath / "datapackage.json", "w") as f:
+        json.dump({"resources": resources}, f)
+    write_resource(dirpath, "activities", [("A1", "Wheat (01)"), ("A2", "Steel")])
+    write_resource(
+        dirpath, "products", [("P1", "Wheat", "tonnes"), ("P2", "Steel", "tonnes")]
+    )
+    write_resource(
+        dirpath,
+        "extensions",
+        [("E1", "CO2", "air"), ("E2", "Land", ""), ("E3", "Water", "")],
+    )
+    write_resource(dirpath, "production-exchanges", [("P1", "A1", 5), ("P2", "A2", 0)])
+    write_resource(
+        dirpath, "hiot", [("P1", "A2", 0.5), ("P2", "A1", 0.25), ("P2", "A2", 1)]
+    )
+    write_resource(
+        dirpath,
+        "extension-exchanges",
+        [("E1", "A1", 2), ("E2", "A2", 4), ("E3", "A1", 1), ("E1", "A2", 3)],
+    )
+    return dirpath
+
+
+Flow = collections.namedtuple("Flow", ["id", "key"])
+
+
+def get_hybrid_importer(dirpath):
+    imp = Exiobase3HybridImporter(write_hybrid_files(dirpath), "hybrid")
+    co2 = Flow(10, ("bio", "co2"))
+    co2_fossil = Flow(11, ("bio", "fossil"))
+    land = Flow(12, ("bio", "land"))
+    imp.get_biosphere_correspondence = lambda: {
+        ("CO2", "air"): [(co2, 0.5), (co2_fossil, 0.5)],
+        ("Land", ""): [(land, 1e4)],
+    }
+    return imp
+
+
+def test_hybrid_arrays_same_as_exchanges(tmp_path):
+    imp = get_hybrid_importer(tmp_path)
+    activity_ids = {"A1": 1, "A2": 2}
+    ids = {
+        ("hybrid", "A1"): 1,
+        ("hybrid", "A2"): 2,
+        ("bio", "co2"): 10,
+        ("bio", "fossil"): 11,
+        ("bio", "land"): 12,
+    }
+    expected = collections.defaultdict(list)
+    for exc in imp.exchanges:
+        flip = exc["type"] == "technosphere"
+        expected[exc["type"]].append(
+            (ids[exc["input"]], ids[exc["output"]], exc["amount"], flip)
+        )
+
+    assert as_tuples(imp.production_arrays(activity_ids)) == expected["production"]
+    assert as_tuples(imp.technosphere_arrays(activity_ids)) == expected["technosphere"]
+    assert as_tuples(imp.biosphere_arrays(activity_ids)) == expected["biosphere"]
+    assert expected["biosphere"] == [
+        (10, 1, 1, False),
+        (11, 1, 1, False),
+        (12, 2, 4e4, False),
+        (10, 2, 1.5, False),
+        (11, 2, 1.5, False),
+    ]
+
+
+def test_array_cache(tmp_path):
+    (tmp_path / "source.txt").write_text("foo")
+    cache = ArrayCache(tmp_path / "cache")
+    filepath = tmp_path / "source.txt"
+    assert cache.get_arrays(filepath, "A") is None
+    assert cache.get_json(filepath, "labels") is None
+    assert cache.misses == 2
+
+    cache.set_arrays(filepath, "A", {"values": np.arange(3)}, {"foo": [1, 2]})
+    cache.set_json(filepath, "labels", ["a", "b"])
+    arrays, metadata = cache.get_arrays(filepath, "A")
+    assert isinstance(arrays["values"], np.memmap)
+    assert arrays["values"].tolist() == [0, 1, 2]
+    assert metadata == {"foo": [1, 2]}
+    assert cache.get_json(filepath, "labels") == ["a", "b"]
+
+    # Entries are keyed by file contents, not location
+    shutil.copy(filepath, tmp_path / "copy.txt")
+    other = ArrayCache(tmp_path / "cache")
+    assert other.get_json(tmp_path / "copy.txt", "labels") == ["a", "b"]
+    (tmp_path / "copy.txt").write_text("bar")
+    assert other.get_json(tmp_path / "copy.txt", "labels") is None
+
+    cache.clear()
+    assert cache.get_json(filepath, "labels") is None
+
+
+def test_get_array_cache(tmp_path):
+    assert get_array_cache(False) is None
+    cache = ArrayCache(tmp_path)
+    assert get_array_cache(cache) is cache
+    assert get_array_cache(tmp_path).dirpath == cache.dirpath
+
+
+def test_array_cache_default_dirpath(tmp_path, monkeypatch):
+    monkeypatch.setenv("BW2IO_CACHE_DIR", str(tmp_path))
+    assert ArrayCache().dirpath.parent == tmp_path / "arrays"
+
+
+def test_array_cache_download(tmp_path, monkeypatch):
+    calls = []
+
+    def download(url, filename=None, dirpath=None):
+        calls.append(url)
+        filepath = Path(dirpath) / filename
+        filepath.write_bytes(url.encode("utf-8"))
+        return filepath
+
+    monkeypatch.setattr(download_utils, "download_with_progressbar", download)
+    cache = ArrayCache(tmp_path / "cache")
+    url = "https://example.com/files/IOT_2017_ixi.zip?download=1"
+    filepath = cache.download(url)
+    assert filepath.name == "IOT_2017_ixi.zip"
+    assert filepath.read_bytes() == url.encode("utf-8")
+    assert cache.download(url) == filepath
+    assert calls == [url]
+    assert [fp.name for fp in filepath.parent.iterdir()] == [filepath.name]
+
+    other = cache.download(url.replace("2017", "2018"))
+    assert other.parent != filepath.parent
+    assert len(calls) == 2
+
+    # Unchanged downloads aren't hashed again
+    digest = cache.digest(filepath)
+    monkeypatch.setattr(cache_module, "file_digest", None)
+    assert cache.digest(filepath) == digest
+
+
+def test_array_cache_index_drops_deleted_files(tmp_path):
+    cache = ArrayCache(tmp_path / "cache")
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    first.write_text("foo")
+    second.write_text("bar")
+    cache.digest(first)
+    first.unlink()
+    cache.digest(second)
+    assert list(cache._load_index()) == [str(second)]
+
+
+def test_array_cache_evicts_least_recently_used(tmp_path):
+    files = []
+    for name in "abc":
+        files.append(tmp_path / (name + ".txt"))
+        files[-1].write_text(name)
+    first, second, third = files
+    other = ArrayCache(tmp_path / "cache")
+    other.set_arrays(first, "A", {"v": np.zeros(100)})
+    other.set_arrays(second, "A", {"v": np.zeros(100)})
+    os.utime(other.entry_dirpath(first), (0, 0))
+    os.utime(other.entry_dirpath(second), (1, 1))
+    cache = ArrayCache(tmp_path / "cache", max_size=2000)
+    assert cache.size > 1600
+    # Reading ``first`` makes ``second`` the least recently used entry
+    assert cache.get_arrays(first, "A") is not None
+    cache.set_arrays(third, "A", {"v": np.zeros(100)})
+    assert cache.get_arrays(second, "A") is None
+    assert cache.get_arrays(first, "A") is not None
+    assert cache.get_arrays(third, "A") is not None
+
+    # Entries used by this instance are never deleted
+    cache.max_size = 0
+    cache.evict()
+    assert cache.get_arrays(first, "A") is not None
+    unused = ArrayCache(tmp_path / "cache", max_size=0)
+    unused.evict()
+    assert unused.size == 0
+
+
+def test_extractor_cache(tmp_path):
+    zip_path = write_zipfile(tmp_path)
+    cache = ArrayCache(tmp_path / "cache")
+    matrix = EX.get_technosphere_matrix(zip_path, cache=cache)
+    products = EX.get_products(zip_path, cache=cache)
+    assert cache.hits == 0
+
+    cached = EX.get_technosphere_matrix(zip_path, cache=cache)
+    assert isinstance(cached.values, np.memmap)
+    assert cached.row_labels == matrix.row_labels
+    assert cached.col_labels == matrix.col_labels
+    assert cached.rows.tolist() == matrix.rows.tolist()
+    assert cached.values.tolist() == matrix.values.tolist()
+    assert EX.get_products(zip_path, cache=cache) == products
+    assert list(EX.get_biosphere_iterator(zip_path, cache=cache)) == BIOSPHERE
+    assert cache.hits == 2
+
+    # Different threshold is cached separately
+    assert len(EX.get_technosphere_matrix(zip_path, False, cache).values) == 6
+
+
+def test_extractor_cache_ignores_directories(tmp_path):
+    cache = ArrayCache(tmp_path / "cache")
+    dirpath = tmp_path / "data"
+    dirpath.mkdir()
+    write_files(dirpath)
+    assert list(EX.get_biosphere_iterator(dirpath, cache=cache)) == BIOSPHERE
+    assert cache.hits == cache.misses == 0
+
+
+def test_monetary_importer_cache(tmp_path):
+    zip_path = write_zipfile(tmp_path)
+    first = Exiobase3MonetaryImporter(zip_path, "exio", cache=tmp_path / "cache")
+    expected = as_tuples(first.technosphere_arrays(PRODUCTS))
+
+    second = Exiobase3MonetaryImporter(zip_path, "exio", cache=tmp_path / "cache")
+    assert second.products == first.products
+    assert second.flows == first.flows
+    assert as_tuples(second.technosphere_arrays(PRODUCTS)) == expected
+    assert second.cache.hits == 3
+
+
+def test_exiobase_monetary_uses_cached_download(tmp_path, monkeypatch):
+    import bw2io
+
+    imported = []
+
+    class FakeImporter:
+        def __init__(self, filepath, name, ignore_small_balancing_corrections, cache):
+            imported.append((filepath, cache))
+
+        def apply_strategies(self):
+            pass
+
+        def write_database(self):
+            pass
+
+    monkeypatch.setattr(bw2io, "Exiobase3MonetaryImporter", FakeImporter)
+    monkeypatch.setattr(ArrayCache, "download", lambda self, url: url)
+    bw2io.exiobase_monetary(name="exio")
+    filepath, cache = imported[0]
+    assert isinstance(cache, ArrayCache)
+    assert filepath == (
+        "https://zenodo.org/record/4588235/files/IOT_2017_ixi.zip?download=1"
+    )
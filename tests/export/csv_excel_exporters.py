@@ -226,3 +226,31 @@ def test_excel_export_no_params(setup):
     ProjectParameter.delete().execute()
     assert not ProjectParameter.select().count()
     write_lci_csv("example")
+
+
+def test_formatted_data_is_lazy(setup):
+    from bw2io.export.csv import CSVFormatter
+
+    consumed = []
+
+    def objs():
+        for act in Database("example"):
+            consumed.append(act["code"])
+            yield act
+
+    rows = CSVFormatter("example", objs()).iterate_formatted_data()
+    for row in rows:
+        if row and row[0] == "Activity":
+            break
+    assert len(consumed) == 1
+    assert len(list(rows)) > 0
+    assert len(consumed) == 2
+
+
+def test_iterate_database(setup):
+    from bw2io.export.csv import iterate_database
+
+    assert sorted(act["code"] for act in iterate_database(Database("example"))) == [
+        "A",
+        "B",
+    ]
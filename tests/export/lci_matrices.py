@@ -0,0 +1,162 @@
+import csv
+
+import numpy as np
+import openpyxl
+import pytest
+import scipy.io
+import scipy.sparse
+from bw2data import Database
+from bw2data.tests import bw2test
+
+from bw2io.export.excel import lci_matrices_to_excel
+from bw2io.export.matrices import get_lci_matrices, lci_matrices_to_files
+
+
+@pytest.fixture
+@bw2test
+def setup():
+    Database("bio").write(
+        {
+            ("bio", "co2"): {
+                "name": "CO2",
+                "unit": "kg",
+                "categories": ("air", "urban"),
+                "type": "emission",
+            },
+            ("bio", "unused"): {"name": "Unused", "type": "emission"},
+            ("bio", "cancelled"): {"name": "Cancelled", "type": "emission"},
+        }
+    )
+    Database("upstream").write(
+        {
+            ("upstream", "u"): {
+                "name": "Upstream",
+                "unit": "MJ",
+                "exchanges": [
+                    {"input": ("upstream", "u"), "amount": 1, "type": "production"},
+                    {"input": ("bio", "co2"), "amount": 0.5, "type": "biosphere"},
+                ],
+            }
+        }
+    )
+    Database("db").write(
+        {
+            ("db", "b"): {
+                "name": "Beta",
+                "unit": "kg",
+                "location": "CH",
+                "reference product": "beta product",
+                "exchanges": [
+                    {"input": ("db", "b"), "amount": 1, "type": "production"},
+                    {"input": ("db", "a"), "amount": 2, "type": "technosphere"},
+                    {"input": ("upstream", "u"), "amount": 3, "type": "technosphere"},
+                    {"input": ("bio", "co2"), "amount": 4, "type": "biosphere"},
+                    # Two references which add up to zero
+                    {"input": ("bio", "cancelled"), "amount": 1, "type": "biosphere"},
+                    {"input": ("bio", "cancelled"), "amount": -1, "type": "biosphere"},
+                ],
+            },
+            ("db", "a"): {
+                "name": "Alpha",
+                "unit": "kg",
+                "exchanges": [
+                    {"input": ("db", "a"), "amount": 1, "type": "production"},
+                ],
+            },
+        }
+    )
+
+
+def keys(labels):
+    return [(ds["database"], ds["code"]) for ds in labels]
+
+
+def test_get_lci_matrices(setup):
+    matrices = get_lci_matrices("db")
+    expected = [("db", "a"), ("db", "b"), ("upstream", "u")]
+    assert keys(matrices.activities) == expected
+    assert keys(matrices.products) == expected
+    assert keys(matrices.flows) == [("bio", "co2")]
+    assert np.allclose(
+        matrices.technosphere.toarray(), [[1, -2, 0], [0, 1, 0], [0, -3, 1]]
+    )
+    assert np.allclose(matrices.biosphere.toarray(), [[0, 4, 0.5]])
+    assert matrices.flows[0]["categories"] == ("air", "urban")
+    assert matrices.activities[1]["reference product"] == "beta product"
+
+
+def test_get_lci_matrices_exclude_descendants(setup):
+    matrices = get_lci_matrices("db", include_descendants=False)
+    assert keys(matrices.activities) == [("db", "a"), ("db", "b")]
+    assert keys(matrices.products) == [("db", "a"), ("db", "b"), ("upstream", "u")]
+    assert matrices.technosphere.shape == (3, 2)
+    assert np.allclose(matrices.biosphere.toarray(), [[0, 4]])
+
+
+def test_lci_matrices_to_excel(setup, tmp_path):
+    filepath = lci_matrices_to_excel("db", dirpath=tmp_path)
+    workbook = openpyxl.load_workbook(filepath, read_only=True)
+    assert workbook.sheetnames == [
+        "technosphere",
+        "biosphere",
+        "technosphere-labels",
+        "biosphere-labels",
+    ]
+    rows = list(workbook["technosphere"].values)
+    assert rows[0] == (None, "Alpha", "Beta", "Upstream")
+    assert rows[1] == ("Alpha", 1, -2, None)
+    assert rows[3] == ("Upstream", None, -3, 1)
+    assert list(workbook["biosphere"].values) == [
+        (None, "Alpha", "Beta", "Upstream"),
+        ("CO2", None, 4, 0.5),
+    ]
+    assert list(workbook["technosphere-labels"].values)[2] == (
+        2,
+        "Beta",
+        "beta product",
+        "kg",
+        None,
+        "CH",
+    )
+    assert list(workbook["biosphere-labels"].values) == [
+        ("Index", "Name", "Unit", "Categories"),
+        (1, "CO2", "kg", "air - urban"),
+    ]
+
+
+@pytest.mark.parametrize("matrix_format", ["npz", "mtx"])
+def test_lci_matrices_to_files(setup, tmp_path, matrix_format):
+    dirpath = lci_matrices_to_files("db", dirpath=tmp_path, matrix_format=matrix_format)
+    if matrix_format == "npz":
+        technosphere = scipy.sparse.load_npz(dirpath / "technosphere.npz")
+        biosphere = scipy.sparse.load_npz(dirpath / "biosphere.npz")
+    else:
+        technosphere = scipy.io.mmread(str(dirpath / "technosphere.mtx"))
+        biosphere = scipy.io.mmread(str(dirpath / "biosphere.mtx"))
+    matrices = get_lci_matrices("db")
+    assert np.allclose(technosphere.toarray(), matrices.technosphere.toarray())
+    assert np.allclose(biosphere.toarray(), matrices.biosphere.toarray())
+
+    with open(dirpath / "flows.csv", newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [
+            [
+                "index",
+                "database",
+                "code",
+                "name",
+                "reference product",
+                "unit",
+                "categories",
+                "location",
+            ],
+            ["0", "bio", "co2", "CO2", "", "kg", "air::urban", ""],
+        ]
+    with open(dirpath / "activities.csv", newline="", encoding="utf-8") as f:
+        assert [row[2] for row in csv.reader(f)] == ["code", "a", "b", "u"]
+
+
+def test_lci_matrices_to_files_invalid_format(setup, tmp_path):
+    with pytest.raises(ValueError):
+        lci_matrices_to_files("db", dirpath=tmp_path, matrix_format="xlsx")
+    with pytest.raises(ValueError):
+        lci_matrices_to_files("db", dirpath=tmp_path, label_format="json")
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from bw2data import Database, databases
+from bw2data.backends.iotable import IOTableBackend
+from bw2data.tests import bw2test
+
+from bw2io.iotable import (
+    concatenate_arrays,
+    iterate_arrays,
+    map_labels,
+    sparse_arrays,
+    supports_array_exchanges,
+    write_array_exchanges,
+)
+
+
+def test_sparse_arrays():
+    arrays = sparse_arrays([1, 2], [3, 4], [0.5, 2])
+    assert arrays["indices_array"]["row"].tolist() == [1, 2]
+    assert arrays["indices_array"]["col"].tolist() == [3, 4]
+    assert arrays["data_array"].dtype == np.float64
+    assert arrays["flip_array"].tolist() == [False, False]
+    assert sparse_arrays([1], [1], [1], flip=True)["flip_array"].tolist() == [True]
+
+
+def test_concatenate_arrays():
+    arrays = concatenate_arrays(
+        sparse_arrays([1], [2], [3], flip=True), sparse_arrays([4], [5], [6])
+    )
+    assert arrays["indices_array"]["row"].tolist() == [1, 4]
+    assert arrays["flip_array"].tolist() == [True, False]
+
+
+def test_map_labels():
+    labels = ["a", "b", "c"]
+    ids = map_labels(labels, {"a": 10, "c": 30}, np.array([2, 0, 2]))
+    assert ids.tolist() == [30, 10, 30]
+    assert map_labels(labels, {}, np.zeros(0, dtype=np.int64)).tolist() == []
+    with pytest.raises(KeyError):
+        map_labels(labels, {"a": 10}, np.array([1]))
+
+
+def test_iterate_arrays():
+    assert list(iterate_arrays(sparse_arrays([1], [2], [3], flip=True))) == [
+        {"row": 1, "col": 2, "amount": 3, "flip": True, "uncertainty_type": 0}
+    ]
+
+
+@pytest.mark.skipif(not supports_array_exchanges(), reason="Needs bw2data 4")
+@bw2test
+def test_write_array_exchanges():
+    bio = Database("bio", backend="sqlite")
+    bio.write({("bio", "co2"): {"name": "CO2", "type": "emission"}})
+    db = IOTableBackend("io")
+    db.register()
+    db.write(
+        {
+            ("io", "a"): {"name": "a", "location": "AT", "exchanges": []},
+            ("io", "b"): {"name": "b", "location": "DE", "exchanges": []},
+        }
+    )
+    a, b = db.get("a").id, db.get("b").id
+    co2 = bio.get("co2").id
+    technosphere = concatenate_arrays(
+        sparse_arrays([a, b], [a, b], [1, 1]),
+        sparse_arrays([a], [b], [0.5], flip=True),
+    )
+    biosphere = sparse_arrays([co2], [a], [2])
+    write_array_exchanges("io", technosphere, biosphere, ["bio"])
+
+    assert databases["io"]["depends"] == ["bio"]
+    dp = db.datapackage()
+    technosphere_data = dp.get_resource("io_technosphere_matrix.data")[0]
+    assert technosphere_data.tolist() == [1, 1, 0.5]
+    biosphere_indices = dp.get_resource("io_biosphere_matrix.indices")[0]
+    assert biosphere_indices.tolist() == [(co2, a)]
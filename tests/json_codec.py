@@ -0,0 +1,134 @@
+import collections
+import json
+import math
+
+import numpy as np
+import pytest
+
+from bw2io import json_codec
+
+
+@pytest.fixture(params=json_codec.available_backends())
+def backend(request):
+    json_codec.set_backend(request.param)
+    yield request.param
+    json_codec.set_backend()
+
+
+def test_default_backend():
+    assert json_codec.get_backend() == json_codec.available_backends()[0]
+    assert "json" in json_codec.available_backends()
+
+
+@pytest.mark.parametrize("name", ["orjson", "simdjson"])
+def test_optional_backend(name):
+    if name not in json_codec.available_backends():
+        pytest.skip("{} not installed".format(name))
+    data = {"a": [1, 2.5, None, "null"], "b": {"c": "ü"}}
+    json_codec.set_backend(name)
+    try:
+        assert json_codec.loads(json_codec.encode(data)) == data
+        assert json_codec.loads(json.dumps(data)) == data
+    finally:
+        json_codec.set_backend()
+
+
+def test_set_backend_errors():
+    with pytest.raises(ValueError):
+        json_codec.set_backend("foo")
+    missing = [
+        name
+        for name in json_codec.BACKENDS
+        if name not in json_codec.available_backends()
+    ]
+    for name in missing:
+        with pytest.raises(ImportError):
+            json_codec.set_backend(name)
+
+
+def test_round_trip(backend):
+    data = {"a": [1, 2.5, None, True], "b": {"c": "Ünïcode ✓"}, "d": 2**62}
+    assert json_codec.loads(json_codec.dumps(data)) == data
+    assert json_codec.loads(json_codec.encode(data)) == data
+
+
+def test_large_integers(backend):
+    assert json.loads(json_codec.dumps(10**30)) == 10**30
+
+
+def test_same_as_stdlib(backend):
+    data = {"a": [1, 0.1, 1e-15, -3.0], "b": "Ünïcode"}
+    assert json.loads(json_codec.dumps(data)) == data
+    assert json_codec.loads(json.dumps(data)) == data
+    assert json.loads(json_codec.dumps(data, indent=2)) == data
+    assert json.loads(json_codec.dumps(data, indent=4)) == data
+
+
+def test_non_ascii_not_escaped(backend):
+    assert json_codec.dumps("✓") == '"✓"'
+
+
+def test_nan(backend):
+    data = json_codec.loads(json_codec.dumps({"a": float("nan"), "b": None}))
+    assert math.isnan(data["a"])
+    assert data["b"] is None
+    assert json_codec.loads("[Infinity]") == [float("inf")]
+
+
+def test_byte_order_mark(backend):
+    assert json_codec.loads('{"a": 1}'.encode("utf-8-sig")) == {"a": 1}
+
+
+def test_invalid_json(backend):
+    with pytest.raises(ValueError):
+        json_codec.loads("{")
+
+
+def test_numpy_not_supported(backend):
+    with pytest.raises(TypeError):
+        json_codec.dumps({"a": np.arange(3)})
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        float("nan"),
+        [None, {"a": float("inf")}],
+        {"a": (1, -float("inf"))},
+        [float("nan")] * 3,
+        [None, collections.OrderedDict(a=float("nan"))],
+    ],
+)
+def test_non_finite_floats(backend, data):
+    assert json_codec.dumps(data) == json.dumps(data, ensure_ascii=False)
+
+
+def test_has_non_finite():
+    assert not json_codec._has_non_finite([None, 1.5, 1.5, -0.0, 1e308, -5e-324, "g"])
+    assert json_codec._has_non_finite([None, 1.5, float("-inf")])
+    assert json_codec._has_non_finite([collections.OrderedDict(a=[float("nan")])])
+    assert not json_codec._has_non_finite([collections.OrderedDict(a=1.5)])
+
+
+def test_null_not_encoded_twice(monkeypatch):
+    if json_codec.get_backend() != "orjson":
+        pytest.skip("orjson not installed")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Encoded with standard library")
+
+    data = {"a": None, "b": "null", "c": [1.5, None]}
+    monkeypatch.setattr(json_codec.json, "dumps", fail)
+    assert json_codec.loads(json_codec.encode(data)) == data
+
+
+def test_load_dump(tmp_path, backend):
+    fp = tmp_path / "data.json"
+    json_codec.dump({"a": 1}, fp)
+    assert json_codec.load(fp) == {"a": 1}
+    assert json_codec.load(str(fp)) == {"a": 1}
+    with open(fp) as f:
+        assert json_codec.load(f) == {"a": 1}
+    with open(fp, "rb") as f:
+        assert json_codec.load(f) == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
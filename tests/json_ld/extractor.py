@@ -0,0 +1,103 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from bw2io.extractors.json_ld import JSONLDExtractor, JSONLDFolder
+from bw2io.importers.json_ld import JSONLDImporter
+from bw2io.importers.json_ld_lcia import JSONLDLCIAImporter
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "json-ld"
+CATTLE = FIXTURES / "beef-cattle-finishing"
+
+
+def without_filenames(data):
+    return {
+        folder: {
+            key: {k: v for k, v in obj.items() if k != "filename"}
+            for key, obj in contents.items()
+        }
+        for folder, contents in data.items()
+    }
+
+
+def write_zipfile(dirpath, tmp_path):
+    filepath = tmp_path / "data.zip"
+    with zipfile.ZipFile(filepath, "w") as zf:
+        for path in sorted(dirpath.rglob("*")):
+            zf.write(path, path.relative_to(dirpath))
+    return filepath
+
+
+def test_extract_zipfile(tmp_path):
+    filepath = write_zipfile(CATTLE, tmp_path)
+    data = JSONLDExtractor.extract(filepath)
+    assert without_filenames(data) == without_filenames(JSONLDExtractor.extract(CATTLE))
+    process = next(iter(data["processes"].values()))
+    assert process["filename"].startswith(str(filepath.resolve()))
+    assert "bin" not in data
+
+
+def test_extract_not_zipfile():
+    with pytest.raises(ValueError):
+        JSONLDExtractor.extract(CATTLE / "context.json")
+
+
+@pytest.mark.parametrize("zipped", [False, True])
+def test_extract_lazy(tmp_path, zipped):
+    filepath = write_zipfile(CATTLE, tmp_path) if zipped else CATTLE
+    eager = JSONLDExtractor.extract(filepath)
+    lazy = JSONLDExtractor.extract(filepath, lazy=True)
+    assert isinstance(lazy["processes"], JSONLDFolder)
+    assert isinstance(lazy["flows"], dict)
+    assert len(lazy["processes"]) == len(eager["processes"])
+    assert list(lazy["processes"]) == list(eager["processes"])
+    assert dict(lazy["processes"].items()) == eager["processes"]
+    key = next(iter(eager["processes"]))
+    assert lazy["processes"][key] == eager["processes"][key]
+
+
+def test_extract_lazy_objects_kept(monkeypatch):
+    folder = JSONLDExtractor.extract(CATTLE, lazy=True)["processes"]
+    first, second, *_ = folder
+    folder[first]["name"] = "foo"
+    assert folder[first]["name"] == "foo"
+    assert list(folder.loaded) == [first]
+
+    del folder[second]
+    folder["new"] = {"name": "bar"}
+    assert second not in folder
+    assert list(folder)[-1] == "new"
+    folder.load_all()
+    assert len(folder.loaded) == len(folder)
+    assert folder[first]["name"] == "foo"
+
+    # Objects are parsed only once
+    monkeypatch.setattr(folder.source, "load", None)
+    assert dict(folder.items())["new"] == {"name": "bar"}
+
+
+def test_extract_processes(tmp_path):
+    filepath = write_zipfile(CATTLE, tmp_path)
+    data = JSONLDExtractor.extract(filepath, lazy=True, processes=2, chunksize=1)
+    assert list(data["processes"].values()) == list(
+        JSONLDExtractor.extract(filepath)["processes"].values()
+    )
+
+
+def test_importer_lazy_same_as_eager(tmp_path):
+    filepath = write_zipfile(CATTLE, tmp_path)
+    eager = JSONLDImporter(CATTLE, "db", lazy=False)
+    eager.apply_strategies(verbose=False, no_warning=True)
+    lazy = JSONLDImporter(filepath, "db")
+    assert isinstance(lazy.data["processes"], JSONLDFolder)
+    lazy.apply_strategies(verbose=False, no_warning=True)
+    assert without_filenames({"": {i: ds for i, ds in enumerate(lazy.data)}}) == (
+        without_filenames({"": {i: ds for i, ds in enumerate(eager.data)}})
+    )
+    assert lazy.biosphere_database == eager.biosphere_database
+
+
+def test_lcia_importer_zipfile(tmp_path):
+    filepath = write_zipfile(FIXTURES / "US-FPL", tmp_path)
+    assert sorted(JSONLDLCIAImporter(filepath).data) == ["flows"]
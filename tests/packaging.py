@@ -1,11 +1,14 @@
 import copy
 import fractions
+import json
+import zipfile
 
 from bw2data.method import Method
 from bw2data.tests import BW2DataTest
 
 from bw2io import BW2Package
 from bw2io.errors import InvalidPackage, UnsafeData
+from bw2io.package import zstandard
 from bw2io.tests import MockDS, mocks
 
 
@@ -103,6 +106,7 @@ class BW2PackageTest(BW2DataTest):
         obj.register()
         obj.write(["a boring string", {"foo": "bar"}, (1, 2, 3)])
         fp = BW2Package.export_obj(obj)
+        self.assertFalse(zipfile.is_zipfile(fp))
         obj.deregister()
         del obj
         self.assertFalse("Slick Al" in mocks)
@@ -115,3 +119,91 @@ class BW2PackageTest(BW2DataTest):
 
     def test_roundtrip_objs(self):
         pass
+
+    def test_roundtrip_chunked(self):
+        obj = MockDS("Slick Al")
+        obj.register()
+        data = [{"foo": i, "bar": (i, "ü")} for i in range(25)]
+        obj.write(data)
+        fp = BW2Package.export_obj(obj, package_format=2, chunk_size=10, processes=2)
+        with zipfile.ZipFile(fp) as archive:
+            self.assertEqual(len(archive.namelist()), 4)
+        obj.deregister()
+        obj = BW2Package.import_file(fp, processes=2)[0]
+        self.assertTrue("Slick Al" in mocks)
+        self.assertEqual(obj.load(), data)
+
+    def test_roundtrip_dict(self):
+        obj = MockDS("Slick Al")
+        obj.register()
+        data = {("a", str(i)): {"name": "Ünïcode", "number": i} for i in range(5)}
+        obj.write(data)
+        fp = BW2Package.export_obj(obj, package_format=2, chunk_size=2)
+        obj.deregister()
+        loaded = BW2Package.load_file(fp)
+        self.assertEqual(loaded[0]["data"], data)
+        self.assertEqual(loaded[0]["class"], MockDS)
+        self.assertEqual(loaded[0]["name"], "Slick Al")
+
+    def test_roundtrip_format_1(self):
+        obj = MockDS("Slick Al")
+        obj.register()
+        obj.write(["a boring string", {"foo": "bar"}, (1, 2, 3)])
+        fp = BW2Package.export_obj(obj, package_format=1)
+        self.assertFalse(zipfile.is_zipfile(fp))
+        obj.deregister()
+        obj = BW2Package.import_file(fp)[0]
+        self.assertEqual(obj.load(), ["a boring string", {"foo": "bar"}, (1, 2, 3)])
+
+    def test_chunked_whitelist(self):
+        obj = MockDS("Slick Al")
+        obj.register()
+        obj.write([1, 2, 3])
+        fp = BW2Package.export_obj(obj, package_format=2)
+        BW2Package.APPROVED.remove("bw2io")
+        try:
+            with self.assertRaises(UnsafeData):
+                BW2Package.import_file(fp)
+        finally:
+            BW2Package.APPROVED.add("bw2io")
+
+    def test_zstd_compression(self):
+        obj = MockDS("Slick Al")
+        obj.register()
+        obj.write([1, 2, 3])
+        if zstandard is None:
+            with self.assertRaises(ImportError):
+                BW2Package.export_obj(obj, package_format=2, compression="zstd")
+        else:
+            fp = BW2Package.export_obj(obj, package_format=2, compression="zstd")
+            self.assertEqual(BW2Package.load_file(fp)[0]["data"], [1, 2, 3])
+        with self.assertRaises(ValueError):
+            BW2Package.export_obj(obj, package_format=2, compression="foo")
+
+    def test_unknown_package_format(self):
+        obj = MockDS("Slick Al")
+        obj.register()
+        with self.assertRaises(ValueError):
+            BW2Package.export_obj(obj, package_format=3)
+
+    def test_chunked_validates_all_objects_first(self):
+        objs = []
+        for name in ("first", "second"):
+            obj = MockDS(name)
+            obj.register()
+            obj.write([1, 2, 3])
+            objs.append(obj)
+        fp = BW2Package.export_objs(objs, "both", package_format=2, chunk_size=2)
+        for obj in objs:
+            obj.deregister()
+        with zipfile.ZipFile(fp) as archive:
+            contents = {name: archive.read(name) for name in archive.namelist()}
+        manifest = json.loads(contents["manifest.json"])
+        manifest["objects"][1]["class"]["module"] = "os"
+        contents["manifest.json"] = json.dumps(manifest).encode("utf-8")
+        with zipfile.ZipFile(fp, "w") as archive:
+            for name, payload in contents.items():
+                archive.writestr(name, payload)
+        with self.assertRaises(UnsafeData):
+            BW2Package.import_file(fp)
+        self.assertFalse("first" in mocks)
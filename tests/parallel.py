@@ -0,0 +1,92 @@
+import multiprocessing
+import operator
+import os
+from pathlib import Path
+
+import pytest
+from bw2data.tests import bw2test
+
+from bw2io.extractors.ecospold2 import Ecospold2DataExtractor
+from bw2io.importers import SingleOutputEcospold2Importer
+from bw2io.parallel import default_chunksize, imap_ordered
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "ecospold2"
+
+
+def test_default_chunksize():
+    assert default_chunksize(10, 8) == 1
+    assert default_chunksize(1000, 4) == 62
+    assert default_chunksize(100000, 4) == 64
+
+
+@pytest.mark.parametrize("chunksize", [None, 1, 7])
+def test_imap_ordered_stable_order(chunksize):
+    result = imap_ordered(
+        operator.mul, range(100), args=(3,), processes=4, chunksize=chunksize
+    )
+    assert list(result) == [3 * x for x in range(100)]
+
+
+def test_imap_ordered_empty():
+    assert list(imap_ordered(operator.mul, [], args=(3,))) == []
+
+
+def test_imap_ordered_spawn():
+    result = imap_ordered(operator.mul, range(10), args=(2,), start_method="spawn")
+    assert list(result) == [2 * x for x in range(10)]
+
+
+def test_ecospold2_extract_spawn_generator():
+    expected = Ecospold2DataExtractor.extract(str(FIXTURES), "ei", use_mp=False)
+    data = Ecospold2DataExtractor.extract(
+        str(FIXTURES),
+        "ei",
+        processes=2,
+        chunksize=1,
+        start_method="spawn",
+        as_generator=True,
+    )
+    assert not isinstance(data, list)
+    assert list(data) == expected
+
+
+def test_imap_ordered_close_early():
+    result = imap_ordered(operator.mul, range(100), args=(3,), processes=2, chunksize=1)
+    assert next(result) == 0
+    result.close()
+    assert not multiprocessing.active_children()
+
+
+def test_ecospold2_extract_generator_close_early():
+    data = Ecospold2DataExtractor.extract(
+        str(FIXTURES), "ei", processes=2, chunksize=1, as_generator=True
+    )
+    next(data)
+    data.close()
+    assert not multiprocessing.active_children()
+
+
+@bw2test
+def test_ecospold2_importer_start_method():
+    expected = Ecospold2DataExtractor.extract(str(FIXTURES), "ei", use_mp=False)
+    imp = SingleOutputEcospold2Importer(
+        str(FIXTURES), "ei", processes=2, start_method="spawn"
+    )
+    assert imp.data == expected
+
+
+def set_test_variable(value):
+    os.environ["BW2IO_TEST_INITIALIZER"] = value
+
+
+def test_imap_ordered_initializer():
+    # Default start method, as ``fork`` isn't available on Windows
+    result = imap_ordered(
+        os.getenv,
+        ["BW2IO_TEST_INITIALIZER"] * 4,
+        processes=2,
+        initializer=set_test_variable,
+        initargs=("yes",),
+    )
+    assert list(result) == ["yes"] * 4
+    assert "BW2IO_TEST_INITIALIZER" not in os.environ
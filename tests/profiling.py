@@ -0,0 +1,176 @@
+import csv
+import json
+import tracemalloc
+
+import pytest
+
+from bw2io import add_strategy_hook, remove_strategy_hook
+from bw2io.errors import StrategyError
+from bw2io.importers.base_lci import LCIImporter
+from bw2io.profiling import FIELDS, StrategyProfiler, StrategyReport
+from bw2io.strategies import drop_unlinked, normalize_units, tupleize_categories
+
+
+def get_importer():
+    imp = LCIImporter("db")
+    imp.data = [
+        {
+            "name": "a",
+            "unit": "kg",
+            "exchanges": [
+                {"name": "a", "unit": "kilogram", "input": ("db", "a")},
+                {"name": "b", "unit": "m3"},
+            ],
+        },
+        {"name": "b", "unit": "kwh", "exchanges": []},
+    ]
+    return imp
+
+
+def add_dataset(data):
+    return data + [{"name": "c", "exchanges": [{"name": "d"}]}]
+
+
+def fail(data):
+    raise StrategyError("nope")
+
+
+def replace_exchanges(data):
+    for ds in data:
+        names = [exc["name"] for exc in ds.pop("exchanges")]
+        # Old exchanges are freed here, so new exchanges can get their ``id``
+        ds["exchanges"] = [{"name": name} for name in names]
+    return data
+
+
+def crash(data):
+    raise KeyError("nope")
+
+
+def test_strategy_report():
+    imp = get_importer()
+    imp.apply_strategies([normalize_units, drop_unlinked, add_dataset], verbose=False)
+    report = imp.strategy_report()
+    assert len(report) == 3
+    assert [r["strategy"] for r in report] == [
+        "normalize_units",
+        "drop_unlinked",
+        "add_dataset",
+    ]
+    for record in report:
+        assert set(record) == set(FIELDS)
+        assert record["wall time"] >= 0
+        assert record["cpu time"] >= 0
+    assert report[1]["exchanges"] == 1
+    assert report[1]["exchanges removed"] == 1
+    assert report[2]["datasets added"] == 1
+    assert report[0]["memory peak"] is None
+    assert report[0]["datasets changed"] is None
+    assert "normalize_units" in str(report)
+    assert report.total_time >= 0
+    assert len(report.slowest(2)) == 2
+
+
+def test_strategy_report_detailed():
+    imp = get_importer()
+    imp.apply_strategies(
+        [normalize_units, drop_unlinked, add_dataset], verbose=False, profile=True
+    )
+    first, second, third = imp.strategy_report()
+    assert first["datasets changed"] == 2
+    assert first["exchanges changed"] == 1
+    assert first["exchanges removed"] == 0
+    assert first["memory peak"] >= 0
+    assert second["exchanges removed"] == 1
+    assert second["exchanges changed"] == 0
+    assert third["datasets added"] == 1
+    assert third["exchanges added"] == 1
+    assert third["datasets changed"] == 0
+
+
+def test_strategy_report_detailed_replaced_objects():
+    imp = LCIImporter("db")
+    imp.data = [
+        {"name": str(i), "exchanges": [{"name": "a", "unit": "kg"}]}
+        for i in range(100)
+    ]
+    imp.apply_strategies([replace_exchanges], verbose=False, profile=True)
+    (record,) = imp.strategy_report()
+    assert record["exchanges added"] == record["exchanges removed"] == 100
+    assert record["exchanges changed"] == 0
+    assert record["datasets changed"] == 100
+
+
+def test_strategy_report_detailed_stops_tracing_on_error():
+    assert not tracemalloc.is_tracing()
+    imp = get_importer()
+    with pytest.raises(KeyError):
+        imp.apply_strategies([crash], verbose=False, profile=True)
+    assert not tracemalloc.is_tracing()
+
+
+def test_strategy_report_fused():
+    imp = get_importer()
+    imp.apply_strategies([normalize_units, tupleize_categories], verbose=False, fuse=True)
+    report = imp.strategy_report()
+    assert len(report) == 1
+    assert report[0]["strategy"] == "normalize_units + tupleize_categories"
+
+
+def test_strategy_report_error():
+    imp = get_importer()
+    imp.apply_strategies([fail], verbose=False)
+    assert imp.strategy_report()[0]["error"] == "nope"
+    assert imp.applied_strategies == []
+
+
+def test_strategy_report_empty():
+    imp = LCIImporter("db")
+    assert len(imp.strategy_report()) == 0
+
+
+def test_strategy_report_export(tmp_path):
+    imp = get_importer()
+    imp.apply_strategies([normalize_units, drop_unlinked], verbose=False)
+    report = imp.strategy_report()
+
+    report.to_json(tmp_path / "report.json")
+    with open(tmp_path / "report.json") as f:
+        data = json.load(f)
+    assert [r["strategy"] for r in data] == ["normalize_units", "drop_unlinked"]
+    assert json.loads(report.to_json()) == data
+
+    report.to_csv(tmp_path / "report.csv")
+    with open(tmp_path / "report.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 2
+    assert rows[1]["strategy"] == "drop_unlinked"
+    assert rows[1]["exchanges"] == "1"
+
+
+def test_strategy_hooks():
+    calls = []
+
+    def hook(importer, record):
+        calls.append((importer, record["strategy"]))
+
+    imp = get_importer()
+    add_strategy_hook(hook)
+    try:
+        imp.apply_strategy(normalize_units, verbose=False)
+    finally:
+        remove_strategy_hook(hook)
+    imp.apply_strategy(drop_unlinked, verbose=False)
+    assert calls == [(imp, "normalize_units")]
+
+
+def test_profiler_generator_data():
+    profiler = StrategyProfiler("foo", (x for x in []))
+    record = profiler.finish([])
+    assert record["datasets"] is None
+    assert record["wall time"] >= 0
+
+
+def test_report_is_iterable_of_records():
+    report = StrategyReport([dict.fromkeys(FIELDS, 0)])
+    assert list(report) == [dict.fromkeys(FIELDS, 0)]
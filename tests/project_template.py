@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+from bw2data import Database, databases, methods, projects
+from bw2data.tests import bw2test
+
+from bw2io import bw2setup
+from bw2io.migrations import migrations
+from bw2io.project_template import copy_project_template, template_dirpath
+from bw2io.setup_bundle import write_setup_bundle
+
+from .setup_bundle import BIOSPHERE, METHODS, MIGRATIONS
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    return write_setup_bundle(
+        tmp_path / "bundle.zip", BIOSPHERE, METHODS, MIGRATIONS, "3.9"
+    )
+
+
+@bw2test
+def test_bw2setup_template(bundle, tmp_path):
+    template = tmp_path / "template"
+    projects.set_current("first")
+    bw2setup(bundle=str(bundle), template=str(template))
+    assert template.is_dir()
+    assert projects.current == "first"
+    assert not [p for p in projects if p.name.startswith("bw2io-template")]
+    assert len(Database("biosphere3")) == 2
+    assert ("a", "b", "c") in methods
+    assert "foo" in migrations
+
+    # Changes in one project don't affect the template
+    Database("biosphere3").new_activity(code="c", name="new", type="emission").save()
+    assert len(Database("biosphere3")) == 3
+
+    # Template is reused; the bundle isn't needed anymore
+    projects.set_current("second")
+    bw2setup(bundle=str(tmp_path / "missing.zip"), template=str(template))
+    assert len(Database("biosphere3")) == 2
+    assert databases["biosphere3"]["format"] == "Ecoinvent XML"
+    assert ("a", "b", "c") in methods
+    assert "foo" in migrations
+
+    projects.set_current("first")
+    assert len(Database("biosphere3")) == 3
+
+
+@bw2test
+def test_template_dirpath(tmp_path, monkeypatch):
+    monkeypatch.setenv("BW2IO_CACHE_DIR", str(tmp_path))
+    dirpath = template_dirpath(biosphere_version="3.9")
+    assert dirpath.name.startswith("bw2setup-")
+    assert dirpath.name.endswith("-biosphere-3.9")
+    assert dirpath.parent.parent == tmp_path / "templates"
+    # Not deleted by ``projects.purge_deleted_directories``
+    assert Path(projects._base_data_dir) not in dirpath.parents
+
+
+@bw2test
+def test_copy_project_template_missing(tmp_path):
+    with pytest.raises(ValueError):
+        copy_project_template(tmp_path / "missing")
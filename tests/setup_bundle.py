@@ -0,0 +1,158 @@
+import json
+import warnings
+import zipfile
+
+import pytest
+from bw2data import Database, Method, databases, methods
+from bw2data.tests import bw2test
+
+from bw2io import bw2setup, load_setup_bundle
+from bw2io.errors import InvalidSetupBundle
+from bw2io.migrations import Migration, migrations
+from bw2io.setup_bundle import read_setup_bundle, write_setup_bundle
+
+BIOSPHERE = [
+    {
+        "categories": ("air", "urban air close to ground"),
+        "code": "a",
+        "CAS number": None,
+        "name": "Ammonia",
+        "database": "biosphere3",
+        "exchanges": [],
+        "unit": "kilogram",
+        "type": "emission",
+    },
+    {
+        "categories": ("natural resource", "in ground"),
+        "code": "b",
+        "CAS number": None,
+        "name": "Gravel",
+        "database": "biosphere3",
+        "exchanges": [],
+        "unit": "kilogram",
+        "type": "natural resource",
+    },
+]
+METHODS = [
+    {
+        "filename": "some file",
+        "unit": "kg SO2-Eq",
+        "name": ("a", "b", "c"),
+        "description": "",
+        "exchanges": [
+            {
+                "name": "Ammonia",
+                "categories": ("air", "urban air close to ground"),
+                "amount": 1.6,
+                "type": "biosphere",
+                "input": ("biosphere3", "a"),
+            }
+        ],
+    }
+]
+MIGRATIONS = [
+    ("foo", "Some migration", {"fields": ["name"], "data": [[["a"], {"name": "b"}]]})
+]
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    return write_setup_bundle(
+        tmp_path / "bundle.zip", BIOSPHERE, METHODS, MIGRATIONS, "3.9"
+    )
+
+
+def test_read_setup_bundle(bundle):
+    manifest, biosphere, methods_data, migrations_data = read_setup_bundle(bundle)
+    assert manifest["format"] == 1
+    assert manifest["biosphere version"] == "3.9"
+    assert biosphere == BIOSPHERE
+    assert methods_data[0]["name"] == ("a", "b", "c")
+    assert migrations_data == MIGRATIONS
+
+
+def test_read_setup_bundle_checksum(bundle, tmp_path):
+    tampered = tmp_path / "tampered.zip"
+    with zipfile.ZipFile(bundle) as src, zipfile.ZipFile(tampered, "w") as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name == "biosphere.json":
+                data = data.replace(b"Gravel", b"Sand")
+            dst.writestr(name, data)
+    with pytest.raises(InvalidSetupBundle):
+        read_setup_bundle(tampered)
+
+
+def test_read_setup_bundle_missing(tmp_path):
+    with pytest.raises(InvalidSetupBundle):
+        read_setup_bundle(tmp_path / "missing.zip")
+
+
+def test_read_setup_bundle_biosphere_version(tmp_path):
+    other = write_setup_bundle(
+        tmp_path / "other.zip", BIOSPHERE, METHODS, MIGRATIONS, "3.8"
+    )
+    with pytest.raises(InvalidSetupBundle):
+        read_setup_bundle(other)
+    assert read_setup_bundle(other, "3.8")[0]["biosphere version"] == "3.8"
+    assert read_setup_bundle(other, None)[0]["biosphere version"] == "3.8"
+
+
+def test_read_setup_bundle_bw2io_version(bundle, tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        read_setup_bundle(bundle)
+
+    old = tmp_path / "old.zip"
+    with zipfile.ZipFile(bundle) as src, zipfile.ZipFile(old, "w") as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name == "manifest.json":
+                manifest = json.loads(data)
+                manifest["bw2io"] = "0.1"
+                data = json.dumps(manifest)
+            dst.writestr(name, data)
+    with pytest.warns(UserWarning, match="bw2io 0.1"):
+        read_setup_bundle(old)
+
+
+@bw2test
+def test_load_setup_bundle(bundle):
+    manifest = load_setup_bundle(bundle)
+    assert manifest["biosphere version"] == "3.9"
+    assert len(Database("biosphere3")) == 2
+    assert Database("biosphere3").get("b")["categories"] == (
+        "natural resource",
+        "in ground",
+    )
+    assert ("a", "b", "c") in methods
+    assert Method(("a", "b", "c")).load() == [
+        (Database("biosphere3").get("a").id, 1.6)
+    ]
+    assert "foo" in migrations
+    assert Migration("foo").load() == MIGRATIONS[0][2]
+
+
+@bw2test
+def test_bw2setup_bundle(bundle):
+    bw2setup(bundle=str(bundle))
+    assert "biosphere3" in databases
+    assert ("a", "b", "c") in methods
+    assert "foo" in migrations
+
+
+@bw2test
+def test_bw2setup_bundle_wrong_biosphere_version(tmp_path, monkeypatch):
+    import bw2io
+
+    other = write_setup_bundle(
+        tmp_path / "other.zip", BIOSPHERE, METHODS, MIGRATIONS, "3.8"
+    )
+    built = []
+    monkeypatch.setattr(bw2io, "create_default_biosphere3", lambda: built.append(1))
+    monkeypatch.setattr(bw2io, "create_default_lcia_methods", lambda: None)
+    monkeypatch.setattr(bw2io, "create_core_migrations", lambda: None)
+    with pytest.warns(UserWarning, match="biosphere version 3.8"):
+        bw2setup(bundle=str(other))
+    assert "biosphere3" not in databases
+    assert built == [1]
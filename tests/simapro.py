@@ -1,11 +1,13 @@
 # from .fixtures.simapro_reference import background as background_data
 import os
+import random
 import sys
 
 # from bw2data.utils import recursive_str_to_unicode as _
 # from stats_arrays import UndefinedUncertainty, NoUncertainty
 from numbers import Number
 
+import pytest
 from bw2data import Database, config, databases
 from bw2data.tests import BW2DataTest, bw2test
 
@@ -17,7 +19,14 @@ from bw2io.migrations import (
     get_biosphere_2_3_name_migration_data,
     get_default_units_migration_data,
 )
-from bw2io.extractors.simapro_csv import to_number
+from bw2io.extractors.simapro_csv import (
+    ParameterNames,
+    SimaProCSVExtractor,
+    replace_with_uppercase,
+    rewrite_formula,
+    to_number,
+)
+from bw2io.strategies.simapro import fix_iff_formula, normalize_simapro_formulae
 
 SP_FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "simapro")
 
@@ -340,3 +349,122 @@ class SimaProCSVImporterTest(BW2DataTest):
 
 
 # # Test multiple background DBs
+
+
+@bw2test
+def test_extract_as_generator():
+    filepath = os.path.join(SP_FIXTURES_DIR, "allocation.csv")
+    data, gp, pm = SimaProCSVExtractor.extract(filepath, name="foo")
+    generator, gp2, pm2 = SimaProCSVExtractor.extract(
+        filepath, name="foo", as_generator=True
+    )
+    assert not isinstance(generator, list)
+    streamed = list(generator)
+    assert len(streamed) == len(data) == 2
+    for ds in streamed + data:
+        ds.pop("code")
+    assert streamed == data
+    assert gp == gp2 and pm == pm2
+
+
+def test_iter_process_blocks():
+    lines = [
+        ["{SimaPro 8}"],
+        [],
+        ["Process"],
+        ["Category type"],
+        ["material"],
+        ["End"],
+        [],
+        ["Process"],
+        ["Products"],
+        ["End"],
+        ["Units"],
+        ["Process"],
+        ["End"],
+    ]
+    assert list(SimaProCSVExtractor.iter_process_blocks(lines)) == [
+        [["Category type"], ["material"], ["End"]],
+        [["Products"], ["End"]],
+    ]
+
+
+def test_iter_process_blocks_no_end():
+    lines = [["Process"], ["Products"], ["foo"]]
+    assert list(SimaProCSVExtractor.iter_process_blocks(iter(lines))) == [
+        [["Products"], ["foo"]]
+    ]
+
+
+@bw2test
+def test_extract_parallel():
+    filepath = os.path.join(SP_FIXTURES_DIR, "allocation.csv")
+    data, gp, pm = SimaProCSVExtractor.extract(filepath, name="foo")
+    parallel, gp2, pm2 = SimaProCSVExtractor.extract(filepath, name="foo", processes=2)
+    assert len(parallel) == len(data) == 2
+    for ds in parallel + data:
+        ds.pop("code")
+    assert parallel == data
+    assert gp == gp2 and pm == pm2
+
+
+@pytest.mark.parametrize(
+    "string,names,expected",
+    [
+        ("a*b_1+c", ["A", "B_1"], "A*B_1+c"),
+        # Matched text is replaced anywhere in the formula
+        ("abs(a)", ["A"], "Abs(A)"),
+        ("ab + a + ba", ["A"], "Ab + A + bA"),
+        # Digits separate names
+        ("2a+a1", ["A"], "2A+A1"),
+        ("1e5*e5", ["E5"], "1E5*E5"),
+        ("b_12", ["B_1"], "B_12"),
+        ("foo", [], "foo"),
+    ],
+)
+def test_parameter_names_uppercase(string, names, expected):
+    assert replace_with_uppercase(string, names) == expected
+    assert ParameterNames(names).uppercase(string) == expected
+
+
+def test_parameter_names_same_as_replace_with_uppercase():
+    rng = random.Random(42)
+    for _ in range(2000):
+        names = list(
+            {
+                "".join(rng.choice("AB_1E") for _ in range(rng.randint(1, 3)))
+                for _ in range(rng.randint(0, 4))
+            }
+        )
+        string = "".join(rng.choice("aAbB_1e +*()^,") for _ in range(12))
+        expected = replace_with_uppercase(string, names)
+        assert ParameterNames(names).uppercase(string) == expected
+
+
+def test_rewrite_formula():
+    settings = {"Decimal separator": ","}
+    assert (
+        rewrite_formula(
+            "iff(a<1,5, b^2, c)", settings, ParameterNames(["B"]), ParameterNames(["A"])
+        )
+        == "((B**2) if (A<1.5) else (c))"
+    )
+    # Names are uppercased after ``iff`` is rewritten
+    assert rewrite_formula("iff(x, 1, 2)", {}, ParameterNames(["IF"])) == (
+        "((1) IF (x) else (2))"
+    )
+
+
+def test_fix_iff_formula():
+    assert fix_iff_formula("2*a") == "2*a"
+    assert fix_iff_formula("iff(a<1, 2, 3)") == "((2) if (a<1) else (3))"
+    assert (
+        fix_iff_formula("IFF(a, iff(b, 1, 2), 3)")
+        == "((((1) if (b) else (2))) if (a) else (3))"
+    )
+
+
+def test_normalize_simapro_formulae():
+    settings = {"Decimal separator": ","}
+    assert normalize_simapro_formulae("2,5^2", settings) == "2.5**2"
+    assert normalize_simapro_formulae("2,5^2", {}) == "2,5**2"
@@ -1,6 +1,11 @@
 import copy
 import unittest
 
+import pytest
+from bw2data import Database
+from bw2data.tests import bw2test
+
+from bw2io import LinkIndex
 from bw2io.errors import StrategyError
 from bw2io.strategies import link_iterable_by_fields
 
@@ -385,3 +390,92 @@ class LinkIterableTestCase(unittest.TestCase):
         )
         del unlinked[0]["exchanges"][0]["input"]
         self.assertEqual(expected, link_iterable_by_fields(unlinked, internal=True))
+
+
+def test_link_index_get():
+    index = LinkIndex(
+        [
+            {"name": "Foo", "unit": "kg", "database": "a", "code": "b"},
+            {"name": "bar", "unit": "kg", "database": "a", "code": "c"},
+            {"name": "bar", "unit": "kg", "database": "a", "code": "d"},
+        ],
+        fields=("name", "unit"),
+    )
+    assert len(index) == 2
+    assert index.get({"name": "foo", "unit": "KG"}) == ("a", "b")
+    assert index.get({"name": "foo"}) is None
+    with pytest.raises(StrategyError):
+        index.get({"name": "bar", "unit": "kg"})
+
+
+def test_link_index_no_concatenation_collisions():
+    index = LinkIndex(
+        [{"name": "ab", "location": "c", "database": "a", "code": "b"}],
+        fields=("name", "location"),
+    )
+    assert index.get({"name": "a", "location": "bc"}) is None
+
+
+@bw2test
+def test_link_index_for_database_cached_and_invalidated():
+    db = Database("target")
+    db.write(
+        {
+            ("target", "1"): {"name": "foo", "type": "emission"},
+            ("target", "2"): {"name": "bar", "type": "process"},
+        }
+    )
+    index = LinkIndex.for_database("target", fields=["name"], types="emission")
+    assert LinkIndex.for_database("target", fields=["name"], types="emission") is index
+    assert len(index) == 1
+
+    db.write({("target", "3"): {"name": "baz", "type": "emission"}})
+    assert index.current() is not index
+    assert index.current().get({"name": "baz"}) == ("target", "3")
+
+
+@bw2test
+def test_link_iterable_by_fields_database_index():
+    Database("target").write({("target", "1"): {"name": "foo", "unit": "kg"}})
+    data = [{"exchanges": [{"name": "foo", "unit": "kg"}]}]
+    link_iterable_by_fields(data, Database("target"), fields=["name", "unit"])
+    assert data[0]["exchanges"][0]["input"] == ("target", "1")
+    with pytest.raises(StrategyError):
+        LinkIndex.for_database("missing")
+
+
+@bw2test
+def test_link_iterable_by_fields_database_name():
+    Database("target").write(
+        {
+            ("target", "1"): {"name": "foo", "type": "emission"},
+            ("target", "2"): {"name": "foo", "type": "process"},
+        }
+    )
+    data = [{"exchanges": [{"name": "foo"}]}]
+    with pytest.raises(StrategyError):
+        link_iterable_by_fields(data, "target", fields=["name"])
+    link_iterable_by_fields(data, "target", fields=["name"], other_types="emission")
+    assert data[0]["exchanges"][0]["input"] == ("target", "1")
+
+
+def test_link_iterable_by_fields_other_types_iterable():
+    other = [
+        {"name": "foo", "type": "emission", "database": "a", "code": "b"},
+        {"name": "foo", "database": "a", "code": "c"},
+    ]
+    data = [{"exchanges": [{"name": "foo"}]}]
+    link_iterable_by_fields(data, other, fields=["name"], other_types={"process"})
+    assert data[0]["exchanges"][0]["input"] == ("a", "c")
+
+
+def test_link_iterable_by_fields_index_fields_mismatch():
+    index = LinkIndex(
+        [{"name": "foo", "unit": "kg", "database": "a", "code": "b"}],
+        fields=("name", "unit"),
+    )
+    data = [{"exchanges": [{"name": "foo", "unit": "kg"}]}]
+    with pytest.raises(ValueError):
+        link_iterable_by_fields(data, index, fields=["name"])
+    link_iterable_by_fields(data, index, fields=["name", "unit"])
+    assert data[0]["exchanges"][0]["input"] == ("a", "b")
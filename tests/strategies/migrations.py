@@ -1,8 +1,14 @@
+import os
+import pickle
+import sys
+import types
+
 import pytest
 from bw2data.tests import bw2test
 
+from bw2io import Migration
 from bw2io.errors import MissingMigration
-from bw2io.strategies import migrate_datasets, migrate_exchanges
+from bw2io.strategies import migrate_datasets, migrate_exchanges, migrate_many
 
 
 @bw2test
@@ -15,3 +21,122 @@ def test_migrate_exchanges_missing_migration():
 def test_migrate_datasets_missing_migration():
     with pytest.raises(MissingMigration):
         migrate_datasets([], "foo")
+
+
+@bw2test
+def test_migrate_many_missing_migration():
+    with pytest.raises(MissingMigration):
+        migrate_many([], ["foo"])
+
+
+def write_migrations():
+    Migration("first").write(
+        {
+            "fields": ["name", "categories"],
+            "data": [
+                [["Foo", ["air", "urban"]], {"name": "bar"}],
+                [["foo", ["water"]], {"name": "baz", "multiplier": 2}],
+            ],
+        },
+        "first",
+    )
+    Migration("second").write(
+        {"fields": ["name"], "data": [[["bar"], {"name": "qux", "unit": "kg"}]]},
+        "second",
+    )
+
+
+def make_data():
+    return [
+        {
+            "name": "foo",
+            "categories": ("air", "urban"),
+            "exchanges": [
+                {"name": "FOO", "categories": ["air", "urban"], "amount": 1},
+                {"name": "foo", "categories": ["water"], "amount": 1},
+                {"name": "other", "amount": 1},
+            ],
+        }
+    ]
+
+
+@bw2test
+def test_migrate_many_same_as_individual_migrations():
+    write_migrations()
+    expected = make_data()
+    for name in ("first", "second"):
+        migrate_datasets(expected, name)
+        migrate_exchanges(expected, name)
+
+    data = migrate_many(make_data(), ["first", "second"])
+    assert data == expected
+    assert data[0]["name"] == "qux"
+    assert data[0]["exchanges"][0] == {
+        "name": "qux",
+        "unit": "kg",
+        "categories": ["air", "urban"],
+        "amount": 1,
+    }
+    assert data[0]["exchanges"][1]["amount"] == 2
+    assert data[0]["exchanges"][2] == {"name": "other", "amount": 1}
+
+
+@bw2test
+def test_migration_compile_cached_and_persisted():
+    write_migrations()
+    migration = Migration("first")
+    compiled = migration.compile()
+    assert len(compiled) == 2
+    assert migration.compile() is compiled
+    assert os.path.exists(migration.compiled_filepath)
+
+    # Another process would only find the file on disk
+    Migration._compiled.clear()
+    assert migration.compile().mapping == compiled.mapping
+
+
+@bw2test
+def test_migration_compile_invalidated_on_write():
+    write_migrations()
+    assert Migration("second").compile().get({"name": "bar"}) == {
+        "name": "qux",
+        "unit": "kg",
+    }
+    Migration("second").write(
+        {"fields": ["name"], "data": [[["bar"], {"name": "other"}]]}, "second"
+    )
+    assert Migration("second").compile().get({"name": "bar"}) == {"name": "other"}
+
+
+@bw2test
+def test_migration_compile_rebuilt_if_pickle_from_other_version():
+    write_migrations()
+    migration = Migration("first")
+    migration.compile()
+    Migration._compiled.clear()
+    # Pickle refers to a class which doesn't exist in this version
+    module = types.ModuleType("bw2io_removed_module")
+    module.CompiledMigration = type("CompiledMigration", (), {})
+    module.CompiledMigration.__module__ = module.__name__
+    sys.modules[module.__name__] = module
+    try:
+        with open(migration.compiled_filepath, "wb") as f:
+            pickle.dump((None, module.CompiledMigration()), f)
+    finally:
+        del sys.modules[module.__name__]
+    with pytest.raises(ModuleNotFoundError):
+        with open(migration.compiled_filepath, "rb") as f:
+            pickle.load(f)
+    assert len(migration.compile()) == 2
+
+
+@bw2test
+def test_migrated_values_are_copied():
+    Migration("lists").write(
+        {"fields": ["name"], "data": [[["foo"], {"categories": ["air"]}]]}, "lists"
+    )
+    first = migrate_datasets([{"name": "foo"}], "lists")
+    first[0]["categories"].append("urban")
+    second = migrate_exchanges([{"exchanges": [{"name": "foo"}]}], "lists")
+    assert second[0]["exchanges"][0]["categories"] == ["air"]
+    assert migrate_datasets([{"name": "foo"}], "lists")[0]["categories"] == ["air"]
@@ -0,0 +1,256 @@
+import inspect
+from copy import deepcopy
+from functools import partial
+
+import pytest
+
+from bw2io.importers.base_lci import LCIImporter
+from bw2io.strategies import (
+    drop_falsey_uncertainty_fields_but_keep_zeros,
+    drop_unlinked,
+    fix_unreasonably_high_lognormal_uncertainties,
+    link_technosphere_by_activity_hash,
+    normalize_units,
+    remove_zero_amount_coproducts,
+    set_lognormal_loc_value,
+    sp_allocate_products,
+    tupleize_categories,
+)
+from bw2io.strategies.pipeline import (
+    SHARD_SAFE,
+    apply_sharded,
+    dataset_transform,
+    exchange_filter,
+    exchange_transform,
+    fuse,
+    get_transform,
+    group_strategies,
+    is_shard_safe,
+    shard_safe,
+)
+
+
+def get_data():
+    return [
+        {
+            "database": "db",
+            "code": "a",
+            "name": "a",
+            "unit": "kg",
+            "categories": ["foo"],
+            "exchanges": [
+                {
+                    "name": "a",
+                    "unit": "kilogram",
+                    "type": "production",
+                    "amount": 1,
+                    "uncertainty type": 0,
+                },
+                {
+                    "name": "b",
+                    "unit": "m3",
+                    "type": "production",
+                    "amount": 0,
+                    "uncertainty type": 0,
+                },
+                {
+                    "name": "c",
+                    "unit": "kg",
+                    "type": "technosphere",
+                    "amount": 2,
+                    "uncertainty type": 2,
+                    "scale": 5,
+                    "minimum": "",
+                    "input": ("db", "c"),
+                },
+            ],
+        },
+        {"database": "db", "code": "b", "name": "b", "unit": "kwh", "exchanges": []},
+    ]
+
+
+STRATEGIES = [
+    normalize_units,
+    remove_zero_amount_coproducts,
+    set_lognormal_loc_value,
+    partial(fix_unreasonably_high_lognormal_uncertainties, cutoff=1),
+    tupleize_categories,
+    drop_falsey_uncertainty_fields_but_keep_zeros,
+]
+
+
+def test_decorated_strategies_still_work_on_database():
+    data = [{"exchanges": [{"name": "foo", "amount": 1, "uncertainty type": 2}]}]
+    set_lognormal_loc_value(data)
+    assert data[0]["exchanges"][0]["loc"] == 0
+    assert set_lognormal_loc_value.__name__ == "set_lognormal_loc_value"
+    assert not hasattr(set_lognormal_loc_value, "__wrapped__")
+    assert list(inspect.signature(set_lognormal_loc_value).parameters) == [
+        "db",
+        "args",
+        "kwargs",
+    ]
+
+
+def test_missing_exchanges():
+    @exchange_transform
+    def strict(exc):
+        pass
+
+    @exchange_transform(skip_missing=True)
+    def lenient(exc):
+        exc["amount"] = 1
+
+    assert lenient([{}]) == [{}]
+    assert fuse([lenient, set_lognormal_loc_value])([{}]) == [{}]
+    for strategy in (strict, drop_unlinked, fuse([lenient, strict])):
+        with pytest.raises(KeyError):
+            strategy([{}])
+    data = [{"exchanges": [{}]}]
+    assert fuse([strict, lenient])(data) == [{"exchanges": [{"amount": 1}]}]
+
+
+def test_get_transform():
+    assert get_transform(normalize_units)[0] == "dataset"
+    assert get_transform(set_lognormal_loc_value)[0] == "exchange"
+    assert get_transform(drop_unlinked)[0] == "exchange filter"
+    assert get_transform(link_technosphere_by_activity_hash) is None
+    kind, func = get_transform(
+        partial(fix_unreasonably_high_lognormal_uncertainties, cutoff=1)
+    )
+    assert kind == "exchange"
+    assert func.keywords == {"cutoff": 1}
+
+
+def test_get_transform_positional_partial():
+    assert get_transform(partial(fix_unreasonably_high_lognormal_uncertainties)) == (
+        "exchange",
+        fix_unreasonably_high_lognormal_uncertainties.transform[1],
+    )
+    assert get_transform(partial(normalize_units, [])) is None
+
+
+def test_group_strategies():
+    groups = group_strategies(
+        [
+            normalize_units,
+            set_lognormal_loc_value,
+            link_technosphere_by_activity_hash,
+            drop_unlinked,
+        ]
+    )
+    assert groups == [
+        [normalize_units, set_lognormal_loc_value],
+        [link_technosphere_by_activity_hash],
+        [drop_unlinked],
+    ]
+
+
+def test_fuse_same_result_as_sequential():
+    expected = get_data()
+    for strategy in STRATEGIES:
+        expected = strategy(expected)
+    assert fuse(STRATEGIES)(get_data()) == expected
+    assert len(expected[0]["exchanges"]) == 2
+    assert expected[0]["exchanges"][1]["scale"] == 0.25
+    assert "minimum" not in expected[0]["exchanges"][1]
+
+
+def test_fuse_order_within_exchange_pass():
+    @exchange_transform
+    def double(exc):
+        exc["amount"] *= 2
+
+    @exchange_filter
+    def small(exc):
+        return exc["amount"] < 3
+
+    @dataset_transform
+    def count(ds):
+        ds["count"] = len(ds["exchanges"])
+
+    data = [{"exchanges": [{"amount": 1}, {"amount": 2}]}]
+    assert fuse([double, small, count])(data) == [
+        {"count": 1, "exchanges": [{"amount": 2}]}
+    ]
+    data = [{"exchanges": [{"amount": 1}, {"amount": 2}]}]
+    assert fuse([small, double, count])(data) == [
+        {"count": 2, "exchanges": [{"amount": 2}, {"amount": 4}]}
+    ]
+
+
+def test_apply_strategies_fuse():
+    sequential = LCIImporter("db")
+    sequential.data = get_data()
+    sequential.apply_strategies(STRATEGIES + [drop_unlinked], verbose=False)
+
+    fused = LCIImporter("db")
+    fused.data = get_data()
+    fused.apply_strategies(STRATEGIES + [drop_unlinked], verbose=False, fuse=True)
+
+    assert fused.data == sequential.data
+    assert fused.applied_strategies == sequential.applied_strategies
+    assert len(fused.data[0]["exchanges"]) == 1
+
+
+def test_apply_strategies_fuse_signals():
+    class Signal:
+        def __init__(self):
+            self.calls = []
+
+        def emit(self, *args):
+            self.calls.append(args)
+
+    imp = LCIImporter("db")
+    imp.data = get_data()
+    imp.signal = Signal()
+    imp.apply_strategies(STRATEGIES, verbose=False, fuse=True)
+    assert imp.signal.calls == [(i + 1, len(STRATEGIES)) for i in range(len(STRATEGIES))]
+
+
+def test_is_shard_safe():
+    assert is_shard_safe(normalize_units)
+    assert is_shard_safe(partial(fix_unreasonably_high_lognormal_uncertainties, cutoff=1))
+    assert is_shard_safe(sp_allocate_products)
+    assert not is_shard_safe(link_technosphere_by_activity_hash)
+    assert not is_shard_safe(partial(normalize_units, []))
+
+
+def test_shard_safe_registry():
+    def foo(db):
+        return db
+
+    assert not is_shard_safe(foo)
+    try:
+        assert shard_safe(foo) is foo
+        assert is_shard_safe(foo)
+    finally:
+        SHARD_SAFE.discard(foo)
+
+
+def test_apply_sharded():
+    data = [deepcopy(ds) for _ in range(25) for ds in get_data()]
+    expected = deepcopy(data)
+    for strategy in STRATEGIES:
+        expected = strategy(expected)
+    assert apply_sharded(data, STRATEGIES, processes=2) == expected
+
+
+def test_apply_sharded_empty():
+    assert apply_sharded([], STRATEGIES, processes=2) == []
+
+
+def test_apply_strategies_processes():
+    strategies = STRATEGIES + [link_technosphere_by_activity_hash, drop_unlinked]
+
+    sequential = LCIImporter("db")
+    sequential.data = get_data()
+    sequential.apply_strategies(strategies, verbose=False)
+
+    parallel = LCIImporter("db")
+    parallel.data = get_data()
+    parallel.apply_strategies(strategies, verbose=False, processes=2)
+
+    assert parallel.data == sequential.data
+    assert parallel.applied_strategies == sequential.applied_strategies
+    assert len(parallel.strategy_report()) == 3
@@ -0,0 +1,128 @@
+from copy import deepcopy
+
+from bw2data import Database, databases
+from bw2data.tests import bw2test
+
+from bw2io.importers.base_lci import LCIImporter
+from bw2io.upsert import find_changes, upsert_database
+
+
+def get_data():
+    return [
+        {
+            "database": "db",
+            "code": code,
+            "name": name,
+            "unit": "kilogram",
+            "location": "GLO",
+            "type": "process",
+            "exchanges": [
+                {
+                    "input": ("db", code),
+                    "amount": 1,
+                    "type": "production",
+                },
+                {
+                    "input": ("db", other),
+                    "amount": 0.5,
+                    "type": "technosphere",
+                },
+            ],
+        }
+        for code, name, other in [("a", "A", "b"), ("b", "B", "c"), ("c", "C", "a")]
+    ]
+
+
+def write_existing():
+    db = Database("db", backend="sqlite")
+    db.register()
+    db.write({(ds["database"], ds["code"]): ds for ds in get_data()})
+    return db
+
+
+@bw2test
+def test_find_changes():
+    db = write_existing()
+    data = get_data()
+    data[1]["name"] = "B2"
+    data[2]["exchanges"][1]["amount"] = 2
+    data.append(deepcopy(data[0]))
+    data[3]["code"] = "d"
+    data[3]["exchanges"][0]["input"] = ("db", "d")
+    new, changed, unchanged = find_changes(db, data)
+    assert [ds["code"] for ds in new] == ["d"]
+    assert sorted(ds["code"] for ds in changed) == ["b", "c"]
+    assert [ds["code"] for ds in unchanged] == ["a"]
+
+
+@bw2test
+def test_upsert_database():
+    db = write_existing()
+    ids = {act["code"]: act.id for act in db}
+    data = get_data()
+    data[1]["name"] = "B2"
+    data[1]["exchanges"][1]["amount"] = 3
+    new = deepcopy(data[0])
+    new["code"] = "d"
+    new["exchanges"] = [{"input": ("db", "d"), "amount": 1, "type": "production"}]
+    data = [data[1], new]
+
+    modified = databases["db"]["modified"]
+    assert upsert_database(db, data) == {"new": 1, "changed": 1, "unchanged": 0}
+
+    assert len(db) == 4
+    assert databases["db"]["number"] == 4
+    assert databases["db"]["modified"] != modified
+    # Activity not in ``data`` is left alone
+    assert db.get("a").id == ids["a"]
+    assert len(db.get("a").exchanges()) == 2
+    b = db.get("b")
+    assert b["name"] == "B2"
+    assert len(b.exchanges()) == 2
+    assert sorted(exc["amount"] for exc in b.exchanges()) == [1, 3]
+    assert db.get("d")["name"] == "A"
+
+
+@bw2test
+def test_upsert_database_keeps_ids():
+    db = write_existing()
+    ids = {act["code"]: act.id for act in db}
+    exchange_ids = {
+        act["code"]: sorted(exc._document.id for exc in act.exchanges()) for act in db
+    }
+    data = get_data()
+    # Only the activity changed
+    data[0]["name"] = "A2"
+    # Activity and exchanges changed
+    data[1]["name"] = "B2"
+    data[1]["exchanges"][1]["amount"] = 3
+    assert upsert_database(db, data) == {"new": 0, "changed": 2, "unchanged": 1}
+
+    assert {act["code"]: act.id for act in db} == ids
+    a = db.get("a")
+    assert a["name"] == "A2"
+    assert sorted(exc._document.id for exc in a.exchanges()) == exchange_ids["a"]
+    b = db.get("b")
+    assert sorted(exc["amount"] for exc in b.exchanges()) == [1, 3]
+    assert sorted(exc._document.id for exc in b.exchanges()) != exchange_ids["b"]
+
+
+@bw2test
+def test_upsert_database_nothing_changed():
+    db = write_existing()
+    modified = databases["db"]["modified"]
+    assert upsert_database(db, get_data()) == {"new": 0, "changed": 0, "unchanged": 3}
+    assert databases["db"]["modified"] == modified
+
+
+@bw2test
+def test_write_database_upsert():
+    write_existing()
+    imp = LCIImporter("db")
+    imp.data = get_data()[:1]
+    imp.data[0]["name"] = "A2"
+    db = imp.write_database(delete_existing=False, upsert=True)
+    assert imp.upsert_statistics == {"new": 0, "changed": 1, "unchanged": 0}
+    assert len(db) == 3
+    assert db.get("a")["name"] == "A2"
+    assert db.get("b")["name"] == "B"
@@ -1,8 +1,11 @@
 import sys
 import unittest
 
+from bw2io import utils
 from bw2io.utils import (
     activity_hash,
+    activity_hashes,
+    activity_key,
     es2_activity_hash,
     format_for_logging,
     load_json_data_file,
@@ -33,6 +36,59 @@ class UtilsTestCase(unittest.TestCase):
         ds = {"name": "正しい馬のバッテリーの定番"}
         self.assertEqual(activity_hash(ds), "d2b18b4f9f9f88189c82224ffa524e93")
 
+    def test_activity_hash_algorithms(self):
+        ds = {"name": "care bears", "unit": "kilogram", "location": "GLO"}
+        self.assertEqual(
+            activity_hash(ds, algorithm="md5"), "a6d6dd46cc33acd23826fa5b4e83377f"
+        )
+        self.assertEqual(len(activity_hash(ds, algorithm="blake2b")), 32)
+        self.assertNotEqual(
+            activity_hash(ds, algorithm="blake2b"), activity_hash(ds)
+        )
+
+    @unittest.skipIf(utils.xxhash is None, "xxhash not installed")
+    def test_activity_hash_xxhash(self):
+        ds = {"name": "care bears", "unit": "kilogram", "location": "GLO"}
+        self.assertEqual(
+            activity_hash(ds, algorithm="xxhash"),
+            utils.xxhash.xxh3_128_hexdigest("care bearskilogramglo".encode("utf-8")),
+        )
+        self.assertEqual(len(activity_hash(ds, algorithm="xxhash")), 32)
+
+    @unittest.skipIf(utils.xxhash is not None, "xxhash installed")
+    def test_activity_hash_xxhash_missing(self):
+        with self.assertRaises(ImportError):
+            activity_hash({"name": "care bears"}, algorithm="xxhash")
+
+    def test_activity_hashes(self):
+        data = [
+            {"name": "care bears", "unit": "kilogram", "location": "GLO"},
+            {},
+            {"name": "Care Bears", "unit": "kilogram", "location": "GLO"},
+        ]
+        self.assertEqual(
+            activity_hashes(data),
+            [
+                "a6d6dd46cc33acd23826fa5b4e83377f",
+                "d41d8cd98f00b204e9800998ecf8427e",
+                "a6d6dd46cc33acd23826fa5b4e83377f",
+            ],
+        )
+        self.assertEqual(
+            activity_hashes(data, fields=["location"]),
+            [activity_hash(ds, fields=["location"]) for ds in data],
+        )
+
+    def test_activity_key(self):
+        ds = {"name": "Care Bears", "categories": ["toys", "fun"], "unit": None}
+        self.assertEqual(
+            activity_key(ds), ("care bears", "toysfun", "", "", "")
+        )
+        self.assertEqual(
+            activity_key(ds, fields=["name"], case_insensitive=False),
+            ("Care Bears",),
+        )
+
     def test_format_for_logging(self):
         ds = {"name": "care bears", "unit": "kilogram", "location": "GLO"}
         if sys.version_info < (3, 0):